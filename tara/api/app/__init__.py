@@ -0,0 +1,4 @@
+from dotenv import load_dotenv
+
+# Carrega o .env antes dos módulos que leem configuração no import.
+load_dotenv()
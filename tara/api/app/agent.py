@@ -1,12 +1,35 @@
 import asyncio
-import json
+import inspect
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable
 
 from g4f.client import AsyncClient as G4FClient
 from g4f import Provider
 from g4f.errors import MissingAuthError, NoValidHarFileError
-from .logger import get_logger
+from pydantic import ValidationError
+from .cache import analysis_key, food_key, menu_cache, menu_key, result_cache
+from . import metrics
+from .logger import get_logger, log_payload
+from .food_index import canonical_food_name, food_index
+from .foods import BEVERAGE, CATEGORIES, PROTEIN, PROTEIN_COMPLEMENT, VEGETABLE, Food
+from .parsing import JSONExtractionError, extract_json
+from .recommendation import Recommendation, adjust_to_meal
+from .portions import (
+    ESTIMATED_SOURCE,
+    LOCAL_SOURCE,
+    fits_meal,
+    match_menu,
+    recommend_locally,
+    solve_portions,
+)
+from .scoreboard import provider_name, scoreboard
+from .streaming import PartialPublisher, partial_results
+from .tracing import span
 
-from .prompts import SYSTEM_PROMPT, build_user_prompt
+from .prompts import Prompt, build_batch_messages, build_day_messages, build_messages
 
 
 _EXTRACT_PROMPT = """Extraia do texto abaixo uma lista com cada alimento individual.
@@ -18,6 +41,24 @@ Responda APENAS com um array JSON de strings, sem explicações.
 Texto:
 {menu_text}"""
 
+_ESTIMATE_PROMPT = """Estime a composição média por 100 g de cada alimento abaixo, pronto para consumo, e classifique-o em uma categoria.
+
+Categorias:
+- proteina: carnes, frango, peixes (prato principal)
+- complemento_proteico: ovos, queijos e derivados
+- carboidrato: arroz, massas, raízes, pães, cuscuz
+- leguminosa: feijão, lentilha, grão-de-bico
+- vegetal: saladas e legumes
+- denso: frituras, farofa, molhos e sobremesas muito calóricas
+- bebida
+- fruta
+
+Responda APENAS com um array JSON, um objeto por alimento e na mesma ordem, sem explicações:
+[{{"nome": texto, "categoria": texto, "kcal": numero, "proteina_g": numero, "carboidrato_g": numero, "gordura_g": numero}}]
+
+Alimentos:
+{foods}"""
+
 _FALLBACK_MODELS = (
     "gpt-5.2",
     "gpt-5-mini",
@@ -26,6 +67,43 @@ _FALLBACK_MODELS = (
 
 _LLM_TIMEOUT_SECONDS = 25
 
+# Modo de disparo dos providers: "sequential" (um por vez), "parallel" (os
+# primeiros K ao mesmo tempo) ou "hedged" (backup disparado após um atraso
+# baseado na latência observada).
+_RACE_MODES = ("sequential", "parallel", "hedged")
+
+
+def _race_mode(value: str) -> str:
+    if value not in _RACE_MODES:
+        raise ValueError(f"TARA_LLM_RACE_MODE desconhecido: {value}")
+    return value
+
+
+_LLM_RACE_MODE = _race_mode(os.getenv("TARA_LLM_RACE_MODE", "sequential"))
+_LLM_RACE_WIDTH = int(os.getenv("TARA_LLM_RACE_WIDTH", "2"))
+_LLM_HEDGE_DELAY_SECONDS = float(os.getenv("TARA_LLM_HEDGE_DELAY_SECONDS", "5"))
+_LLM_HEDGE_MIN_DELAY_SECONDS = 0.5
+_LLM_HEDGE_QUANTILE = 0.9
+_LLM_HEDGE_MIN_SAMPLES = 10
+
+_latency_samples: deque[float] = deque(maxlen=200)
+
+_CLIENT_POOL_SIZE = int(os.getenv("TARA_LLM_CLIENT_POOL_SIZE", "16"))
+
+# Com alguém acompanhando o job, a resposta vem em stream e cada item de
+# `escolhas` é publicado assim que fica completo.
+_LLM_STREAM = os.getenv("TARA_LLM_STREAM", "1") != "0"
+
+# Cardápios com todos os itens na tabela local são resolvidos sem LLM.
+_LOCAL_SOLVER_ENABLED = os.getenv("TARA_LOCAL_SOLVER", "1") != "0"
+
+# Metas distintas enviadas ao LLM no fallback do lote (numa única chamada); as
+# demais usam a recomendação da meta mais próxima, escalada pelo adjust_to_meal.
+_BATCH_LLM_TARGETS = int(os.getenv("TARA_BATCH_LLM_TARGETS", "6"))
+
+# Recalcula o total e escala as gramas da resposta do LLM para 85-100% da meta.
+_ADJUST_RECOMMENDATION = os.getenv("TARA_RECOMMENDATION_ADJUST", "1") != "0"
+
 _FALLBACK_PROVIDERS = (
     Provider.Chatai,
     Provider.OIVSCodeSer2,
@@ -47,113 +125,792 @@ def _create_client():
     return _default_create_client()
 
 
-async def _call_chat_completion(messages: list[dict], model: str, provider):
-    client = _create_client()
-    return await client.chat.completions.create(
+class ClientPool:
+    """Pool de clientes LLM reaproveitados entre modelos e providers."""
+
+    def __init__(self, factory: Callable[[], Any], size: int):
+        self._factory = factory
+        self._size = max(1, size)
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._clients: list[Any] = []
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[Any]:
+        if self._idle.empty() and len(self._clients) < self._size:
+            client = self._factory()
+            self._clients.append(client)
+        else:
+            client = await self._idle.get()
+        try:
+            yield client
+        finally:
+            self._idle.put_nowait(client)
+
+    async def close(self) -> None:
+        clients, self._clients = self._clients, []
+        self._idle = asyncio.Queue()
+        for client in clients:
+            close = getattr(client, "aclose", None) or getattr(client, "close", None)
+            if close is None:
+                continue
+            try:
+                result = close()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as exc:
+                logger.warning("Falha ao fechar cliente LLM: %s", exc)
+
+
+_client_pool: ClientPool | None = None
+
+
+def start_client_pool(
+    size: int = _CLIENT_POOL_SIZE,
+    factory: Callable[[], Any] | None = None,
+) -> ClientPool:
+    """Cria o pool compartilhado; sem pool, cada chamada cria seu cliente."""
+    global _client_pool
+    _client_pool = ClientPool(factory or (lambda: _create_client()), size)
+    return _client_pool
+
+
+async def close_client_pool() -> None:
+    global _client_pool
+    pool, _client_pool = _client_pool, None
+    if pool is not None:
+        await pool.close()
+
+
+class _Message:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class _Choice:
+    def __init__(self, content: str):
+        self.message = _Message(content)
+
+
+class _StreamedResponse:
+    """Resposta montada a partir dos chunks, no mesmo formato da não-stream."""
+
+    def __init__(self, content: str):
+        self.choices = [_Choice(content)]
+
+
+class _ParsedResponse:
+    """Resposta do provider com o valor já validado por `parse`."""
+
+    def __init__(self, response, parsed):
+        self.choices = response.choices
+        self.parsed = parsed
+
+
+async def _complete(
+    client,
+    messages: list[dict],
+    model: str,
+    provider,
+    on_delta: Callable[[str], None] | None = None,
+):
+    if on_delta is None:
+        return await client.chat.completions.create(
+            model=model,
+            messages=messages,
+            provider=provider,
+        )
+
+    stream = client.chat.completions.create(
         model=model,
         messages=messages,
         provider=provider,
+        stream=True,
     )
+    if inspect.isawaitable(stream):
+        stream = await stream
+    parts = []
+    async for chunk in stream:
+        if not chunk.choices:
+            continue
+        text = chunk.choices[0].delta.content
+        if text:
+            parts.append(text)
+            on_delta(text)
+    return _StreamedResponse("".join(parts))
+
+
+async def _call_chat_completion(
+    messages: list[dict],
+    model: str,
+    provider,
+    on_delta: Callable[[str], None] | None = None,
+):
+    if _client_pool is None:
+        return await _complete(_create_client(), messages, model, provider, on_delta)
 
+    async with _client_pool.acquire() as client:
+        return await _complete(client, messages, model, provider, on_delta)
 
-async def _call_with_timeout(messages: list[dict], model: str, provider):
+
+async def _call_with_timeout(
+    messages: list[dict],
+    model: str,
+    provider,
+    on_delta: Callable[[str], None] | None = None,
+):
     try:
         return await asyncio.wait_for(
-            _call_chat_completion(messages, model, provider),
+            _call_chat_completion(messages, model, provider, on_delta),
             timeout=_LLM_TIMEOUT_SECONDS,
         )
     except asyncio.TimeoutError as exc:
         raise TimeoutError("Timeout ao chamar LLM") from exc
 
 
-async def _call_with_providers(messages: list[dict], model: str):
+def _hedge_delay() -> float:
+    """Atraso antes do backup: quantil das latências de sucesso recentes."""
+    if len(_latency_samples) < _LLM_HEDGE_MIN_SAMPLES:
+        return _LLM_HEDGE_DELAY_SECONDS
+    ordered = sorted(_latency_samples)
+    index = min(len(ordered) - 1, int(len(ordered) * _LLM_HEDGE_QUANTILE))
+    return min(
+        max(ordered[index], _LLM_HEDGE_MIN_DELAY_SECONDS),
+        _LLM_TIMEOUT_SECONDS,
+    )
+
+
+async def _timed_call(
+    messages: list[dict],
+    model: str,
+    provider,
+    stream: PartialPublisher | None = None,
+    parse: Callable[[str], Any] | None = None,
+):
+    attempt = stream.attempt() if stream is not None else None
+    started = time.perf_counter()
+    try:
+        with span("llm_attempt", model=model, provider=provider_name(provider)):
+            response = await _call_with_timeout(
+                messages,
+                model,
+                provider,
+                on_delta=attempt.feed if attempt is not None else None,
+            )
+        latency = time.perf_counter() - started
+        if parse is not None:
+            try:
+                with span("parse_response", model=model):
+                    response = _ParsedResponse(response, parse(response.choices[0].message.content))
+            except JSONExtractionError as exc:
+                logger.warning(
+                    "Resposta inutilizável de model=%s provider=%s: %s",
+                    model,
+                    provider_name(provider),
+                    exc,
+                )
+                log_payload(logger, "resposta inutilizável", response.choices[0].message.content)
+                raise
+    except asyncio.CancelledError:
+        scoreboard.release(model, provider)
+        if attempt is not None:
+            attempt.abandon()
+        raise
+    except Exception as exc:
+        scoreboard.record_failure(model, provider, exc)
+        metrics.llm_failures.inc(model, provider_name(provider), type(exc).__name__)
+        if attempt is not None:
+            attempt.abandon()
+        raise
+    _latency_samples.append(latency)
+    scoreboard.record_success(model, provider, latency)
+    metrics.llm_latency.observe(latency, model, provider_name(provider))
+    return response
+
+
+def _race_settings() -> tuple[int, int, float | None]:
+    """Retorna (disparos iniciais, máximo em paralelo, atraso do hedge)."""
+    width = max(1, _LLM_RACE_WIDTH)
+    if _LLM_RACE_MODE == "parallel":
+        return width, width, None
+    if _LLM_RACE_MODE == "hedged":
+        return 1, width, _hedge_delay()
+    return 1, 1, None
+
+
+async def _call_with_providers(
+    messages: list[dict],
+    model: str,
+    stream: PartialPublisher | None = None,
+    tally: list[int] | None = None,
+    parse: Callable[[str], Any] | None = None,
+):
+    """Dispara providers do modelo conforme o modo de corrida; `tally[0]` conta os disparos."""
+    initial, width, hedge_delay = _race_settings()
+    providers = iter(scoreboard.rank_providers(model, _FALLBACK_PROVIDERS))
+    pending: set[asyncio.Task] = set()
     last_error: Exception | None = None
 
-    for provider in _FALLBACK_PROVIDERS:
-        try:
-            return await _call_with_timeout(messages, model, provider)
-        except (MissingAuthError, NoValidHarFileError) as exc:
-            last_error = exc
-        except TimeoutError as exc:
-            last_error = exc
-        except Exception as exc:
-            last_error = exc
+    def _launch() -> bool:
+        provider = next(providers, None)
+        while provider is not None and not scoreboard.try_acquire(model, provider):
+            provider = next(providers, None)
+        if provider is None:
+            return False
+        if tally is not None:
+            tally[0] += 1
+        pending.add(asyncio.create_task(_timed_call(messages, model, provider, stream, parse)))
+        return True
+
+    try:
+        while len(pending) < initial and _launch():
+            pass
+
+        while pending:
+            timeout = hedge_delay if len(pending) < width else None
+            done, _ = await asyncio.wait(
+                pending,
+                timeout=timeout,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                _launch()
+                continue
+
+            pending.difference_update(done)
+            winner = None
+            for task in done:
+                exc = task.exception()
+                if exc is None:
+                    winner = winner or task
+                else:
+                    last_error = exc
+            if winner is not None:
+                return winner.result()
+
+            while len(pending) < initial and _launch():
+                pass
+    finally:
+        for task in pending:
+            task.cancel()
 
     if last_error is not None:
         raise last_error
     raise RuntimeError("Nenhum provider disponível para completar a requisicao.")
 
 
-async def get_chat_with_fallback(messages: list[dict]):
-    last_error: Exception | None = None
+async def get_chat_with_fallback(
+    messages: list[dict],
+    stream: PartialPublisher | None = None,
+    parse: Callable[[str], Any] | None = None,
+):
+    """Tenta modelos e providers em ordem de ranking até uma resposta.
 
-    for model in _FALLBACK_MODELS:
-        try:
-            response = await _call_with_providers(messages, model)
-            logger.info("LLM sucesso com model=%s", model)
-            return response
-        except (MissingAuthError, NoValidHarFileError) as exc:
-            logger.warning("LLM falhou por auth/har com model=%s: %s", model, exc)
-            last_error = exc
-        except TimeoutError as exc:
-            logger.warning("LLM timeout com model=%s: %s", model, exc)
-            last_error = exc
-        except Exception as exc:
-            logger.warning("LLM falhou com model=%s: %s", model, exc)
-            last_error = exc
+    Com `stream`, cada tentativa recebe a resposta em chunks e repassa o texto
+    ao publicador de resultados parciais. Com `parse`, uma resposta que ele
+    rejeita (JSONExtractionError) conta como falha do provider e a busca segue;
+    o valor aceito fica em `response.parsed`.
+    """
+    last_error: Exception | None = None
+    tally = [0]
+    try:
+        for model in scoreboard.rank_models(_FALLBACK_MODELS, _FALLBACK_PROVIDERS):
+            try:
+                response = await _call_with_providers(messages, model, stream, tally, parse)
+                logger.info("LLM sucesso com model=%s", model)
+                return response
+            except (MissingAuthError, NoValidHarFileError) as exc:
+                logger.warning("LLM falhou por auth/har com model=%s: %s", model, exc)
+                last_error = exc
+            except TimeoutError as exc:
+                logger.warning("LLM timeout com model=%s: %s", model, exc)
+                last_error = exc
+            except Exception as exc:
+                logger.warning("LLM falhou com model=%s: %s", model, exc)
+                last_error = exc
+    finally:
+        metrics.llm_attempts.observe(tally[0])
 
     if last_error is not None:
         raise last_error
     raise RuntimeError("Nenhum modelo disponível para completar a requisicao.")
 
 
+def _parse_foods(content: str) -> list[str]:
+    items = extract_json(content, expect=list)
+    if not all(isinstance(item, str) for item in items):
+        raise JSONExtractionError("Lista de alimentos com itens que não são texto.")
+    return items
+
+
+def _parse_recommendation(content: str) -> Recommendation:
+    try:
+        return Recommendation.model_validate(extract_json(content, expect=dict))
+    except ValidationError as exc:
+        raise JSONExtractionError(
+            f"Recomendação fora do formato esperado ({exc.error_count()} erros)."
+        ) from exc
+
+
+def _parse_day(content: str, meal_types: list[str]) -> dict[str, Recommendation]:
+    data = extract_json(content, expect=dict)
+    meals = data.get("refeicoes", data)
+    if not isinstance(meals, dict) or any(meal_type not in meals for meal_type in meal_types):
+        raise JSONExtractionError("Resposta do dia sem todas as refeições pedidas.")
+    try:
+        return {
+            meal_type: Recommendation.model_validate(meals[meal_type])
+            for meal_type in meal_types
+        }
+    except ValidationError as exc:
+        raise JSONExtractionError(
+            f"Recomendação fora do formato esperado ({exc.error_count()} erros)."
+        ) from exc
+
+
+def _usable_estimate(food: Food) -> bool:
+    """O solver divide pelas kcal (e, na proteína, pela proteína) do item.
+
+    Só bebidas (trocadas por água) e vegetais (porção fixa) podem vir com zero.
+    """
+    if food.category not in CATEGORIES:
+        return False
+    if min(food.kcal, food.protein_g, food.carbs_g, food.fat_g) < 0:
+        return False
+    if food.category not in (BEVERAGE, VEGETABLE) and food.kcal <= 0:
+        return False
+    return food.category not in (PROTEIN, PROTEIN_COMPLEMENT) or food.protein_g > 0
+
+
+def _parse_estimates(content: str, names: list[str]) -> list[Food]:
+    rows = extract_json(content, expect=list)
+    if len(rows) != len(names):
+        raise JSONExtractionError(
+            f"Estimativa com {len(rows)} alimentos; esperados {len(names)}."
+        )
+    foods = []
+    for name, row in zip(names, rows):
+        try:
+            food = Food(
+                name=name,
+                category=row["categoria"],
+                kcal=float(row["kcal"]),
+                protein_g=float(row["proteina_g"]),
+                carbs_g=float(row["carboidrato_g"]),
+                fat_g=float(row["gordura_g"]),
+            )
+        except (KeyError, TypeError, ValueError) as exc:
+            raise JSONExtractionError(f"Estimativa inválida para {name}.") from exc
+        if not _usable_estimate(food):
+            raise JSONExtractionError(f"Estimativa inválida para {name}.")
+        foods.append(food)
+    return foods
+
+
+def _finish(recommendation: Recommendation, meal: dict) -> dict:
+    if _ADJUST_RECOMMENDATION:
+        return adjust_to_meal(recommendation, meal)
+    return recommendation.model_dump()
+
+
 async def extract_foods(menu_text: str) -> list[str]:
     """Extrai lista de alimentos individuais do texto do cardápio."""
-    logger.info("extract_foods prompt: %s", _EXTRACT_PROMPT.format(menu_text=menu_text))
-    response = await get_chat_with_fallback(
-        [
-            {"role": "user", "content": _EXTRACT_PROMPT.format(menu_text=menu_text)},
-        ]
-    )
-
-    content = response.choices[0].message.content
-    logger.info("extract_foods raw response: %s", content)
-    cleaned = content.strip()
-    if cleaned.startswith("```"):
-        cleaned = cleaned.strip("`")
-        if cleaned.lower().startswith("json"):
-            cleaned = cleaned[4:].lstrip()
+    prompt = _EXTRACT_PROMPT.format(menu_text=menu_text)
+    log_payload(logger, "extract_foods prompt", prompt)
     try:
-        items = json.loads(cleaned)
-        logger.info("extract_foods items: %s", items)
-        return items
-    except ValueError as exc:
-        logger.warning("Falha ao decodificar JSON em extract_foods: %s", content)
+        response = await get_chat_with_fallback(
+            [
+                {"role": "user", "content": prompt},
+            ],
+            parse=_parse_foods,
+        )
+    except JSONExtractionError as exc:
+        logger.warning("Falha ao decodificar JSON em extract_foods: %s", exc)
         raise ValueError("Resposta invalida do modelo em extract_foods.") from exc
 
+    log_payload(logger, "extract_foods raw response", lambda: response.choices[0].message.content)
+    items = response.parsed
+    log_payload(logger, "extract_foods items", items)
+    return items
 
-async def analyze_menu(profile: dict, menu_text: str, meal_type: str = "almoco") -> dict:
-    """Analisa cardápio e retorna recomendações baseadas no perfil do usuário."""
-    user_prompt = build_user_prompt(profile, menu_text, meal_type)
-    logger.info("system prompt: %s", SYSTEM_PROMPT)
-    logger.info("user prompt: %s", user_prompt)
-    
-    response = await get_chat_with_fallback(
-        [
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": user_prompt},
-        ]
+
+async def answer_without_llm(profile: dict, menu_text: str, meal_type: str = "almoco") -> dict | None:
+    """Resposta do `analyze_menu` vinda do cache ou da tabela local; None se precisa do LLM."""
+    cache_key = analysis_key(profile, menu_text, meal_type)
+    cached = await result_cache.get(cache_key)
+    if cached is not None:
+        logger.info("analyze_menu cache hit: %s", cache_key)
+        return cached
+
+    if not _LOCAL_SOLVER_ENABLED:
+        return None
+    meals = profile["meals"]
+    with span("local_solver") as record:
+        local = recommend_locally(menu_text, meals.get(meal_type, meals.get("almoco")))
+        if record is not None:
+            record.attributes["resolved"] = local is not None
+    if local is not None:
+        logger.info("analyze_menu resolvido pela tabela local")
+    return local
+
+
+async def analyze_menu(
+    profile: dict,
+    menu_text: str,
+    meal_type: str = "almoco",
+    prompt: Prompt | None = None,
+) -> dict:
+    """Analisa cardápio e retorna recomendações baseadas no perfil do usuário.
+
+    `prompt` reaproveita as mensagens já montadas (e validadas) na requisição.
+    """
+    answer = await answer_without_llm(profile, menu_text, meal_type)
+    if answer is not None:
+        return answer
+
+    cache_key = analysis_key(profile, menu_text, meal_type)
+    meals = profile["meals"]
+    meal = meals.get(meal_type, meals.get("almoco"))
+    if prompt is None:
+        prompt = build_messages(profile, menu_text, meal_type)
+    logger.info(
+        "analyze_menu prompt: %d caracteres (system=%d, user=%d, compacto=%s)",
+        prompt.total_chars,
+        prompt.system_chars,
+        prompt.user_chars,
+        prompt.compact,
     )
-    
-    content = response.choices[0].message.content
-    logger.info("analyze_menu raw response: %s", content)
-    cleaned = content.strip()
-    if cleaned.startswith("```"):
-        cleaned = cleaned.strip("`")
-        if cleaned.lower().startswith("json"):
-            cleaned = cleaned[4:].lstrip()
+    log_payload(logger, "user prompt", lambda: prompt.messages[1]["content"])
+
+    publish = partial_results.get()
     try:
-        return json.loads(cleaned)
-    except ValueError as exc:
-        logger.warning("Falha ao decodificar JSON em analyze_menu: %s", content)
+        response = await get_chat_with_fallback(
+            prompt.messages,
+            stream=PartialPublisher(publish) if _LLM_STREAM and publish is not None else None,
+            parse=_parse_recommendation,
+        )
+    except JSONExtractionError as exc:
+        logger.warning("Falha ao decodificar JSON em analyze_menu: %s", exc)
         raise ValueError("Resposta invalida do modelo em analyze_menu.") from exc
+
+    log_payload(logger, "analyze_menu raw response", lambda: response.choices[0].message.content)
+    recommendation = _finish(response.parsed, meal)
+    await result_cache.set(cache_key, recommendation)
+    return recommendation
+
+
+async def _day_without_llm(
+    profile: dict, menu_text: str, meal_types: list[str]
+) -> tuple[dict[str, dict], list[str]]:
+    """Refeições resolvidas pelo cache ou pela tabela local e as que faltam."""
+    meals = profile["meals"]
+    results: dict[str, dict] = {}
+    for meal_type in meal_types:
+        cached = await result_cache.get(analysis_key(profile, menu_text, meal_type))
+        if cached is not None:
+            results[meal_type] = cached
+
+    pending = [meal_type for meal_type in meal_types if meal_type not in results]
+    if pending and _LOCAL_SOLVER_ENABLED:
+        with span("local_solver", meals=len(pending)) as record:
+            foods = match_menu(menu_text)
+            if record is not None:
+                record.attributes["resolved"] = foods is not None
+        if foods is not None:
+            for meal_type in pending:
+                recommendation = solve_portions(foods, meals[meal_type])
+                if fits_meal(recommendation, meals[meal_type]):
+                    results[meal_type] = recommendation
+            solved = [meal_type for meal_type in pending if meal_type in results]
+            logger.info("analyze_day resolvido pela tabela local (%d refeições)", len(solved))
+            pending = [meal_type for meal_type in pending if meal_type not in results]
+    return results, pending
+
+
+async def answer_day_without_llm(
+    profile: dict, menu_text: str, meal_types: list[str]
+) -> dict[str, dict] | None:
+    """Resposta do `analyze_day` se nenhuma refeição precisa do LLM; senão None."""
+    results, pending = await _day_without_llm(profile, menu_text, meal_types)
+    if pending:
+        return None
+    return {meal_type: results[meal_type] for meal_type in meal_types}
+
+
+async def analyze_day(profile: dict, menu_text: str, meal_types: list[str]) -> dict[str, dict]:
+    """Recomendações de várias refeições para o mesmo cardápio.
+
+    Reaproveita o cache por refeição e o reconhecimento do cardápio na tabela
+    local; o que sobrar vai ao LLM numa única chamada com as metas de todas as
+    refeições. Cada resultado entra no cache como se viesse do `analyze_menu`.
+    """
+    meals = profile["meals"]
+    results, pending = await _day_without_llm(profile, menu_text, meal_types)
+    if len(pending) == 1:
+        results[pending[0]] = await analyze_menu(profile, menu_text, pending[0])
+    elif pending:
+        prompt = build_day_messages(profile, menu_text, pending)
+        logger.info(
+            "analyze_day prompt: %d caracteres para %d refeições (compacto=%s)",
+            prompt.total_chars,
+            len(pending),
+            prompt.compact,
+        )
+        log_payload(logger, "day prompt", lambda: prompt.messages[1]["content"])
+        try:
+            response = await get_chat_with_fallback(
+                prompt.messages,
+                parse=lambda content: _parse_day(content, pending),
+            )
+        except JSONExtractionError as exc:
+            logger.warning("Falha ao decodificar JSON em analyze_day: %s", exc)
+            raise ValueError("Resposta invalida do modelo em analyze_day.") from exc
+
+        log_payload(logger, "analyze_day raw response", lambda: response.choices[0].message.content)
+        for meal_type in pending:
+            recommendation = _finish(response.parsed[meal_type], meals[meal_type])
+            await result_cache.set(analysis_key(profile, menu_text, meal_type), recommendation)
+            results[meal_type] = recommendation
+
+    return {meal_type: results[meal_type] for meal_type in meal_types}
+
+
+async def estimate_foods(names: list[str]) -> dict[str, Food]:
+    """Composição por 100 g dos alimentos fora da tabela, numa única chamada.
+
+    Estimativas ficam no cache de resultados por alimento e são reaproveitadas
+    por outros cardápios.
+    """
+    estimates: dict[str, Food] = {}
+    missing = []
+    for name in dict.fromkeys(names):
+        cached = await menu_cache.get(food_key(canonical_food_name(name)))
+        if cached is not None:
+            estimates[name] = Food.from_row(cached)
+        else:
+            missing.append(name)
+    if not missing:
+        return estimates
+
+    prompt = _ESTIMATE_PROMPT.format(foods="\n".join(f"- {name}" for name in missing))
+    log_payload(logger, "estimate_foods prompt", prompt)
+    try:
+        response = await get_chat_with_fallback(
+            [{"role": "user", "content": prompt}],
+            parse=lambda content: _parse_estimates(content, missing),
+        )
+    except JSONExtractionError as exc:
+        logger.warning("Falha ao decodificar JSON em estimate_foods: %s", exc)
+        raise ValueError("Resposta invalida do modelo em estimate_foods.") from exc
+
+    for food in response.parsed:
+        await menu_cache.set(food_key(canonical_food_name(food.name)), food.to_row())
+        estimates[food.name] = food
+    return estimates
+
+
+async def _known_menu(menu_text: str) -> tuple[list[Food], bool] | None:
+    """Reconhecimento sem LLM: tabela local ou cache do cardápio."""
+    foods = match_menu(menu_text)
+    if foods is not None:
+        return foods, False
+    cached = await menu_cache.get(menu_key(menu_text))
+    if cached is not None:
+        return [Food.from_row(row) for row in cached["alimentos"]], cached["estimado"]
+    return None
+
+
+async def recognize_menu(menu_text: str) -> tuple[list[Food], bool]:
+    """Alimentos do cardápio e se algum teve a composição estimada pelo LLM.
+
+    Cardápio todo na tabela local: sem LLM. Caso contrário, uma chamada de
+    `extract_foods` e, para os itens desconhecidos, uma de `estimate_foods`; o
+    resultado fica em cache pelo cardápio normalizado.
+    """
+    known = await _known_menu(menu_text)
+    if known is not None:
+        return known
+
+    names = await extract_foods(menu_text)
+    matched = food_index.match_all(names)
+    unknown = [name for name, food in zip(names, matched) if food is None]
+    estimates = await estimate_foods(unknown) if unknown else {}
+    foods = [food if food is not None else estimates[name] for name, food in zip(names, matched)]
+    await menu_cache.set(
+        menu_key(menu_text),
+        {"alimentos": [food.to_row() for food in foods], "estimado": bool(unknown)},
+    )
+    return foods, bool(unknown)
+
+
+def _meal_key(meal: dict) -> tuple:
+    return tuple(sorted(meal.items()))
+
+
+def _solve_many(foods: list[Food], meals: list[dict], source: str) -> list[dict | None]:
+    """Solução local por perfil; None onde o solver não encaixa a meta."""
+    # Perfis com as mesmas metas na refeição compartilham a solução.
+    solved: dict[tuple, dict | None] = {}
+    results = []
+    for meal in meals:
+        key = _meal_key(meal)
+        if key not in solved:
+            recommendation = solve_portions(foods, meal, source)
+            solved[key] = recommendation if fits_meal(recommendation, meal) else None
+        results.append(solved[key])
+    return results
+
+
+def _menu_composition(foods: list[Food]) -> str:
+    unique = {food.name: food for food in foods}.values()
+    return "\n".join(
+        f"- {food.name}: {food.kcal:g} kcal, {food.protein_g:g}g de proteína, "
+        f"{food.carbs_g:g}g de carboidratos, {food.fat_g:g}g de gordura"
+        for food in unique
+    )
+
+
+def _spread(meals: list[dict], limit: int) -> list[dict]:
+    """Até `limit` metas distribuídas pela faixa de calorias de `meals`."""
+    ordered = sorted(meals, key=lambda meal: meal["calorias"])
+    if len(ordered) <= limit:
+        return ordered
+    if limit <= 1:
+        return [ordered[len(ordered) // 2]]
+    return [ordered[round(index * (len(ordered) - 1) / (limit - 1))] for index in range(limit)]
+
+
+def _target_key(meal: dict, menu_text: str, meal_type: str) -> str:
+    # Mesma chave do `analyze_menu` para um perfil com essa meta na refeição.
+    return analysis_key({"meals": {meal_type: meal}}, menu_text, meal_type)
+
+
+async def _batch_fallback(
+    foods: list[Food], meals: list[dict], menu_text: str, meal_type: str
+) -> dict[tuple, dict]:
+    """Recomendações do LLM para as metas que o solver não alcança, numa chamada.
+
+    Metas em cache não vão ao LLM. O prompt traz os alimentos já reconhecidos e
+    até `_BATCH_LLM_TARGETS` metas espalhadas pela faixa de calorias; cada meta
+    recebe a resposta da mais próxima, escalada para ela pelo `adjust_to_meal`.
+    """
+    answers: dict[tuple, dict] = {}
+    missing = []
+    for meal in meals:
+        cached = await result_cache.get(_target_key(meal, menu_text, meal_type))
+        if cached is not None:
+            answers[_meal_key(meal)] = cached
+        else:
+            missing.append(meal)
+    if not missing:
+        return answers
+
+    chosen = _spread(missing, _BATCH_LLM_TARGETS)
+    targets = {f"meta_{index}": meal for index, meal in enumerate(chosen, 1)}
+    prompt = build_batch_messages(_menu_composition(foods), targets)
+    logger.info(
+        "analyze_batch prompt: %d caracteres para %d de %d metas (compacto=%s)",
+        prompt.total_chars,
+        len(targets),
+        len(missing),
+        prompt.compact,
+    )
+    log_payload(logger, "batch prompt", lambda: prompt.messages[1]["content"])
+    try:
+        response = await get_chat_with_fallback(
+            prompt.messages,
+            parse=lambda content: _parse_day(content, list(targets)),
+        )
+    except JSONExtractionError as exc:
+        logger.warning("Falha ao decodificar JSON em analyze_batch: %s", exc)
+        raise ValueError("Resposta invalida do modelo em analyze_batch.") from exc
+
+    for meal in missing:
+        nearest = min(targets, key=lambda name: abs(targets[name]["calorias"] - meal["calorias"]))
+        recommendation = _finish(response.parsed[nearest], meal)
+        await result_cache.set(_target_key(meal, menu_text, meal_type), recommendation)
+        answers[_meal_key(meal)] = recommendation
+    return answers
+
+
+def _batch_meals(profiles: list[dict], meal_type: str) -> list[dict]:
+    return [profile["meals"].get(meal_type, profile["meals"].get("almoco")) for profile in profiles]
+
+
+async def _solve_batch(foods: list[Food], estimated: bool, meals: list[dict]) -> list[dict | None]:
+    source = ESTIMATED_SOURCE if estimated else LOCAL_SOURCE
+    with span("solve_portions", profiles=len(meals)):
+        return await asyncio.to_thread(_solve_many, foods, meals, source)
+
+
+async def answer_batch_without_llm(
+    profiles: list[dict], menu_text: str, meal_type: str = "almoco"
+) -> dict | None:
+    """Resposta do `analyze_batch` sem LLM; None se precisa dele.
+
+    Exige o cardápio já conhecido (tabela local ou cache) e todos os perfis
+    encaixados pelo solver.
+    """
+    known = await _known_menu(menu_text)
+    if known is None or not known[0]:
+        return None
+    foods, estimated = known
+    recommendations = await _solve_batch(foods, estimated, _batch_meals(profiles, meal_type))
+    if any(recommendation is None for recommendation in recommendations):
+        return None
+    return {
+        "alimentos": [food.name for food in foods],
+        "recommendations": recommendations,
+        "error": None,
+    }
+
+
+async def analyze_batch(profiles: list[dict], menu_text: str, meal_type: str = "almoco") -> dict:
+    """Recomendações do mesmo cardápio para vários perfis.
+
+    O cardápio é entendido uma vez (no máximo duas chamadas ao LLM, nenhuma se
+    estiver na tabela local); as porções de cada perfil saem do solver local
+    com as metas da refeição daquele perfil. Metas que o solver não alcança
+    (ex.: perfis de gasto alto) vão juntas ao LLM numa única chamada
+    (`_batch_fallback`); se ela falhar, esses perfis ficam com recomendação
+    None e a mensagem em `error`, sem perder os resolvidos localmente.
+    """
+    with span("recognize_menu") as record:
+        foods, estimated = await recognize_menu(menu_text)
+        if record is not None:
+            record.attributes.update(foods=len(foods), estimated=estimated)
+    if not foods:
+        raise ValueError("Nenhum alimento reconhecido no cardápio.")
+
+    meals = _batch_meals(profiles, meal_type)
+    recommendations = await _solve_batch(foods, estimated, meals)
+
+    unsolved = {
+        _meal_key(meal): meal
+        for meal, recommendation in zip(meals, recommendations)
+        if recommendation is None
+    }
+    error = None
+    if unsolved:
+        logger.info("analyze_batch: %d metas fora do alcance do solver local", len(unsolved))
+        with span("llm_fallback", meals=len(unsolved)):
+            try:
+                answers = await _batch_fallback(
+                    foods, list(unsolved.values()), menu_text, meal_type
+                )
+            except (RuntimeError, ValueError) as exc:
+                logger.warning("analyze_batch: fallback do LLM falhou: %s", exc)
+                answers = {}
+                error = str(exc)
+        recommendations = [
+            recommendation if recommendation is not None else answers.get(_meal_key(meal))
+            for meal, recommendation in zip(meals, recommendations)
+        ]
+    return {
+        "alimentos": [food.name for food in foods],
+        "recommendations": recommendations,
+        "error": error,
+    }
@@ -0,0 +1,217 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from . import metrics
+from .logger import get_logger
+
+logger = get_logger("tara.cache")
+
+_MAX_ENTRIES = int(os.getenv("TARA_CACHE_MAX_ENTRIES", "1024"))
+_TTL_SECONDS = float(os.getenv("TARA_CACHE_TTL_SECONDS", str(60 * 60 * 6)))
+_CACHE_PATH = os.getenv("TARA_CACHE_PATH") or None
+_DISK_PRUNE_EVERY = 100
+
+
+def normalize_menu(menu_text: str) -> str:
+    lines = (" ".join(line.split()) for line in menu_text.casefold().splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def analysis_key(profile: dict, menu_text: str, meal_type: str) -> str:
+    """Chave do resultado: cardápio normalizado, refeição e metas dessa refeição."""
+    meals = profile["meals"]
+    current_meal = meals.get(meal_type, meals.get("almoco"))
+    payload = json.dumps(
+        {
+            "menu": normalize_menu(menu_text),
+            "meal_type": meal_type,
+            "targets": current_meal,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def menu_key(menu_text: str) -> str:
+    """Chave do reconhecimento do cardápio (alimentos e composição), sem perfil."""
+    payload = f"menu:{normalize_menu(menu_text)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def food_key(name: str) -> str:
+    """Chave da composição estimada de um alimento fora da tabela local."""
+    payload = f"food:{' '.join(name.casefold().split())}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Cache em dois níveis: LRU em memória com TTL e SQLite opcional em disco.
+
+    Caches com TTLs diferentes no mesmo arquivo usam tabelas (`table`)
+    diferentes: a limpeza periódica apaga pelo TTL de quem grava.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = _MAX_ENTRIES,
+        ttl_seconds: float = _TTL_SECONDS,
+        path: str | None = None,
+        table: str = "results",
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self.table = table
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._conn: sqlite3.Connection | None = None
+        self._conn_lock = threading.Lock()
+        self._disk_writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, created_at REAL NOT NULL, value TEXT NOT NULL)"
+            )
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.table}_created_at ON {self.table} (created_at)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _disk_get(self, key: str) -> tuple[float, str] | None:
+        with self._conn_lock:
+            row = self._connect().execute(
+                f"SELECT created_at, value FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        return row
+
+    def _disk_set(self, key: str, created_at: float, value: str) -> None:
+        with self._conn_lock:
+            conn = self._connect()
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, created_at, value) VALUES (?, ?, ?)",
+                (key, created_at, value),
+            )
+            self._disk_writes += 1
+            if self._disk_writes % _DISK_PRUNE_EVERY == 0:
+                conn.execute(
+                    f"DELETE FROM {self.table} WHERE created_at < ?",
+                    (created_at - self.ttl_seconds,),
+                )
+            conn.commit()
+
+    def _remember(self, key: str, created_at: float, value: str) -> None:
+        self._entries[key] = (created_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, key: str) -> dict | None:
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if now - entry[0] <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return json.loads(entry[1])
+            self._entries.pop(key, None)
+
+        if self.path is not None:
+            try:
+                row = await asyncio.to_thread(self._disk_get, key)
+            except sqlite3.Error as exc:
+                logger.warning("Falha ao ler cache em disco: %s", exc)
+                row = None
+            if row is not None and now - row[0] <= self.ttl_seconds:
+                self._remember(key, row[0], row[1])
+                self.disk_hits += 1
+                return json.loads(row[1])
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: dict) -> None:
+        created_at = time.time()
+        serialized = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        self._remember(key, created_at, serialized)
+        if self.path is not None:
+            try:
+                await asyncio.to_thread(self._disk_set, key, created_at, serialized)
+            except sqlite3.Error as exc:
+                logger.warning("Falha ao gravar cache em disco: %s", exc)
+
+    def close(self) -> None:
+        with self._conn_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+
+result_cache = ResultCache(path=_CACHE_PATH)
+# Reconhecimento de cardápios e composição estimada de alimentos (sem perfil);
+# separado para não misturar as métricas e o LRU com o das análises.
+menu_cache = ResultCache(path=_CACHE_PATH)
+
+_CACHES = {"analysis": result_cache, "menu": menu_cache}
+
+metrics.monitor(
+    metrics.Counter(
+        "tara_cache_lookups_total",
+        "Consultas aos caches (análises e cardápios) por resultado.",
+        ("kind", "result"),
+        collect=lambda: {
+            key: value
+            for kind, cache in _CACHES.items()
+            for key, value in (
+                ((kind, "hit"), cache.hits),
+                ((kind, "disk_hit"), cache.disk_hits),
+                ((kind, "miss"), cache.misses),
+            )
+        },
+    )
+)
+metrics.monitor(
+    metrics.Gauge(
+        "tara_cache_hit_ratio",
+        "Fração das consultas a cada cache atendidas (memória ou disco).",
+        ("kind",),
+        collect=lambda: {(kind,): cache.stats()["hit_rate"] for kind, cache in _CACHES.items()},
+    )
+)
+metrics.monitor(
+    metrics.Gauge(
+        "tara_cache_entries",
+        "Entradas de cada cache em memória.",
+        ("kind",),
+        collect=lambda: {(kind,): len(cache._entries) for kind, cache in _CACHES.items()},
+    )
+)
@@ -1,5 +1,7 @@
 from enum import Enum
 
+import numpy as np
+
 
 class Sex(str, Enum):
     MALE = "male"
@@ -56,6 +58,23 @@ MEAL_DISTRIBUTION = {
     },
 }
 
+# Proteína por nível de atividade (g/kg/dia) - Fonte: ISSN (2017)
+PROTEIN_FACTORS = {
+    ActivityLevel.SEDENTARY: 1.4,
+    ActivityLevel.LIGHT: 1.5,
+    ActivityLevel.MODERATE: 1.6,
+    ActivityLevel.ACTIVE: 1.8,
+    ActivityLevel.VERY_ACTIVE: 2.0,
+}
+
+PROFILE_SOURCES = {
+    "bmr": "Mifflin-St Jeor (1990)",
+    "activity_factors": "FAO/OMS",
+    "deficit": "ABESO / ACSM",
+    "macros": "ISSN 2017 (Proteina g/kg) + Gordura 25% VET",
+    "meals": "Guia Alimentar para a População Brasileira",
+}
+
 MEAL_NAMES = {
     "cafe_da_manha": "Café da Manhã",
     "lanche_manha": "Lanche da Manhã",
@@ -128,15 +147,7 @@ def calculate_macros(
     
     Conversão: Proteína/Carb = 4 kcal/g, Gordura = 9 kcal/g
     """
-    protein_factors = {
-        ActivityLevel.SEDENTARY: 1.4,
-        ActivityLevel.LIGHT: 1.5,
-        ActivityLevel.MODERATE: 1.6,
-        ActivityLevel.ACTIVE: 1.8,
-        ActivityLevel.VERY_ACTIVE: 2.0,
-    }
-
-    protein_g = weight_kg * protein_factors[activity_level]
+    protein_g = weight_kg * PROTEIN_FACTORS[activity_level]
     protein_g_rounded = round(protein_g)
     protein_calories_rounded = protein_g_rounded * 4
 
@@ -207,13 +218,7 @@ def calculate_profile(
         "macros": macros,
         "meals_per_day": meals_per_day,
         "meals": meals,
-        "sources": {
-            "bmr": "Mifflin-St Jeor (1990)",
-            "activity_factors": "FAO/OMS",
-            "deficit": "ABESO / ACSM",
-            "macros": "ISSN 2017 (Proteina g/kg) + Gordura 25% VET",
-            "meals": "Guia Alimentar para a População Brasileira",
-        },
+        "sources": dict(PROFILE_SOURCES),
     }
 
     if body_fat_percent is not None:
@@ -234,3 +239,139 @@ def calculate_profile(
         }
 
     return result
+
+
+def calculate_profiles_batch(
+    weight_kg: list[float],
+    height_cm: list[float],
+    age: list[int],
+    sex: list[Sex],
+    activity_level: list[ActivityLevel],
+    deficit_percent: list[float] | None = None,
+    meals_per_day: list[int] | None = None,
+    body_fat_percent: list[float | None] | None = None,
+    lean_mass_kg: list[float | None] | None = None,
+) -> list[dict]:
+    """
+    Calcula vários perfis de uma vez, com as mesmas fórmulas de calculate_profile.
+
+    Recebe colunas (uma lista por campo) e faz os cálculos vetorizados com NumPy,
+    na mesma ordem de operações das funções escalares, para resultados idênticos.
+    """
+    size = len(weight_kg)
+    deficit_percent = deficit_percent if deficit_percent is not None else [0.20] * size
+    meals_per_day = meals_per_day if meals_per_day is not None else [4] * size
+    body_fat_percent = body_fat_percent if body_fat_percent is not None else [None] * size
+    lean_mass_kg = lean_mass_kg if lean_mass_kg is not None else [None] * size
+    columns = (
+        height_cm,
+        age,
+        sex,
+        activity_level,
+        deficit_percent,
+        meals_per_day,
+        body_fat_percent,
+        lean_mass_kg,
+    )
+    if any(len(column) != size for column in columns):
+        raise ValueError("Todas as colunas do lote devem ter o mesmo tamanho.")
+    if size == 0:
+        return []
+
+    levels = [ActivityLevel(level) for level in activity_level]
+    weight = np.asarray(weight_kg, dtype=np.float64)
+    height = np.asarray(height_cm, dtype=np.float64)
+    ages = np.asarray(age, dtype=np.float64)
+    is_male = np.array([Sex(value) == Sex.MALE for value in sex])
+    multipliers = np.array([ACTIVITY_MULTIPLIERS[level] for level in levels])
+    factors = np.array([PROTEIN_FACTORS[level] for level in levels])
+    deficits = np.asarray(deficit_percent, dtype=np.float64)
+
+    base = (10 * weight) + (6.25 * height) - (5 * ages)
+    bmr = np.where(is_male, base + 5, base - 161)
+    tdee = bmr * multipliers
+    target_calories = tdee * (1 - deficits)
+
+    protein_g = np.rint(weight * factors)
+    protein_calories = protein_g * 4
+    fat_calories = np.minimum(
+        target_calories * 0.25,
+        np.maximum(0, target_calories - protein_calories),
+    )
+    fat_calories_rounded = np.rint(fat_calories)
+    fat_g = np.rint(fat_calories / 9)
+    carb_calories = np.maximum(0, target_calories - protein_calories - fat_calories_rounded)
+    carbs_g = np.rint(np.maximum(0, carb_calories / 4))
+    carb_calories_rounded = np.rint(carb_calories)
+
+    meals_by_row: list[dict] = [{} for _ in range(size)]
+    meals_array = np.asarray(meals_per_day)
+    for meals_count in np.unique(meals_array).tolist():
+        rows = np.flatnonzero(meals_array == meals_count)
+        distribution = MEAL_DISTRIBUTION.get(meals_count, MEAL_DISTRIBUTION[4])
+        for meal_key, percentage in distribution.items():
+            calorias = np.rint(target_calories[rows] * percentage).astype(int).tolist()
+            proteina = np.rint(protein_g[rows] * percentage).astype(int).tolist()
+            carboidrato = np.rint(carbs_g[rows] * percentage).astype(int).tolist()
+            gordura = np.rint(fat_g[rows] * percentage).astype(int).tolist()
+            for position, row in enumerate(rows.tolist()):
+                meals_by_row[row][meal_key] = {
+                    "nome": MEAL_NAMES[meal_key],
+                    "percentual": int(percentage * 100),
+                    "calorias": calorias[position],
+                    "proteina_g": proteina[position],
+                    "carboidrato_g": carboidrato[position],
+                    "gordura_g": gordura[position],
+                }
+
+    bmr_out = np.rint(bmr).astype(int).tolist()
+    tdee_out = np.rint(tdee).astype(int).tolist()
+    target_out = np.rint(target_calories).astype(int).tolist()
+    protein_out = protein_g.astype(int).tolist()
+    protein_calories_out = protein_calories.astype(int).tolist()
+    fat_out = fat_g.astype(int).tolist()
+    carbs_out = carbs_g.astype(int).tolist()
+    fat_calories_out = fat_calories_rounded.astype(int).tolist()
+    carb_calories_out = carb_calories_rounded.astype(int).tolist()
+
+    results = []
+    for row in range(size):
+        result = {
+            "bmr": bmr_out[row],
+            "tdee": tdee_out[row],
+            "deficit_percent": deficit_percent[row],
+            "target_calories": target_out[row],
+            "macros": {
+                "protein_g": protein_out[row],
+                "fat_g": fat_out[row],
+                "carbs_g": carbs_out[row],
+                "protein_calories": protein_calories_out[row],
+                "fat_calories": fat_calories_out[row],
+                "carbs_calories": carb_calories_out[row],
+            },
+            "meals_per_day": meals_per_day[row],
+            "meals": meals_by_row[row],
+            "sources": dict(PROFILE_SOURCES),
+        }
+
+        # Composição corporal é opcional e rara; usa o round escalar do Python.
+        row_weight = weight_kg[row]
+        if body_fat_percent[row] is not None:
+            fat_mass = row_weight * (body_fat_percent[row] / 100)
+            lean_mass = row_weight - fat_mass
+            result["body_composition"] = {
+                "body_fat_percent": body_fat_percent[row],
+                "fat_mass_kg": round(fat_mass, 1),
+                "lean_mass_kg": round(lean_mass, 1),
+            }
+        elif lean_mass_kg[row] is not None:
+            fat_mass = row_weight - lean_mass_kg[row]
+            result["body_composition"] = {
+                "body_fat_percent": round((fat_mass / row_weight) * 100, 1),
+                "fat_mass_kg": round(fat_mass, 1),
+                "lean_mass_kg": lean_mass_kg[row],
+            }
+
+        results.append(result)
+
+    return results
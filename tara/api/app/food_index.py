@@ -0,0 +1,181 @@
+import math
+import os
+from functools import lru_cache
+
+from .foods import Food, FoodTable, food_table, normalize_food_name
+
+_CACHE_SIZE = int(os.getenv("TARA_FOOD_INDEX_CACHE_SIZE", "8192"))
+# Similaridade (coeficiente de Dice entre trigramas) mínima para virar candidato.
+_MIN_SCORE = 0.6
+# Acima disso o candidato é aceito direto (grafias e erros de digitação); entre
+# _MIN_SCORE e ele, só se cada palavra da consulta estiver no nome do item.
+# "Salada de frutas" ~ "Salada de alface" (0.70) fica de fora e vai à estimativa.
+_STRICT_SCORE = 0.85
+# Similaridade mínima entre duas palavras para contarem como a mesma.
+_TOKEN_SCORE = 0.75
+
+_ABBREVIATIONS = {
+    "grel": "grelhado",
+    "grelh": "grelhado",
+    "ass": "assado",
+    "coz": "cozido",
+    "cozid": "cozido",
+    "frit": "frito",
+    "refog": "refogado",
+    "fil": "file",
+    "integ": "integral",
+    "nat": "natural",
+    "c": "com",
+    "s": "sem",
+    "bat": "batata",
+    "feij": "feijao",
+    "mac": "macarrao",
+    "macarr": "macarrao",
+}
+
+_STOPWORDS = frozenset({"a", "o", "ao", "e", "de", "da", "do", "das", "dos", "com", "em", "na", "no"})
+
+_PLURAL_SUFFIXES = (
+    ("oes", "ao"),
+    ("aes", "ao"),
+    ("eis", "el"),
+    ("ns", "m"),
+    ("res", "r"),
+    ("zes", "z"),
+)
+
+
+def _singular(token: str) -> str:
+    if len(token) <= 3:
+        return token
+    for suffix, replacement in _PLURAL_SUFFIXES:
+        if token.endswith(suffix):
+            return token[: -len(suffix)] + replacement
+    if token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def canonical_food_name(text: str) -> str:
+    """Forma usada no índice: sem acentos, abreviações expandidas e no singular."""
+    tokens = []
+    for token in normalize_food_name(text).split():
+        token = _singular(_ABBREVIATIONS.get(token, token))
+        if token not in _STOPWORDS:
+            tokens.append(token)
+    return " ".join(tokens)
+
+
+def _trigrams(key: str) -> set[str]:
+    padded = f"  {key} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _dice(first: set[str], second: set[str]) -> float:
+    return 2 * len(first & second) / (len(first) + len(second))
+
+
+def _covers(food: Food, key: str) -> bool:
+    """Toda palavra de `key` aparece (igual ou quase) em algum nome do item."""
+    for name in (food.name, *food.aliases):
+        tokens = [_trigrams(token) for token in canonical_food_name(name).split()]
+        if all(
+            any(_dice(_trigrams(word), token) >= _TOKEN_SCORE for token in tokens)
+            for word in key.split()
+        ):
+            return True
+    return False
+
+
+class FoodIndex:
+    """Índice invertido de trigramas sobre os nomes e sinônimos da tabela.
+
+    Construído uma vez; consultas exatas (após canonicalização) são um acesso
+    a dicionário. Nas aproximadas, só os trigramas mais raros da consulta geram
+    candidatos (filtro de prefixo pelo limiar de similaridade), que depois são
+    pontuados pela interseção dos conjuntos.
+    """
+
+    def __init__(self, table: FoodTable, cache_size: int = _CACHE_SIZE):
+        self._foods: list[Food] = []
+        self._grams: list[frozenset[str]] = []
+        self._exact: dict[str, int] = {}
+        self._postings: dict[str, list[int]] = {}
+        for food in table.foods:
+            for name in (food.name, *food.aliases):
+                key = canonical_food_name(name)
+                if not key or key in self._exact:
+                    continue
+                entry = len(self._foods)
+                grams = frozenset(_trigrams(key))
+                self._exact[key] = entry
+                self._foods.append(food)
+                self._grams.append(grams)
+                for gram in grams:
+                    self._postings.setdefault(gram, []).append(entry)
+        self.match = lru_cache(maxsize=cache_size)(self._match)
+
+    def __len__(self) -> int:
+        return len(self._foods)
+
+    def search(
+        self,
+        name: str,
+        limit: int = 5,
+        min_score: float = _MIN_SCORE,
+    ) -> list[tuple[Food, float]]:
+        """Melhores candidatos com a similaridade de cada um (1.0 = exato)."""
+        key = canonical_food_name(name)
+        if not key:
+            return []
+        entry = self._exact.get(key)
+        if entry is not None:
+            return [(self._foods[entry], 1.0)]
+
+        grams = _trigrams(key)
+        # Dice >= t exige ao menos t*|A|/(2-t) trigramas em comum; basta sondar
+        # os |A| - mínimo + 1 mais raros para encontrar todos os candidatos.
+        required = max(1, math.ceil(min_score * len(grams) / (2 - min_score)))
+        rarest = sorted(grams, key=lambda gram: len(self._postings.get(gram, ())))
+        candidates: set[int] = set()
+        for gram in rarest[: len(grams) - required + 1]:
+            candidates.update(self._postings.get(gram, ()))
+
+        scored = []
+        for entry in candidates:
+            other = self._grams[entry]
+            score = _dice(grams, other)
+            if score >= min_score:
+                scored.append((score, entry))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+
+        results: list[tuple[Food, float]] = []
+        seen: set[str] = set()
+        for score, entry in scored:
+            food = self._foods[entry]
+            if food.name in seen:
+                continue
+            seen.add(food.name)
+            results.append((food, score))
+            if len(results) == limit:
+                break
+        return results
+
+    def _match(self, name: str) -> Food | None:
+        best = self.search(name, limit=1)
+        if not best:
+            return None
+        food, score = best[0]
+        if score >= _STRICT_SCORE or _covers(food, canonical_food_name(name)):
+            return food
+        return None
+
+    def match_all(self, names: list[str]) -> list[Food | None]:
+        """Mapeia cada nome (ex.: saída de `extract_foods`) para um item da tabela.
+
+        None para nomes sem correspondência segura; eles seguem para a estimativa.
+        """
+        return [self.match(name) for name in names]
+
+
+food_index = FoodIndex(food_table)
@@ -0,0 +1,108 @@
+import json
+import os
+import re
+import unicodedata
+from dataclasses import dataclass
+from pathlib import Path
+
+_DATA_PATH = Path(os.getenv("TARA_FOODS_PATH") or Path(__file__).parent / "data" / "foods.json")
+
+# Categorias usadas pelo solver de porções.
+PROTEIN = "proteina"
+PROTEIN_COMPLEMENT = "complemento_proteico"
+CARB = "carboidrato"
+LEGUME = "leguminosa"
+VEGETABLE = "vegetal"
+DENSE = "denso"
+BEVERAGE = "bebida"
+FRUIT = "fruta"
+
+CATEGORIES = (PROTEIN, PROTEIN_COMPLEMENT, CARB, LEGUME, VEGETABLE, DENSE, BEVERAGE, FRUIT)
+
+_BULLET = re.compile(r"^\s*(?:[-*•·]+|\d+[.)-]?)\s*")
+_PRICE = re.compile(r"r\$\s*\d+(?:[.,]\d+)?", re.IGNORECASE)
+_SEPARATORS = re.compile(r"\s*(?:[,;/+|]|\s+e\s+|\s+com\s+)\s*", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class Food:
+    """Composição média por 100 g de um alimento pronto para consumo."""
+
+    name: str
+    category: str
+    kcal: float
+    protein_g: float
+    carbs_g: float
+    fat_g: float
+    aliases: tuple[str, ...] = ()
+
+    @classmethod
+    def from_row(cls, row: dict) -> "Food":
+        """Item no formato do foods.json (chaves em português)."""
+        return cls(
+            name=row["nome"],
+            category=row["categoria"],
+            kcal=row["kcal"],
+            protein_g=row["proteina_g"],
+            carbs_g=row["carboidrato_g"],
+            fat_g=row["gordura_g"],
+            aliases=tuple(row.get("sinonimos", ())),
+        )
+
+    def to_row(self) -> dict:
+        return {
+            "nome": self.name,
+            "categoria": self.category,
+            "kcal": self.kcal,
+            "proteina_g": self.protein_g,
+            "carboidrato_g": self.carbs_g,
+            "gordura_g": self.fat_g,
+            "sinonimos": list(self.aliases),
+        }
+
+    def nutrients(self, grams: float) -> dict:
+        factor = grams / 100
+        return {
+            "calorias": self.kcal * factor,
+            "proteina_g": self.protein_g * factor,
+            "carboidrato_g": self.carbs_g * factor,
+            "gordura_g": self.fat_g * factor,
+        }
+
+
+def normalize_food_name(text: str) -> str:
+    """Minúsculas, sem acentos nem pontuação e com espaços colapsados."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(re.sub(r"[^a-z0-9 ]", " ", stripped).split())
+
+
+def split_menu(menu_text: str) -> list[str]:
+    """Separa o cardápio em itens: uma linha por prato, divididas em ",", "e", "com"."""
+    items = []
+    for line in menu_text.splitlines():
+        line = _PRICE.sub("", _BULLET.sub("", line))
+        for part in _SEPARATORS.split(line):
+            part = part.strip(" .:-")
+            if part:
+                items.append(part)
+    return items
+
+
+class FoodTable:
+    """Tabela de composição de alimentos (valores médios estilo TACO)."""
+
+    def __init__(self, foods: list[Food]):
+        self.foods = foods
+
+    @classmethod
+    def load(cls, path: Path = _DATA_PATH) -> "FoodTable":
+        with open(path, encoding="utf-8") as data:
+            rows = json.load(data)
+        return cls([Food.from_row(row) for row in rows])
+
+    def __len__(self) -> int:
+        return len(self.foods)
+
+
+food_table = FoodTable.load()
@@ -0,0 +1,363 @@
+import asyncio
+import heapq
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import Enum
+
+
+class JobStatus(str, Enum):
+    pending = "pending"
+    running = "running"
+    done = "done"
+    error = "error"
+    cancelled = "cancelled"
+
+
+@dataclass
+class Job:
+    job_id: str
+    status: JobStatus
+    created_at: float
+    updated_at: float
+    result: dict | None = None
+    error: str | None = None
+    started_at: float | None = None
+    trace: list[dict] | None = None
+    # Calculados na consulta a partir do scheduler/execução local; não são persistidos.
+    queue_position: int | None = None
+    partial: list[dict] | None = None
+
+    def wait_seconds(self, now: float) -> float:
+        """Tempo na fila até começar a executar (ou até agora, se ainda espera)."""
+        return (self.started_at or now) - self.created_at
+
+
+_REAPER_INTERVAL_SECONDS = float(os.getenv("TARA_JOB_REAPER_INTERVAL_SECONDS", "30"))
+_MAX_BYTES = int(os.getenv("TARA_JOB_STORE_MAX_BYTES", str(64 * 1024 * 1024)))
+_COMPRESS_MIN_BYTES = 1024
+_ENTRY_OVERHEAD_BYTES = 256
+_FINISHED = (JobStatus.done, JobStatus.error, JobStatus.cancelled)
+
+
+class JobStore(ABC):
+    """Armazenamento dos jobs de análise consultados pelo polling."""
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._reaper: asyncio.Task | None = None
+
+    @abstractmethod
+    async def add(self, job: Job) -> None: ...
+
+    @abstractmethod
+    async def update(self, job_id: str, **changes) -> bool:
+        """Aplica `changes`; job finalizado (done/error/cancelled) não muda mais.
+
+        Retorna se o job existia e foi alterado.
+        """
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Job | None: ...
+
+    @abstractmethod
+    async def reap(self, now: float) -> int:
+        """Remove jobs expirados e retorna quantos saíram."""
+
+    def start(self, interval_seconds: float = _REAPER_INTERVAL_SECONDS) -> None:
+        """Inicia a remoção periódica de jobs expirados em segundo plano."""
+        if self._reaper is not None and not self._reaper.done():
+            return
+
+        async def _loop() -> None:
+            while True:
+                await asyncio.sleep(interval_seconds)
+                await self.reap(time.time())
+
+        self._reaper = asyncio.create_task(_loop())
+
+    async def close(self) -> None:
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+
+
+def _pack_result(result: dict | None) -> bytes | None:
+    if result is None:
+        return None
+    data = json.dumps(result, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if len(data) >= _COMPRESS_MIN_BYTES:
+        return b"z" + zlib.compress(data, 1)
+    return b"j" + data
+
+
+def _unpack_result(packed: bytes | None) -> dict | None:
+    if packed is None:
+        return None
+    data = zlib.decompress(packed[1:]) if packed[:1] == b"z" else packed[1:]
+    return json.loads(data)
+
+
+class _StoredJob:
+    __slots__ = (
+        "status",
+        "created_at",
+        "updated_at",
+        "started_at",
+        "result",
+        "error",
+        "trace",
+        "size",
+    )
+
+    def __init__(self, job: Job):
+        self.status = job.status
+        self.created_at = job.created_at
+        self.updated_at = job.updated_at
+        self.started_at = job.started_at
+        self.result = _pack_result(job.result)
+        self.error = job.error
+        self.trace = _pack_result(job.trace)
+        self.size = 0
+
+    def measure(self) -> int:
+        self.size = (
+            _ENTRY_OVERHEAD_BYTES
+            + len(self.result or b"")
+            + len(self.trace or b"")
+            + len((self.error or "").encode("utf-8"))
+        )
+        return self.size
+
+    def to_job(self, job_id: str) -> Job:
+        return Job(
+            job_id=job_id,
+            status=self.status,
+            created_at=self.created_at,
+            updated_at=self.updated_at,
+            result=_unpack_result(self.result),
+            error=self.error,
+            started_at=self.started_at,
+            trace=_unpack_result(self.trace),
+        )
+
+
+class InMemoryJobStore(JobStore):
+    """Jobs em memória do processo, com índice de expiração e orçamento em bytes.
+
+    Visível apenas para um worker. Resultados ficam serializados (JSON compacto,
+    comprimido quando grande) e, acima de `max_bytes`, os jobs finalizados menos
+    usados recentemente são descartados primeiro.
+    """
+
+    def __init__(self, ttl_seconds: float, max_bytes: int = _MAX_BYTES):
+        super().__init__(ttl_seconds)
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._jobs: dict[str, _StoredJob] = {}
+        # Só os finalizados, do menos para o mais usado: candidatos ao descarte.
+        self._finished: OrderedDict[str, None] = OrderedDict()
+        self._expiry: list[tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def _discard(self, job_id: str) -> None:
+        entry = self._jobs.pop(job_id, None)
+        if entry is not None:
+            self.total_bytes -= entry.size
+            self._finished.pop(job_id, None)
+
+    def _touch(self, job_id: str, entry: _StoredJob) -> None:
+        if entry.status in _FINISHED:
+            self._finished[job_id] = None
+            self._finished.move_to_end(job_id)
+
+    def _resize(self, entry: _StoredJob) -> None:
+        previous = entry.size
+        self.total_bytes += entry.measure() - previous
+
+    def _enforce_budget(self) -> None:
+        while self.total_bytes > self.max_bytes and self._finished:
+            job_id, _ = self._finished.popitem(last=False)
+            self._discard(job_id)
+
+    async def reap(self, now: float) -> int:
+        removed = 0
+        while self._expiry and self._expiry[0][0] <= now:
+            _, job_id = heapq.heappop(self._expiry)
+            if job_id in self._jobs:
+                self._discard(job_id)
+                removed += 1
+        return removed
+
+    async def add(self, job: Job) -> None:
+        await self.reap(job.created_at)
+        entry = _StoredJob(job)
+        self._discard(job.job_id)
+        self._jobs[job.job_id] = entry
+        self._touch(job.job_id, entry)
+        self._resize(entry)
+        heapq.heappush(self._expiry, (job.created_at + self.ttl_seconds, job.job_id))
+        self._enforce_budget()
+
+    async def update(self, job_id: str, **changes) -> bool:
+        entry = self._jobs.get(job_id)
+        if entry is None or entry.status in _FINISHED:
+            return False
+        for field, value in changes.items():
+            if field in ("result", "trace"):
+                value = _pack_result(value)
+            setattr(entry, field, value)
+        self._touch(job_id, entry)
+        self._resize(entry)
+        self._enforce_budget()
+        return True
+
+    async def get(self, job_id: str) -> Job | None:
+        entry = self._jobs.get(job_id)
+        if entry is None:
+            return None
+        if time.time() - entry.created_at > self.ttl_seconds:
+            self._discard(job_id)
+            return None
+        self._touch(job_id, entry)
+        return entry.to_job(job_id)
+
+
+class SqliteJobStore(JobStore):
+    """Jobs num arquivo SQLite (WAL) compartilhado pelos workers do mesmo nó."""
+
+    _COLUMNS = (
+        "job_id",
+        "status",
+        "created_at",
+        "updated_at",
+        "result",
+        "error",
+        "started_at",
+        "trace",
+    )
+
+    def __init__(self, path: str, ttl_seconds: float):
+        super().__init__(ttl_seconds)
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+        self._conn_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "job_id TEXT PRIMARY KEY, status TEXT NOT NULL, "
+                "created_at REAL NOT NULL, updated_at REAL NOT NULL, "
+                "result TEXT, error TEXT, started_at REAL, trace TEXT)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "trace" not in columns:
+                # Arquivos criados antes do trace por job.
+                conn.execute("ALTER TABLE jobs ADD COLUMN trace TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_created_at ON jobs (created_at)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _execute(self, sql: str, params: tuple = ()) -> list[tuple]:
+        with self._conn_lock:
+            conn = self._connect()
+            rows = conn.execute(sql, params).fetchall()
+            conn.commit()
+            return rows
+
+    @staticmethod
+    def _encode(field: str, value):
+        if field in ("result", "trace"):
+            return json.dumps(value, ensure_ascii=False) if value is not None else None
+        if field == "status":
+            return JobStatus(value).value
+        return value
+
+    def _write(self, sql: str, params: tuple = ()) -> int:
+        with self._conn_lock:
+            conn = self._connect()
+            cursor = conn.execute(sql, params)
+            conn.commit()
+            return cursor.rowcount
+
+    def _delete_expired(self, now: float) -> int:
+        return self._write("DELETE FROM jobs WHERE created_at < ?", (now - self.ttl_seconds,))
+
+    async def reap(self, now: float) -> int:
+        return await asyncio.to_thread(self._delete_expired, now)
+
+    async def add(self, job: Job) -> None:
+        values = tuple(self._encode(field, getattr(job, field)) for field in self._COLUMNS)
+        await asyncio.to_thread(
+            self._execute,
+            f"INSERT OR REPLACE INTO jobs ({', '.join(self._COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in self._COLUMNS)})",
+            values,
+        )
+
+    async def update(self, job_id: str, **changes) -> bool:
+        fields = [field for field in changes if field in self._COLUMNS]
+        if not fields:
+            return False
+        assignments = ", ".join(f"{field} = ?" for field in fields)
+        values = tuple(self._encode(field, changes[field]) for field in fields)
+        # Condicional: um cancelamento gravado por outro worker não é sobrescrito.
+        updated = await asyncio.to_thread(
+            self._write,
+            f"UPDATE jobs SET {assignments} WHERE job_id = ? "
+            f"AND status NOT IN ({', '.join('?' for _ in _FINISHED)})",
+            values + (job_id,) + tuple(status.value for status in _FINISHED),
+        )
+        return updated > 0
+
+    async def get(self, job_id: str) -> Job | None:
+        rows = await asyncio.to_thread(
+            self._execute,
+            f"SELECT {', '.join(self._COLUMNS)} FROM jobs "
+            "WHERE job_id = ? AND created_at >= ?",
+            (job_id, time.time() - self.ttl_seconds),
+        )
+        if not rows:
+            return None
+        job_id, status, created_at, updated_at, result, error, started_at, trace = rows[0]
+        return Job(
+            job_id=job_id,
+            status=JobStatus(status),
+            created_at=created_at,
+            updated_at=updated_at,
+            result=json.loads(result) if result is not None else None,
+            error=error,
+            started_at=started_at,
+            trace=json.loads(trace) if trace is not None else None,
+        )
+
+    async def close(self) -> None:
+        await super().close()
+        with self._conn_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def create_job_store(ttl_seconds: float) -> JobStore:
+    """Escolhe o backend por TARA_JOB_STORE ("memory" ou "sqlite")."""
+    backend = os.getenv("TARA_JOB_STORE", "memory")
+    if backend == "sqlite":
+        path = os.getenv("TARA_JOB_STORE_PATH", "tara_jobs.sqlite3")
+        return SqliteJobStore(path, ttl_seconds)
+    if backend != "memory":
+        raise ValueError(f"TARA_JOB_STORE desconhecido: {backend}")
+    return InMemoryJobStore(ttl_seconds)
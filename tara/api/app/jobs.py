@@ -1,83 +1,318 @@
 import asyncio
+import os
 import time
 import uuid
-from dataclasses import dataclass
-from enum import Enum
-from typing import Any, Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable
 
-from .logger import get_logger
+from . import metrics
+from .job_store import Job, JobStatus, JobStore, create_job_store
+from .logger import get_logger, job_context
+from .scheduler import JobScheduler, QueueFullError
+from .streaming import partial_results
+from .tracing import Trace, current_trace, span, timeline, use_trace
 
 logger = get_logger("tara.jobs")
 
 
-class JobStatus(str, Enum):
-    pending = "pending"
-    running = "running"
-    done = "done"
-    error = "error"
+_TTL_SECONDS = 60 * 30
+_store: JobStore = create_job_store(_TTL_SECONDS)
+
+
+_WORKERS = int(os.getenv("TARA_JOB_WORKERS", "8"))
+_QUEUE_SIZE = int(os.getenv("TARA_JOB_QUEUE_SIZE", "64"))
+_scheduler = JobScheduler(_WORKERS, _QUEUE_SIZE)
 
 
 @dataclass
-class Job:
-    job_id: str
-    status: JobStatus
-    created_at: float
-    updated_at: float
-    result: dict | None = None
-    error: str | None = None
+class _Flight:
+    """Uma execução do runner compartilhada pelos jobs com a mesma chave."""
 
+    key: str | None
+    owner: str
+    runner: Callable[[], Awaitable[dict]]
+    timeout_seconds: int
+    future: asyncio.Future
+    started: asyncio.Event = field(default_factory=asyncio.Event)
+    started_at: float | None = None
+    ticket: int = 0
+    partial: list[dict] | None = None
+    job_ids: set[str] = field(default_factory=set)
+    trace: Trace = field(default_factory=Trace)
+    task: asyncio.Task | None = None
+    cancelled: bool = False
 
-_jobs: dict[str, Job] = {}
-_lock = asyncio.Lock()
-_TTL_SECONDS = 60 * 30
+
+_inflight: dict[str, _Flight] = {}
+_job_flights: dict[str, _Flight] = {}
+# Spans de cada job fora da execução compartilhada (perfil, criação, fila).
+_job_traces: dict[str, Trace] = {}
+# Tarefa `_follow` de cada job, cancelada por `cancel_job`.
+_followers: dict[str, asyncio.Task] = {}
+_background: set[asyncio.Task] = set()
+_watchers: dict[str, set[asyncio.Event]] = {}
+
+# Releitura periódica para mudanças feitas por outros workers (store SQLite).
+_WATCH_POLL_SECONDS = 1.0
+_WATCH_HEARTBEAT_SECONDS = 15.0
+
+_TERMINAL = (JobStatus.done, JobStatus.error, JobStatus.cancelled)
+
+
+def _spawn(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+    return task
 
 
-def _prune_expired(now: float) -> None:
-    expired = [
-        job_id
-        for job_id, job in _jobs.items()
-        if now - job.created_at > _TTL_SECONDS
-    ]
-    for job_id in expired:
-        _jobs.pop(job_id, None)
+def _notify(job_id: str) -> None:
+    for event in _watchers.get(job_id, ()):
+        event.set()
+
+
+def _publish_partial(flight: _Flight, items: list[dict]) -> None:
+    flight.partial = items
+    for job_id in flight.job_ids:
+        _notify(job_id)
+
+
+async def _run_flight(flight: _Flight) -> None:
+    if flight.cancelled:
+        # Todos os jobs foram cancelados enquanto a execução ainda estava na fila.
+        flight.future.cancel()
+        return
+    flight.started_at = time.time()
+    flight.started.set()
+    token = partial_results.set(lambda items: _publish_partial(flight, items))
+    # Execuções agrupadas logam com o id do job que as criou.
+    job_token = job_context.set(flight.owner)
+    trace_token = current_trace.set(flight.trace)
+    try:
+        # Tarefa própria: `cancel_job` interrompe o runner sem derrubar o worker.
+        flight.task = asyncio.create_task(
+            asyncio.wait_for(flight.runner(), timeout=flight.timeout_seconds)
+        )
+        result = await flight.task
+    except asyncio.CancelledError:
+        flight.future.cancel()
+        if not flight.cancelled:
+            raise
+    except Exception as exc:
+        flight.future.set_exception(exc)
+    else:
+        flight.future.set_result(result)
+    finally:
+        partial_results.reset(token)
+        job_context.reset(job_token)
+        current_trace.reset(trace_token)
+        if flight.key is not None and _inflight.get(flight.key) is flight:
+            _inflight.pop(flight.key, None)
+
+
+def _start_flight(
+    job_id: str,
+    runner: Callable[[], Awaitable[dict]],
+    timeout_seconds: int,
+    key: str | None,
+) -> _Flight:
+    """Retorna a execução em andamento para a chave ou enfileira uma nova."""
+    if key is not None:
+        flight = _inflight.get(key)
+        if flight is not None and not flight.future.done():
+            logger.info("Job agrupado na execução em andamento %s", key)
+            return flight
+
+    flight = _Flight(
+        key=key,
+        owner=job_id,
+        runner=runner,
+        timeout_seconds=timeout_seconds,
+        future=asyncio.get_running_loop().create_future(),
+    )
+    flight.ticket = _scheduler.submit(lambda: _run_flight(flight))
+    if key is not None:
+        _inflight[key] = flight
+    return flight
+
+
+def _timeline(job_id: str, flight: _Flight, created_at: float) -> list[dict]:
+    return timeline(created_at, _job_traces.get(job_id), flight.trace)
+
+
+def _stop_flight(job_id: str, flight: _Flight) -> None:
+    """Interrompe a execução se `job_id` é o último job que ainda a espera."""
+    if flight.job_ids == {job_id}:
+        flight.cancelled = True
+        if flight.key is not None and _inflight.get(flight.key) is flight:
+            _inflight.pop(flight.key, None)
+        if flight.task is not None:
+            flight.task.cancel()
+
+
+async def _wait_live(job_id: str, flight: _Flight, waiter: Awaitable) -> Any:
+    """Espera `waiter`, relendo o job no store a cada `_WATCH_POLL_SECONDS`.
+
+    Com o store SQLite, outro worker pode ter finalizado (cancelado) o job:
+    aí a execução é largada como no `cancel_job` e CancelledError é levantado.
+    """
+    task = asyncio.ensure_future(waiter)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=_WATCH_POLL_SECONDS)
+            if done:
+                return task.result()
+            job = await _store.get(job_id)
+            if job is None or job.status in _TERMINAL:
+                logger.info("Job %s finalizado fora deste worker", job_id)
+                _stop_flight(job_id, flight)
+                raise asyncio.CancelledError
+    finally:
+        # O future da execução é compartilhado: só a espera local é cancelada.
+        if task is not flight.future:
+            task.cancel()
+
+
+async def _follow(job_id: str, flight: _Flight, created_at: float) -> None:
+    job_context.set(job_id)
+    status = JobStatus.error
+    try:
+        await _wait_live(job_id, flight, flight.started.wait())
+        metrics.job_queue_seconds.observe(max(0.0, flight.started_at - created_at))
+        trace = _job_traces.get(job_id)
+        if trace is not None:
+            trace.record("queue", created_at, flight.started_at)
+        await _update_job(
+            job_id,
+            status=JobStatus.running,
+            started_at=flight.started_at,
+        )
+        result = await _wait_live(job_id, flight, flight.future)
+        await _update_job(
+            job_id,
+            status=JobStatus.done,
+            result=result,
+            trace=_timeline(job_id, flight, created_at),
+        )
+        status = JobStatus.done
+    except asyncio.CancelledError:
+        logger.info("Job %s cancelado", job_id)
+        await _update_job(
+            job_id,
+            status=JobStatus.cancelled,
+            error="Análise cancelada.",
+            trace=_timeline(job_id, flight, created_at),
+        )
+        status = JobStatus.cancelled
+    except asyncio.TimeoutError:
+        await _update_job(
+            job_id,
+            status=JobStatus.error,
+            error="Tempo limite excedido ao analisar o cardápio.",
+            trace=_timeline(job_id, flight, created_at),
+        )
+    except Exception as exc:
+        logger.exception("Falha no job %s: %s", job_id, exc)
+        await _update_job(
+            job_id,
+            status=JobStatus.error,
+            error=str(exc),
+            trace=_timeline(job_id, flight, created_at),
+        )
+    finally:
+        metrics.jobs_finished.inc(status.value)
+        if flight.started_at is not None:
+            metrics.job_run_seconds.observe(
+                time.time() - max(flight.started_at, created_at)
+            )
+        flight.job_ids.discard(job_id)
+        _job_flights.pop(job_id, None)
+        _job_traces.pop(job_id, None)
+        _followers.pop(job_id, None)
 
 
 async def create_job(
     runner: Callable[[], Awaitable[dict]],
     timeout_seconds: int,
+    key: str | None = None,
 ) -> str:
+    """Cria um job; jobs com a mesma `key` compartilham uma única execução.
+
+    Levanta QueueFullError quando a fila do scheduler está cheia. Os spans do
+    trace atual (ex.: cálculo do perfil) passam a fazer parte do trace do job.
+    """
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    trace = current_trace.get() or Trace()
+    with use_trace(trace), span("create_job") as record:
+        flight = _start_flight(job_id, runner, timeout_seconds, key)
+        record.attributes["coalesced"] = bool(flight.job_ids)
+        _job_flights[job_id] = flight
+        _job_traces[job_id] = trace
+        flight.job_ids.add(job_id)
+        await _store.add(
+            Job(
+                job_id=job_id,
+                status=JobStatus.pending,
+                created_at=now,
+                updated_at=now,
+            )
+        )
+    metrics.jobs_created.inc()
+    _followers[job_id] = _spawn(_follow(job_id, flight, now))
+    return job_id
+
+
+async def create_finished_job(result: dict) -> str:
+    """Grava um job já concluído, sem passar pelo scheduler.
+
+    Para respostas sem LLM (cache, tabela local): ficam fora da fila e do
+    controle de admissão, e o cliente consulta o job como qualquer outro.
+    """
     job_id = uuid.uuid4().hex
     now = time.time()
-    async with _lock:
-        _prune_expired(now)
-        _jobs[job_id] = Job(
+    await _store.add(
+        Job(
             job_id=job_id,
-            status=JobStatus.pending,
+            status=JobStatus.done,
             created_at=now,
             updated_at=now,
+            result=result,
+            started_at=now,
+            trace=timeline(now, current_trace.get()),
         )
+    )
+    metrics.jobs_created.inc()
+    metrics.jobs_finished.inc(JobStatus.done.value)
+    return job_id
 
-    async def _run() -> None:
-        await _update_job(job_id, status=JobStatus.running)
-        try:
-            result = await asyncio.wait_for(runner(), timeout=timeout_seconds)
-            await _update_job(job_id, status=JobStatus.done, result=result)
-        except asyncio.TimeoutError:
-            await _update_job(
-                job_id,
-                status=JobStatus.error,
-                error="Tempo limite excedido ao analisar o cardápio.",
-            )
-        except Exception as exc:
-            logger.exception("Falha no job %s: %s", job_id, exc)
-            await _update_job(
-                job_id,
-                status=JobStatus.error,
-                error=str(exc),
-            )
 
-    asyncio.create_task(_run())
-    return job_id
+async def cancel_job(job_id: str) -> Job | None:
+    """Cancela o job; retorna o job como ficou, ou None se não existe.
+
+    A execução compartilhada só é interrompida quando todos os seus jobs foram
+    cancelados: a chamada ao LLM em andamento é cancelada e o fallback para os
+    próximos modelos/providers não continua. Jobs já finalizados ficam como
+    estão; um job executado por outro worker é marcado como cancelado no store
+    e o worker dono interrompe a execução ao reler o status (`_wait_live`).
+    """
+    job = await _store.get(job_id)
+    if job is None or job.status in _TERMINAL:
+        return job
+
+    flight = _job_flights.get(job_id)
+    follower = _followers.get(job_id)
+    if flight is None or follower is None or flight.future.done():
+        if flight is None:
+            await _update_job(job_id, status=JobStatus.cancelled, error="Análise cancelada.")
+        elif follower is not None:
+            await asyncio.gather(follower, return_exceptions=True)
+        return await _store.get(job_id)
+
+    _stop_flight(job_id, flight)
+    follower.cancel()
+    await asyncio.gather(follower, return_exceptions=True)
+    return await _store.get(job_id)
 
 
 async def _update_job(
@@ -86,20 +321,136 @@ async def _update_job(
     status: JobStatus,
     result: dict | None = None,
     error: str | None = None,
-) -> None:
-    now = time.time()
-    async with _lock:
-        job = _jobs.get(job_id)
-        if job is None:
-            return
-        job.status = status
-        job.updated_at = now
-        job.result = result
-        job.error = error
+    started_at: float | None = None,
+    trace: list[dict] | None = None,
+) -> bool:
+    """Grava a transição; False se o job já estava finalizado (ou não existe)."""
+    changes = {
+        "status": status,
+        "updated_at": time.time(),
+        "result": result,
+        "error": error,
+    }
+    if started_at is not None:
+        changes["started_at"] = started_at
+    if trace is not None:
+        changes["trace"] = trace
+    updated = await _store.update(job_id, **changes)
+    _notify(job_id)
+    return updated
 
 
 async def get_job(job_id: str) -> Job | None:
-    now = time.time()
-    async with _lock:
-        _prune_expired(now)
-        return _jobs.get(job_id)
+    job = await _store.get(job_id)
+    if job is None:
+        return None
+    flight = _job_flights.get(job_id)
+    if flight is not None:
+        if job.status == JobStatus.pending:
+            job.queue_position = _scheduler.position(flight.ticket)
+        elif job.status == JobStatus.running:
+            job.partial = flight.partial
+    return job
+
+
+async def get_trace(job_id: str) -> list[dict] | None:
+    """Linha do tempo do job: ao vivo enquanto executa, depois a gravada no store.
+
+    Offsets são relativos à criação do job; negativos indicam trabalho anterior
+    a ela (cálculo do perfil ou execução compartilhada que já estava em curso).
+    """
+    job = await _store.get(job_id)
+    if job is None:
+        return None
+    flight = _job_flights.get(job_id)
+    if flight is not None:
+        return _timeline(job_id, flight, job.created_at)
+    return job.trace or []
+
+
+async def watch_job(
+    job_id: str,
+    poll_seconds: float = _WATCH_POLL_SECONDS,
+    heartbeat_seconds: float = _WATCH_HEARTBEAT_SECONDS,
+) -> AsyncIterator[Job | None]:
+    """Emite o job a cada mudança de estado até ele terminar.
+
+    Emite None após `heartbeat_seconds` sem mudanças, para manter a conexão viva.
+    """
+    event = asyncio.Event()
+    _watchers.setdefault(job_id, set()).add(event)
+    try:
+        last = None
+        idle_since = time.monotonic()
+        while True:
+            job = await get_job(job_id)
+            if job is None:
+                return
+            marker = (
+                job.status,
+                job.updated_at,
+                job.queue_position,
+                len(job.partial or ()),
+            )
+            if marker != last:
+                last = marker
+                idle_since = time.monotonic()
+                yield job
+            elif time.monotonic() - idle_since >= heartbeat_seconds:
+                idle_since = time.monotonic()
+                yield None
+            if job.status in _TERMINAL:
+                return
+            try:
+                await asyncio.wait_for(event.wait(), timeout=poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            event.clear()
+    finally:
+        watchers = _watchers.get(job_id)
+        if watchers is not None:
+            watchers.discard(event)
+            if not watchers:
+                _watchers.pop(job_id, None)
+
+
+def _live_jobs_by_status() -> dict[tuple, float]:
+    counts = {(JobStatus.pending.value,): 0, (JobStatus.running.value,): 0}
+    for flight in _job_flights.values():
+        status = JobStatus.running if flight.started.is_set() else JobStatus.pending
+        counts[(status.value,)] += 1
+    return counts
+
+
+metrics.monitor(
+    metrics.Gauge(
+        "tara_jobs",
+        "Jobs ainda acompanhados neste processo, por status.",
+        ("status",),
+        collect=_live_jobs_by_status,
+    )
+)
+metrics.monitor(
+    metrics.Gauge(
+        "tara_scheduler_queued",
+        "Execuções aguardando um worker do scheduler.",
+        collect=lambda: {(): _scheduler.queued},
+    )
+)
+metrics.monitor(
+    metrics.Gauge(
+        "tara_scheduler_running",
+        "Execuções em andamento no scheduler.",
+        collect=lambda: {(): _scheduler.running},
+    )
+)
+
+
+def start_jobs() -> None:
+    _store.start()
+    _scheduler.start()
+
+
+async def close_jobs() -> None:
+    await _scheduler.close()
+    await _store.close()
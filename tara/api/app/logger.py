@@ -1,16 +1,166 @@
+import atexit
+import copy
+import json
 import logging
+import os
+import queue
+import random
+import zlib
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable
 
+_ROOT = "tara"
+_LOG_LEVEL = os.getenv("TARA_LOG_LEVEL", "INFO").upper()
+_LOG_FORMAT = os.getenv("TARA_LOG_FORMAT", "text").lower()
+_LOG_QUEUE = os.getenv("TARA_LOG_QUEUE", "1") != "0"
+_LOG_PAYLOADS = os.getenv("TARA_LOG_PAYLOADS", "0") != "0"
+_PAYLOAD_SAMPLE_RATE = float(os.getenv("TARA_LOG_PAYLOAD_SAMPLE_RATE", "1"))
+_PAYLOAD_MAX_CHARS = int(os.getenv("TARA_LOG_PAYLOAD_MAX_CHARS", "4000"))
 
-def get_logger(name: str = "tara") -> logging.Logger:
-    logger = logging.getLogger(name)
-    if logger.handlers:
-        return logger
+_TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
 
-    handler = logging.StreamHandler()
-    formatter = logging.Formatter(
-        fmt="%(asctime)s %(levelname)s %(name)s: %(message)s"
-    )
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
-    logger.setLevel(logging.INFO)
-    return logger
+# Job em execução na tarefa atual; vai em todas as linhas de log.
+job_context: ContextVar[str | None] = ContextVar("job_context", default=None)
+
+
+class _JobFilter(logging.Filter):
+    """Copia o job da tarefa para o registro ainda na thread que logou."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "job_id"):
+            record.job_id = job_context.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Uma linha JSON por registro: ts, level, logger, job_id e message."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "job_id": getattr(record, "job_id", None),
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Enfileira o registro sem formatá-lo: a mensagem é montada pela thread do listener."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return copy.copy(record)
+
+
+_listener: QueueListener | None = None
+
+
+def _formatter(log_format: str) -> logging.Formatter:
+    if log_format == "json":
+        return JsonFormatter()
+    return logging.Formatter(fmt=_TEXT_FORMAT)
+
+
+def configure_logging(
+    log_format: str = _LOG_FORMAT,
+    use_queue: bool = _LOG_QUEUE,
+    level: str = _LOG_LEVEL,
+    stream=None,
+) -> logging.Logger:
+    """(Re)configura o logger raiz `tara`; os demais só propagam para ele.
+
+    Com fila, o event loop apenas enfileira o registro e uma thread em segundo
+    plano formata e escreve no stream.
+    """
+    global _listener
+    stop_logging()
+    root = logging.getLogger(_ROOT)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    output = logging.StreamHandler(stream)
+    output.setFormatter(_formatter(log_format))
+    if use_queue:
+        handler: logging.Handler = _DeferredQueueHandler(queue.SimpleQueue())
+        _listener = QueueListener(handler.queue, output)
+        _listener.start()
+    else:
+        handler = output
+    handler.addFilter(_JobFilter())
+    root.addHandler(handler)
+    root.setLevel(level)
+    return root
+
+
+def stop_logging() -> None:
+    """Esvazia a fila e encerra a thread de escrita, se houver."""
+    global _listener
+    listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+
+
+atexit.register(stop_logging)
+
+
+def get_logger(name: str = _ROOT) -> logging.Logger:
+    root = logging.getLogger(_ROOT)
+    if not root.handlers:
+        configure_logging()
+    return logging.getLogger(name)
+
+
+class _Payload:
+    """Texto montado só quando o registro é formatado (e cortado no limite)."""
+
+    __slots__ = ("_build", "_max_chars", "_text")
+
+    def __init__(self, build: Callable[[], object] | object, max_chars: int):
+        self._build = build
+        self._max_chars = max_chars
+        self._text: str | None = None
+
+    def __str__(self) -> str:
+        if self._text is None:
+            value = self._build() if callable(self._build) else self._build
+            text = value if isinstance(value, str) else str(value)
+            if len(text) > self._max_chars:
+                text = f"{text[: self._max_chars]}… (+{len(text) - self._max_chars} caracteres)"
+            self._text = text
+        return self._text
+
+
+def _sampled(rate: float) -> bool:
+    if rate >= 1:
+        return True
+    if rate <= 0:
+        return False
+    job_id = job_context.get()
+    if job_id is None:
+        return random.random() < rate
+    # Mesma decisão para todas as linhas do job: ou o job inteiro é logado ou nada.
+    return zlib.crc32(job_id.encode()) % 10_000 < rate * 10_000
+
+
+def log_payload(
+    logger: logging.Logger,
+    label: str,
+    payload: Callable[[], object] | object,
+    level: int = logging.INFO,
+) -> bool:
+    """Loga um payload grande (prompt, resposta bruta) se ligado e amostrado.
+
+    `payload` pode ser uma função: ela só é chamada se a linha for de fato
+    emitida, e na thread que escreve o log.
+    """
+    if not _LOG_PAYLOADS or not logger.isEnabledFor(level) or not _sampled(_PAYLOAD_SAMPLE_RATE):
+        return False
+    logger.log(level, "%s: %s", label, _Payload(payload, _PAYLOAD_MAX_CHARS))
+    return True
@@ -1,18 +1,63 @@
 import asyncio
+import hashlib
+import json
+import os
+import time
 import traceback
+from contextlib import asynccontextmanager, contextmanager
 
 from fastapi import APIRouter, FastAPI, HTTPException
-from pydantic import BaseModel
-from dotenv import load_dotenv
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, model_validator
 
-from .calculator import Sex, ActivityLevel, calculate_profile
-from .agent import analyze_menu
-from .jobs import JobStatus, create_job, get_job
+from .calculator import Sex, ActivityLevel, calculate_profiles_batch
+from .agent import (
+    analyze_batch,
+    analyze_day,
+    analyze_menu,
+    answer_batch_without_llm,
+    answer_day_without_llm,
+    answer_without_llm,
+    close_client_pool,
+    start_client_pool,
+)
+from .cache import analysis_key, menu_key
+from .jobs import (
+    Job,
+    JobStatus,
+    QueueFullError,
+    cancel_job,
+    close_jobs,
+    create_finished_job,
+    create_job,
+    get_job,
+    get_trace,
+    start_jobs,
+    watch_job,
+)
 from .logger import get_logger
+from .metrics import registry, start_loop_monitor, stop_loop_monitor
+from .profiles import profile_cache
+from .prompts import build_day_messages, build_messages
+from .scoreboard import scoreboard
+from .tracing import Trace, span, use_trace
 
-load_dotenv()
 
-app = FastAPI(title="Tara", description="Agente que calcula porções ideais de alimentos baseado no seu perfil de saúde")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_client_pool()
+    start_jobs()
+    start_loop_monitor()
+    yield
+    await stop_loop_monitor()
+    await close_jobs()
+    await close_client_pool()
+
+
+_BATCH_MAX_PROFILES = int(os.getenv("TARA_BATCH_MAX_PROFILES", "1000"))
+
+
+app = FastAPI(lifespan=lifespan, title="Tara", description="Agente que calcula porções ideais de alimentos baseado no seu perfil de saúde")
 api_v1_router = APIRouter(prefix="/api/v1")
 logger = get_logger()
 
@@ -27,6 +72,12 @@ def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Métricas no formato de texto do Prometheus."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
 class ProfileRequest(BaseModel):
     weight_kg: float
     height_cm: float
@@ -39,82 +90,375 @@ class ProfileRequest(BaseModel):
     lean_mass_kg: float | None = None
 
 
+class ProfileColumns(BaseModel):
+    weight_kg: list[float]
+    height_cm: list[float]
+    age: list[int]
+    sex: list[Sex]
+    activity_level: list[ActivityLevel]
+    deficit_percent: list[float] | None = None
+    meals_per_day: list[int] | None = None
+    body_fat_percent: list[float | None] | None = None
+    lean_mass_kg: list[float | None] | None = None
+
+
+class ProfileBatchRequest(BaseModel):
+    """Lote de perfis como lista de objetos (`profiles`) ou colunas (`columns`)."""
+
+    profiles: list[ProfileRequest] | None = None
+    columns: ProfileColumns | None = None
+
+    @model_validator(mode="after")
+    def _exactly_one_input(self):
+        if (self.profiles is None) == (self.columns is None):
+            raise ValueError("Informe exatamente um entre 'profiles' e 'columns'.")
+        return self
+
+    def to_columns(self) -> dict:
+        if self.columns is not None:
+            return self.columns.model_dump()
+        fields = ProfileColumns.model_fields
+        return {
+            name: [getattr(profile, name) for profile in self.profiles]
+            for name in fields
+        }
+
+
 class AnalyzeRequest(BaseModel):
-    profile: ProfileRequest
+    """Perfil completo (`profile`) ou o `profile_id` devolvido por /profile."""
+
+    profile: ProfileRequest | None = None
+    profile_id: str | None = None
+    menu_text: str
+    meal_type: str = "almoco"
+
+    @model_validator(mode="after")
+    def _exactly_one_profile(self):
+        if (self.profile is None) == (self.profile_id is None):
+            raise ValueError("Informe exatamente um entre 'profile' e 'profile_id'.")
+        return self
+
+
+class AnalyzeDayRequest(BaseModel):
+    """Um cardápio para várias refeições; sem `meal_types`, todas as do perfil."""
+
+    profile: ProfileRequest | None = None
+    profile_id: str | None = None
+    menu_text: str
+    meal_types: list[str] | None = None
+
+    @model_validator(mode="after")
+    def _exactly_one_profile(self):
+        if (self.profile is None) == (self.profile_id is None):
+            raise ValueError("Informe exatamente um entre 'profile' e 'profile_id'.")
+        return self
+
+
+class AnalyzeBatchRequest(BaseModel):
+    """Um cardápio para vários perfis (completos em `profiles` e/ou `profile_ids`)."""
+
+    profiles: list[ProfileRequest] = []
+    profile_ids: list[str] = []
     menu_text: str
     meal_type: str = "almoco"
 
+    @model_validator(mode="after")
+    def _profiles_within_limit(self):
+        count = len(self.profiles) + len(self.profile_ids)
+        if count == 0:
+            raise ValueError("Informe ao menos um perfil em 'profiles' ou 'profile_ids'.")
+        if count > _BATCH_MAX_PROFILES:
+            raise ValueError(f"No máximo {_BATCH_MAX_PROFILES} perfis por lote.")
+        return self
+
+
+_PROFILE_NOT_FOUND = (
+    "Perfil não encontrado (ids valem só no processo que os criou, a menos que "
+    "TARA_CACHE_PATH esteja configurado); envie o perfil completo em 'profile'."
+)
+
+
+async def _resolve_profile(request: AnalyzeRequest | AnalyzeDayRequest) -> tuple[str, dict]:
+    if request.profile_id is None:
+        with span("calculate_profile"):
+            return await profile_cache.resolve(request.profile.model_dump())
+    with span("profile_lookup"):
+        profile = await profile_cache.lookup(request.profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=_PROFILE_NOT_FOUND)
+    return request.profile_id, profile
+
+
+def _analysis_job_key(profile_id: str, profile: dict, menu_text: str, meal_type: str) -> str:
+    """Chave para agrupar análises idênticas em andamento."""
+    return f"{analysis_key(profile, menu_text, meal_type)}:{profile_id}"
+
 
 @api_v1_router.post("/profile")
 async def calculate_user_profile(request: ProfileRequest):
-    """Calcula metas nutricionais baseadas no perfil do usuário."""
+    """Calcula metas nutricionais e devolve o `profile_id` para usar no analyze."""
     try:
-        profile = await asyncio.to_thread(
-            calculate_profile,
-            weight_kg=request.weight_kg,
-            height_cm=request.height_cm,
-            age=request.age,
-            sex=request.sex,
-            activity_level=request.activity_level,
-            deficit_percent=request.deficit_percent,
-            meals_per_day=request.meals_per_day,
-            body_fat_percent=request.body_fat_percent,
-            lean_mass_kg=request.lean_mass_kg,
-        )
-        return profile
+        profile_id, profile = await profile_cache.resolve(request.model_dump())
+        return {**profile, "profile_id": profile_id}
     except Exception as e:
         logger.exception("Erro ao calcular perfil: %s", e)
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@api_v1_router.post("/profile/batch")
+async def calculate_user_profiles_batch(request: ProfileBatchRequest):
+    """Calcula metas nutricionais de vários perfis em uma única passada vetorizada."""
+    try:
+        profiles = await asyncio.to_thread(
+            calculate_profiles_batch,
+            **request.to_columns(),
+        )
+        return {"profiles": profiles}
+    except Exception as e:
+        logger.exception("Erro ao calcular lote de perfis: %s", e)
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@contextmanager
+def _analysis_errors(endpoint: str):
+    """Traduz as falhas ao criar um job de análise em respostas HTTP."""
+    try:
+        yield
+    except HTTPException:
+        raise
+    except QueueFullError as e:
+        logger.warning("Fila cheia no %s, retry em %ss", endpoint, e.retry_after)
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except ValueError as e:
+        logger.warning("Erro de validacao no %s: %s", endpoint, e)
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.exception("Erro inesperado no %s: %s", endpoint, e)
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @api_v1_router.post("/analyze")
 async def analyze_menu_endpoint(request: AnalyzeRequest):
     """Analisa cardápio e retorna recomendações."""
-    try:
-        profile = await asyncio.to_thread(
-            calculate_profile,
-            weight_kg=request.profile.weight_kg,
-            height_cm=request.profile.height_cm,
-            age=request.profile.age,
-            sex=request.profile.sex,
-            activity_level=request.profile.activity_level,
-            deficit_percent=request.profile.deficit_percent,
-            meals_per_day=request.profile.meals_per_day,
-            body_fat_percent=request.profile.body_fat_percent,
-            lean_mass_kg=request.profile.lean_mass_kg,
-        )
+    with _analysis_errors("analyze"):
+        with use_trace(Trace()):
+            profile_id, profile = await _resolve_profile(request)
+            # Cache ou tabela local: job já concluído, sem esperar na fila dos LLMs.
+            recommendation = await answer_without_llm(profile, request.menu_text, request.meal_type)
+            if recommendation is not None:
+                job_id = await create_finished_job(
+                    {"profile": profile, "recommendation": recommendation}
+                )
+                return {"job_id": job_id}
+            # Cardápio grande demais: 400 agora, sem ocupar a fila para falhar depois.
+            with span("build_prompt"):
+                prompt = build_messages(profile, request.menu_text, request.meal_type)
 
-        async def _runner() -> dict:
-            recommendation = await analyze_menu(
-                profile,
-                request.menu_text,
-                request.meal_type,
+            async def _runner() -> dict:
+                recommendation = await analyze_menu(
+                    profile,
+                    request.menu_text,
+                    request.meal_type,
+                    prompt=prompt,
+                )
+                return {"profile": profile, "recommendation": recommendation}
+
+            job_id = await create_job(
+                _runner,
+                timeout_seconds=180,
+                key=_analysis_job_key(
+                    profile_id,
+                    profile,
+                    request.menu_text,
+                    request.meal_type,
+                ),
             )
-            return {"profile": profile, "recommendation": recommendation}
+        return {"job_id": job_id}
+
+
+@api_v1_router.post("/analyze/day")
+async def analyze_day_endpoint(request: AnalyzeDayRequest):
+    """Analisa um cardápio para várias refeições do dia em um único job."""
+    with _analysis_errors("analyze/day"):
+        with use_trace(Trace()):
+            profile_id, profile = await _resolve_profile(request)
+            meal_types = request.meal_types or list(profile["meals"])
+            unknown = [meal_type for meal_type in meal_types if meal_type not in profile["meals"]]
+            if unknown:
+                raise ValueError(
+                    f"Refeições fora do perfil: {', '.join(unknown)}. "
+                    f"Disponíveis: {', '.join(profile['meals'])}."
+                )
+            meal_types = list(dict.fromkeys(meal_types))
+            recommendations = await answer_day_without_llm(profile, request.menu_text, meal_types)
+            if recommendations is not None:
+                job_id = await create_finished_job(
+                    {"profile": profile, "recommendations": recommendations}
+                )
+                return {"job_id": job_id}
+            # O prompt do job cobre no máximo essas refeições; se não couber, 400 já.
+            with span("build_prompt"):
+                if len(meal_types) == 1:
+                    build_messages(profile, request.menu_text, meal_types[0])
+                else:
+                    build_day_messages(profile, request.menu_text, meal_types)
+
+            async def _runner() -> dict:
+                recommendations = await analyze_day(profile, request.menu_text, meal_types)
+                return {"profile": profile, "recommendations": recommendations}
 
-        job_id = await create_job(_runner, timeout_seconds=180)
+            job_id = await create_job(
+                _runner,
+                timeout_seconds=180,
+                key="day:" + _analysis_job_key(
+                    profile_id,
+                    profile,
+                    request.menu_text,
+                    ",".join(meal_types),
+                ),
+            )
         return {"job_id": job_id}
-    except ValueError as e:
-        logger.warning("Erro de validacao no analyze: %s", e)
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        logger.exception("Erro inesperado no analyze: %s", e)
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
 
 
-@api_v1_router.get("/analyze/{job_id}")
-async def analyze_menu_status(job_id: str):
-    job = await get_job(job_id)
-    if job is None:
-        raise HTTPException(status_code=404, detail="Job não encontrado")
+async def _resolve_profiles(request: AnalyzeBatchRequest) -> list[tuple[str, dict]]:
+    resolved = []
+    with span("calculate_profile", profiles=len(request.profiles)):
+        for profile in request.profiles:
+            resolved.append(await profile_cache.resolve(profile.model_dump()))
+    missing = []
+    with span("profile_lookup", profiles=len(request.profile_ids)):
+        for profile_id in request.profile_ids:
+            profile = await profile_cache.lookup(profile_id)
+            if profile is None:
+                missing.append(profile_id)
+            else:
+                resolved.append((profile_id, profile))
+    if missing:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Perfis não encontrados: {', '.join(missing)}; envie os perfis completos.",
+        )
+    return resolved
+
+
+def _batch_job_key(profile_ids: list[str], menu_text: str, meal_type: str) -> str:
+    payload = "\n".join([menu_key(menu_text), meal_type, *profile_ids])
+    return "batch:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@api_v1_router.post("/analyze/batch")
+async def analyze_batch_endpoint(request: AnalyzeBatchRequest):
+    """Analisa um cardápio para vários perfis: o cardápio é entendido uma vez só."""
+    with _analysis_errors("analyze/batch"):
+        with use_trace(Trace()):
+            resolved = await _resolve_profiles(request)
+            profile_ids = [profile_id for profile_id, _ in resolved]
+            profiles = [profile for _, profile in resolved]
+
+            def _payload(batch: dict) -> dict:
+                return {
+                    "meal_type": request.meal_type,
+                    "alimentos": batch["alimentos"],
+                    "results": [
+                        {
+                            "profile_id": profile_id,
+                            "recommendation": recommendation,
+                            # Só perfis que dependiam do LLM e a chamada falhou.
+                            **({"error": batch["error"]} if recommendation is None else {}),
+                        }
+                        for profile_id, recommendation in zip(profile_ids, batch["recommendations"])
+                    ],
+                }
+
+            batch = await answer_batch_without_llm(profiles, request.menu_text, request.meal_type)
+            if batch is not None:
+                return {"job_id": await create_finished_job(_payload(batch))}
+
+            async def _runner() -> dict:
+                return _payload(await analyze_batch(profiles, request.menu_text, request.meal_type))
+
+            job_id = await create_job(
+                _runner,
+                timeout_seconds=180,
+                key=_batch_job_key(profile_ids, request.menu_text, request.meal_type),
+            )
+        return {"job_id": job_id}
+
+
+def _job_payload(job: Job) -> dict:
     return {
         "status": job.status,
         "result": job.result,
+        "partial": job.partial,
         "error": job.error,
+        "queue_position": job.queue_position,
+        "wait_seconds": round(job.wait_seconds(time.time()), 3),
     }
 
 
+@api_v1_router.get("/analyze/{job_id}")
+async def analyze_menu_status(job_id: str):
+    job = await get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return _job_payload(job)
+
+
+@api_v1_router.delete("/analyze/{job_id}")
+async def analyze_menu_cancel(job_id: str):
+    """Cancela o job e interrompe as chamadas ao LLM que só ele aguardava."""
+    job = await cancel_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    if job.status != JobStatus.cancelled:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Job já finalizado com status {job.status.value}",
+        )
+    return _job_payload(job)
+
+
+@api_v1_router.get("/analyze/{job_id}/trace")
+async def analyze_menu_trace(job_id: str):
+    """Linha do tempo do job: fila, perfil, tentativas de LLM e parsing."""
+    spans = await get_trace(job_id)
+    if spans is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return {"job_id": job_id, "spans": spans}
+
+
+@api_v1_router.get("/analyze/{job_id}/events")
+async def analyze_menu_events(job_id: str):
+    """Stream SSE com cada transição de status do job até done/error/cancelled."""
+    if await get_job(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+
+    async def _stream():
+        async for job in watch_job(job_id):
+            if job is None:
+                yield ": keep-alive\n\n"
+                continue
+            data = json.dumps(_job_payload(job), ensure_ascii=False)
+            yield f"event: {job.status.value}\ndata: {data}\n\n"
+
+    return StreamingResponse(
+        _stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@api_v1_router.get("/providers")
+async def provider_ranking():
+    """Ranking atual de (modelo, provider) usado para ordenar o fallback."""
+    return {"ranking": scoreboard.snapshot()}
+
+
 app.include_router(api_v1_router)
 
 
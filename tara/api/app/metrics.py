@@ -0,0 +1,211 @@
+import asyncio
+import math
+import os
+from bisect import bisect_left
+from typing import Callable
+
+_LOOP_LAG_INTERVAL_SECONDS = float(os.getenv("TARA_LOOP_LAG_INTERVAL_SECONDS", "0.5"))
+
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60, 120, 180)
+ATTEMPT_BUCKETS = (1, 2, 3, 4, 6, 8, 12, 16, 24)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: tuple[str, ...] = (),
+        collect: Callable[[], dict[tuple, float]] | None = None,
+    ):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._collect = collect
+        self._values: dict[tuple, float] = {}
+
+    def samples(self) -> list[str]:
+        values = self._collect() if self._collect is not None else self._values
+        return [
+            f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+            for labels, value in sorted(values.items())
+        ]
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0.0)
+
+    def clear(self) -> None:
+        self._values.clear()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, *labels) -> None:
+        self._values[labels] = value
+
+
+class Histogram(_Metric):
+    """Histograma cumulativo com buckets fixos (custo: uma busca binária por observação)."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            # [contagens por bucket (+Inf no fim), soma, total]
+            series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            self._series[labels] = series
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, *labels) -> int:
+        series = self._series.get(labels)
+        return series[2] if series is not None else 0
+
+    def samples(self) -> list[str]:
+        lines = []
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket in zip((*self.buckets, math.inf), counts):
+                cumulative += bucket
+                le = f'le="{_number(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+    def clear(self) -> None:
+        self._series.clear()
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Texto no formato de exposição do Prometheus (0.0.4)."""
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+    def clear(self) -> None:
+        for metric in self._metrics:
+            metric.clear()
+
+
+registry = Registry()
+
+llm_latency = registry.register(
+    Histogram(
+        "tara_llm_request_duration_seconds",
+        "Latência das chamadas LLM bem-sucedidas por modelo e provider.",
+        ("model", "provider"),
+    )
+)
+llm_failures = registry.register(
+    Counter(
+        "tara_llm_failures_total",
+        "Chamadas LLM que falharam, por modelo, provider e tipo de erro.",
+        ("model", "provider", "error"),
+    )
+)
+llm_attempts = registry.register(
+    Histogram(
+        "tara_llm_attempts_per_request",
+        "Tentativas (modelo, provider) disparadas por requisição ao LLM.",
+        buckets=ATTEMPT_BUCKETS,
+    )
+)
+jobs_created = registry.register(Counter("tara_jobs_created_total", "Jobs de análise criados."))
+jobs_finished = registry.register(
+    Counter("tara_jobs_finished_total", "Jobs finalizados por status.", ("status",))
+)
+job_queue_seconds = registry.register(
+    Histogram("tara_job_queue_seconds", "Tempo do job na fila até começar a executar.")
+)
+job_run_seconds = registry.register(
+    Histogram("tara_job_run_seconds", "Tempo de execução do job até done/error.")
+)
+loop_lag = registry.register(
+    Histogram(
+        "tara_event_loop_lag_seconds",
+        "Atraso do event loop em acordar um sleep periódico.",
+        buckets=LAG_BUCKETS,
+    )
+)
+
+
+def monitor(metric: _Metric) -> _Metric:
+    """Registra um coletor cujos valores são lidos só na hora do scrape."""
+    return registry.register(metric)
+
+
+async def _watch_loop_lag(interval: float) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        loop_lag.observe(max(0.0, loop.time() - expected))
+
+
+_lag_task: asyncio.Task | None = None
+
+
+def start_loop_monitor(interval: float = _LOOP_LAG_INTERVAL_SECONDS) -> None:
+    global _lag_task
+    if _lag_task is None or _lag_task.done():
+        _lag_task = asyncio.create_task(_watch_loop_lag(interval))
+
+
+async def stop_loop_monitor() -> None:
+    global _lag_task
+    task, _lag_task = _lag_task, None
+    if task is not None:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
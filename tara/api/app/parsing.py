@@ -0,0 +1,183 @@
+import json
+from typing import Any
+
+# Inícios de valor tentados antes de desistir (prosa com colchetes antes do JSON).
+_MAX_CANDIDATES = 8
+
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "„": '"', "‘": "'", "’": "'"})
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class JSONExtractionError(ValueError):
+    """A resposta não contém um JSON aproveitável, nem após os reparos."""
+
+
+def _strip_code_fence(content: str) -> str:
+    cleaned = content.strip()
+    if cleaned.startswith("```"):
+        cleaned = cleaned.strip("`")
+        if cleaned.lower().startswith("json"):
+            cleaned = cleaned[4:].lstrip()
+    return cleaned
+
+
+def _trim_dangling(out: list[str]) -> None:
+    """Remove a vírgula final antes de fechar um objeto/lista."""
+    while out and out[-1].isspace():
+        out.pop()
+    if out and out[-1] == ",":
+        out.pop()
+
+
+class _Level:
+    """Objeto/lista aberto: onde começa e até onde o conteúdo está completo."""
+
+    __slots__ = ("closer", "opened", "complete")
+
+    def __init__(self, closer: str, opened: int):
+        self.closer = closer
+        self.opened = opened
+        # Fim do último elemento seguido de vírgula ou fechado (objeto/lista).
+        self.complete = opened + 1
+
+
+def _drop_truncated(out: list[str], stack: list[_Level]) -> None:
+    """Descarta o elemento cortado pelo fim da resposta.
+
+    Um número, string ou chave no fim do texto pode estar pela metade
+    (`"gramas": 12` de um 120), então sai; um objeto cortado dentro de uma
+    lista (um item de `escolhas`) sai inteiro. Levanta JSONExtractionError se
+    a lista ou o valor principal ficar vazio.
+    """
+    while True:
+        level = stack[-1]
+        del out[level.complete :]
+        if level.closer == "}" and len(stack) > 1 and stack[-2].closer == "]":
+            stack.pop()
+            continue
+        break
+    if level.complete == level.opened + 1 and (level.closer == "]" or len(stack) == 1):
+        raise JSONExtractionError("Resposta truncada antes do primeiro item completo.")
+
+
+def _repair(text: str, start: int) -> str:
+    """Reescreve o valor que começa em `start` corrigindo deslizes comuns.
+
+    Uma passada, acompanhando strings: aspas simples ou tipográficas viram
+    aspas duplas, quebras de linha dentro de strings são escapadas, vírgulas
+    finais e comentários `//` saem, chaves sem aspas ganham aspas e
+    True/False/None viram literais JSON. Se o texto acabar antes (resposta
+    truncada), o elemento incompleto é descartado e os colchetes, fechados.
+    Para no fim do valor, ignorando o que vier depois.
+    """
+    out: list[str] = []
+    stack: list[_Level] = []
+    quote: str | None = None
+    escaped = False
+    index = start
+    length = len(text)
+    while index < length:
+        char = text[index]
+        if quote is not None:
+            if escaped:
+                escaped = False
+                out.append(char)
+            elif char == "\\":
+                escaped = True
+                out.append(char)
+            elif char == quote:
+                quote = None
+                out.append('"')
+            elif char == '"':
+                out.append('\\"')
+            elif char == "\n":
+                out.append("\\n")
+            elif char in "\r\t":
+                out.append("\\r" if char == "\r" else "\\t")
+            else:
+                out.append(char)
+            index += 1
+            continue
+
+        if char in "\"'":
+            quote = char
+            out.append('"')
+        elif char in _CLOSERS:
+            stack.append(_Level(_CLOSERS[char], len(out)))
+            out.append(char)
+        elif char in "}]":
+            _trim_dangling(out)
+            if stack:
+                stack.pop()
+            out.append(char)
+            if not stack:
+                return "".join(out)
+            stack[-1].complete = len(out)
+        elif char == "," and stack:
+            stack[-1].complete = len(out)
+            out.append(char)
+        elif char == "/" and text.startswith("//", index):
+            newline = text.find("\n", index)
+            index = length if newline < 0 else newline
+            continue
+        elif char.isalpha():
+            end = index
+            while end < length and (text[end].isalnum() or text[end] == "_"):
+                end += 1
+            word = text[index:end]
+            after = end
+            while after < length and text[after] in " \t":
+                after += 1
+            if after < length and text[after] == ":":
+                out.append(f'"{word}"')
+            else:
+                out.append(_LITERALS.get(word, word))
+            index = end
+            continue
+        else:
+            out.append(char)
+        index += 1
+
+    _drop_truncated(out, stack)
+    out.extend(level.closer for level in reversed(stack))
+    return "".join(out)
+
+
+def extract_json(content: str, expect: type | None = None) -> Any:
+    """Extrai o JSON mais externo de uma resposta do modelo.
+
+    Aceita cerca ```json, prosa antes/depois e pequenos erros de sintaxe.
+    `expect` (dict ou list) restringe o tipo aceito. Levanta
+    JSONExtractionError quando nada aproveitável é encontrado.
+    """
+    cleaned = _strip_code_fence(content)
+    try:
+        value = json.loads(cleaned)
+    except ValueError:
+        pass
+    else:
+        if expect is None or isinstance(value, expect):
+            return value
+
+    text = cleaned.translate(_SMART_QUOTES)
+    openers = "{" if expect is dict else "[" if expect is list else "{["
+    position = 0
+    for _ in range(_MAX_CANDIDATES):
+        starts = [index for index in (text.find(opener, position) for opener in openers) if index >= 0]
+        if not starts:
+            break
+        start = min(starts)
+        try:
+            value = json.loads(_repair(text, start))
+        except JSONExtractionError:
+            # Truncado: os próximos inícios estão dentro do mesmo valor cortado
+            # e dariam só um pedaço dele (ex.: o último item, sem a lista).
+            raise
+        except ValueError:
+            position = start + 1
+            continue
+        if expect is None or isinstance(value, expect):
+            return value
+        position = start + 1
+    raise JSONExtractionError("Nenhum JSON válido encontrado na resposta do modelo.")
@@ -0,0 +1,266 @@
+import math
+
+from .food_index import FoodIndex, food_index
+from .foods import (
+    BEVERAGE,
+    CARB,
+    DENSE,
+    FRUIT,
+    LEGUME,
+    PROTEIN,
+    PROTEIN_COMPLEMENT,
+    VEGETABLE,
+    Food,
+    split_menu,
+)
+
+# Faixa da meta calórica da refeição (mesma regra do SYSTEM_PROMPT: 85-100%).
+# Os limites de porção nem sempre deixam chegar nela; `fits_meal` diz quando.
+_TARGET_SHARE = 0.95
+_MIN_SHARE = 0.85
+# Parte da proteína da refeição coberta pela proteína principal.
+_PROTEIN_SHARE = 0.9
+_GRAMS_STEP = 5
+_MAX_VEGETABLES = 2
+
+# (mínimo, padrão, máximo) em gramas por papel no prato.
+_PORTIONS = {
+    PROTEIN: (60, 120, 220),
+    PROTEIN_COMPLEMENT: (30, 60, 150),
+    CARB: (40, 120, 300),
+    LEGUME: (0, 80, 120),
+    VEGETABLE: (80, 80, 80),
+    DENSE: (0, 15, 15),
+    FRUIT: (0, 100, 100),
+}
+
+_REASONS = {
+    PROTEIN: "Proteína principal: garante saciedade e ajuda a preservar massa muscular.",
+    PROTEIN_COMPLEMENT: "Sem proteína principal no cardápio; complemento proteico com gordura controlada.",
+    CARB: "Carboidrato base, porção ajustada para fechar a meta calórica da refeição.",
+    LEGUME: "Complemento pequeno: soma fibras e um pouco de proteína.",
+    VEGETABLE: "Baixa densidade calórica: volume e saciedade com poucas calorias.",
+    DENSE: "Item muito calórico em porção pequena e medida.",
+    FRUIT: "Sobremesa leve que ainda cabe no limite da refeição.",
+}
+
+LOCAL_SOURCE = "tabela_local"
+# Parte dos itens teve a composição estimada pelo LLM (cardápio fora da tabela).
+ESTIMATED_SOURCE = "estimativa_llm"
+
+
+def _density(food: Food) -> float:
+    return food.kcal / 100
+
+
+def _round_down(grams: float) -> int:
+    return int(grams // _GRAMS_STEP * _GRAMS_STEP)
+
+
+def _round_up(grams: float) -> int:
+    return int(math.ceil(grams / _GRAMS_STEP) * _GRAMS_STEP)
+
+
+def _clamp(grams: float, role: str) -> int:
+    low, _, high = _PORTIONS[role]
+    return min(max(_round_down(grams), low), high)
+
+
+class _Plate:
+    """Itens escolhidos e gramas, na ordem de montagem do prato."""
+
+    def __init__(self):
+        self.items: list[tuple[str, Food]] = []
+        self.grams: dict[str, int] = {}
+
+    def add(self, role: str, food: Food, grams: int) -> None:
+        if grams > 0:
+            self.items.append((role, food))
+            self.grams[food.name] = grams
+
+    def calories(self) -> float:
+        return sum(
+            _density(food) * self.grams[food.name]
+            for _, food in self.items
+            if food.name in self.grams
+        )
+
+    def find(self, role: str) -> Food | None:
+        for item_role, food in self.items:
+            if item_role == role and food.name in self.grams:
+                return food
+        return None
+
+    def resize(self, role: str, delta_kcal: float) -> float:
+        """Ajusta o item do papel em até `delta_kcal`; retorna as kcal aplicadas."""
+        food = self.find(role)
+        if food is None:
+            return 0.0
+        low, _, high = _PORTIONS[role]
+        current = self.grams[food.name]
+        if delta_kcal < 0:
+            grams = max(low, current - _round_up(-delta_kcal / _density(food)))
+        else:
+            grams = min(high, current + _round_down(delta_kcal / _density(food)))
+        if grams <= 0:
+            del self.grams[food.name]
+        else:
+            self.grams[food.name] = grams
+        return (grams - current) * _density(food)
+
+
+def _pick(foods: list[Food], category: str, key) -> Food | None:
+    candidates = [food for food in foods if food.category == category]
+    return min(candidates, key=key) if candidates else None
+
+
+def _choice(role: str, food: Food, grams: int) -> dict:
+    values = food.nutrients(grams)
+    return {
+        "alimento": food.name,
+        "gramas": grams,
+        "calorias_estimadas": round(values["calorias"]),
+        "proteina_g": round(values["proteina_g"], 1),
+        "carboidrato_g": round(values["carboidrato_g"], 1),
+        "gordura_g": round(values["gordura_g"], 1),
+        "justificativa": _REASONS[role],
+    }
+
+
+def _tips(plate: _Plate, skipped: list[Food]) -> str:
+    tips = []
+    carb = plate.find(CARB)
+    protein = plate.find(PROTEIN) or plate.find(PROTEIN_COMPLEMENT)
+    legume = plate.find(LEGUME)
+    if carb is not None and legume is not None:
+        grams = _round_down(_density(legume) * plate.grams[legume.name] / _density(carb))
+        tips.append(
+            f"Se quiser mais {carb.name.lower()}, retire {legume.name.lower()} "
+            f"e acrescente ~{grams} g de {carb.name.lower()}."
+        )
+    if carb is not None and protein is not None:
+        grams = _round_up(_density(protein) * 50 / _density(carb))
+        tips.append(
+            f"Se quiser mais {protein.name.lower()}, reduza ~{grams} g de "
+            f"{carb.name.lower()} para cada 50 g extras."
+        )
+    dense = next((food for food in skipped if food.category == DENSE), None)
+    if carb is not None and dense is not None:
+        grams = _round_up(_density(dense) * 15 / _density(carb))
+        tips.append(
+            f"Se quiser {dense.name.lower()}, limite a 1 colher (15 g) e reduza "
+            f"~{grams} g de {carb.name.lower()}."
+        )
+    drink = next((food for food in skipped if food.category == BEVERAGE), None)
+    if drink is not None:
+        tips.append(
+            f"Prefira água; um copo de {drink.name.lower()} (200 ml) soma "
+            f"~{round(_density(drink) * 200)} kcal."
+        )
+    tips.append("Valores médios de tabela; variam conforme receita e óleo.")
+    return " ".join(tips)
+
+
+def solve_portions(foods: list[Food], meal: dict, source: str = LOCAL_SOURCE) -> dict:
+    """Monta a refeição com as regras do SYSTEM_PROMPT, no formato da resposta do LLM.
+
+    1 proteína principal (a mais magra), 1 carboidrato base (o menos denso) com
+    no máximo 1 leguminosa de complemento, até 2 vegetais, itens densos e frutas
+    só se sobrar espaço, e bebidas calóricas trocadas por água. As gramas são
+    ajustadas para ficar entre 85% e 100% das calorias da refeição quando os
+    limites de porção permitem; metas altas ou cardápios só de acompanhamentos,
+    bebidas e sobremesas ficam fora da faixa (ver `fits_meal`).
+    """
+    unique = list({food.name: food for food in foods}.values())
+    target = meal["calorias"]
+    budget = target * _TARGET_SHARE
+    plate = _Plate()
+
+    protein = _pick(unique, PROTEIN, lambda food: food.kcal / max(food.protein_g, 0.1))
+    protein_role = PROTEIN
+    if protein is None:
+        protein = _pick(unique, PROTEIN_COMPLEMENT, lambda food: food.fat_g / max(food.protein_g, 0.1))
+        protein_role = PROTEIN_COMPLEMENT
+    if protein is not None:
+        grams = meal["proteina_g"] * _PROTEIN_SHARE / (protein.protein_g / 100)
+        plate.add(protein_role, protein, _clamp(grams, protein_role))
+
+    for vegetable in [food for food in unique if food.category == VEGETABLE][:_MAX_VEGETABLES]:
+        plate.add(VEGETABLE, vegetable, _PORTIONS[VEGETABLE][1])
+
+    legume = _pick(unique, LEGUME, lambda food: food.kcal)
+    if legume is not None:
+        plate.add(LEGUME, legume, _PORTIONS[LEGUME][1])
+
+    carb = _pick(unique, CARB, lambda food: food.kcal)
+    if carb is not None:
+        room = budget - plate.calories()
+        plate.add(CARB, carb, _clamp(room / _density(carb), CARB))
+
+    for category in (DENSE, FRUIT):
+        food = _pick(unique, category, lambda food: food.kcal)
+        if food is None:
+            continue
+        grams = min(_PORTIONS[category][1], _round_down((budget - plate.calories()) / _density(food)))
+        if grams >= 10:
+            plate.add(category, food, grams)
+
+    # Acima da meta: corta primeiro o que menos importa para a saciedade.
+    for role in (DENSE, FRUIT, LEGUME, CARB, protein_role):
+        excess = plate.calories() - target
+        if excess <= 0:
+            break
+        plate.resize(role, -excess)
+
+    # Abaixo de 85%: aumenta a base e depois a proteína.
+    for role in (CARB, protein_role, LEGUME):
+        missing = budget - plate.calories()
+        if plate.calories() >= target * _MIN_SHARE or missing <= 0:
+            break
+        plate.resize(role, missing)
+
+    chosen = [(role, food) for role, food in plate.items if food.name in plate.grams]
+    skipped = [food for food in unique if food.name not in plate.grams]
+    escolhas = [_choice(role, food, plate.grams[food.name]) for role, food in chosen]
+    return {
+        "escolhas": escolhas,
+        "total": {
+            "calorias": sum(item["calorias_estimadas"] for item in escolhas),
+            "proteina_g": round(sum(item["proteina_g"] for item in escolhas), 1),
+            "carboidrato_g": round(sum(item["carboidrato_g"] for item in escolhas), 1),
+            "gordura_g": round(sum(item["gordura_g"] for item in escolhas), 1),
+        },
+        "dica": _tips(plate, skipped),
+        "origem": source,
+    }
+
+
+def fits_meal(recommendation: dict, meal: dict) -> bool:
+    """Prato não vazio e entre 85% e 100% da meta; senão, quem resolve é o LLM."""
+    calories = recommendation["total"]["calorias"]
+    return bool(recommendation["escolhas"]) and (
+        meal["calorias"] * _MIN_SHARE <= calories <= meal["calorias"]
+    )
+
+
+def match_menu(menu_text: str, index: FoodIndex = food_index) -> list[Food] | None:
+    """Itens do cardápio na tabela local; None se algum não for reconhecido."""
+    items = split_menu(menu_text)
+    if not items:
+        return None
+    foods = index.match_all(items)
+    if any(food is None for food in foods):
+        return None
+    return foods
+
+
+def recommend_locally(menu_text: str, meal: dict, index: FoodIndex = food_index) -> dict | None:
+    """Resolve o cardápio sem LLM quando todos os itens estão na tabela local.
+
+    Retorna None também quando o solver não encaixa a refeição na meta.
+    """
+    foods = match_menu(menu_text, index)
+    if foods is None:
+        return None
+    recommendation = solve_portions(foods, meal)
+    return recommendation if fits_meal(recommendation, meal) else None
@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+from .cache import ResultCache
+from .calculator import ActivityLevel, Sex, calculate_profile
+
+_CACHE_SIZE = int(os.getenv("TARA_PROFILE_CACHE_SIZE", "10000"))
+# Parâmetros dos perfis no SQLite do cache (TARA_CACHE_PATH), para que um
+# profile_id valha em qualquer worker e sobreviva a reinícios.
+_STORE_PATH = os.getenv("TARA_CACHE_PATH") or None
+_STORE_TTL_SECONDS = float(os.getenv("TARA_PROFILE_TTL_SECONDS", str(60 * 60 * 24 * 30)))
+
+
+def make_profile_id(params: dict) -> str:
+    """Id derivado do conteúdo: os mesmos dados de perfil geram sempre o mesmo id."""
+    payload = json.dumps(params, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def _store_key(profile_id: str) -> str:
+    return f"profile:{profile_id}"
+
+
+def profile_store(path: str, ttl_seconds: float = _STORE_TTL_SECONDS) -> ResultCache:
+    """Store dos parâmetros de perfil no SQLite `path`.
+
+    Tabela própria: a limpeza da tabela das análises (TTL de horas) não apaga
+    perfis, que valem por TARA_PROFILE_TTL_SECONDS. O LRU em memória é o do
+    próprio ProfileCache; do store só se usa o disco.
+    """
+    return ResultCache(max_entries=0, ttl_seconds=ttl_seconds, path=path, table="profiles")
+
+
+class ProfileCache:
+    """Perfis calculados, memoizados por profile_id (LRU em memória).
+
+    Com `store`, os parâmetros de cada perfil novo também são gravados nele e
+    `lookup` recalcula ids criados por outro worker ou antes de um reinício.
+    """
+
+    def __init__(self, max_entries: int = _CACHE_SIZE, store: ResultCache | None = None):
+        self.max_entries = max_entries
+        self.store = store
+        self._profiles: OrderedDict[str, dict] = OrderedDict()
+
+    def get(self, profile_id: str) -> dict | None:
+        profile = self._profiles.get(profile_id)
+        if profile is not None:
+            self._profiles.move_to_end(profile_id)
+        return profile
+
+    def put(self, profile_id: str, profile: dict) -> None:
+        self._profiles[profile_id] = profile
+        self._profiles.move_to_end(profile_id)
+        while len(self._profiles) > self.max_entries:
+            self._profiles.popitem(last=False)
+
+    def get_or_compute(self, params: dict) -> tuple[str, dict]:
+        """Retorna (profile_id, perfil), calculando apenas na primeira vez."""
+        profile_id = make_profile_id(params)
+        profile = self.get(profile_id)
+        if profile is None:
+            profile = calculate_profile(**params)
+            self.put(profile_id, profile)
+        return profile_id, profile
+
+    async def resolve(self, params: dict) -> tuple[str, dict]:
+        """Como `get_or_compute`, gravando os parâmetros no `store` na primeira vez."""
+        known = self.get(make_profile_id(params)) is not None
+        profile_id, profile = self.get_or_compute(params)
+        if not known and self.store is not None:
+            await self.store.set(_store_key(profile_id), params)
+        return profile_id, profile
+
+    async def lookup(self, profile_id: str) -> dict | None:
+        """Perfil do id: da memória ou, se não estiver, recalculado pelo `store`."""
+        profile = self.get(profile_id)
+        if profile is not None or self.store is None:
+            return profile
+        params = await self.store.get(_store_key(profile_id))
+        if params is None:
+            return None
+        params = {
+            **params,
+            "sex": Sex(params["sex"]),
+            "activity_level": ActivityLevel(params["activity_level"]),
+        }
+        profile = calculate_profile(**params)
+        self.put(profile_id, profile)
+        return profile
+
+    def clear(self) -> None:
+        self._profiles.clear()
+
+
+profile_cache = ProfileCache(store=profile_store(_STORE_PATH) if _STORE_PATH is not None else None)
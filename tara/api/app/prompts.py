@@ -1,3 +1,7 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+
 SYSTEM_PROMPT = """Você é um assistente nutricional prático (não substitui nutricionista) especializado em montar porções em gramas para refeições, com foco em déficit calórico e adesão.
 
 OBJETIVO
@@ -48,36 +52,96 @@ COMPORTAMENTO
 - Seja direto, com numeros e referencias visuais simples (concha/colher) quando util."""
 
 
-def build_user_prompt(profile: dict, menu_text: str, meal_type: str = "almoco") -> str:
+# Mesmas regras e formato de saída, em ~1/3 do tamanho.
+SYSTEM_PROMPT_COMPACT = """Assistente nutricional prático (não substitui nutricionista). Monte porções em gramas para a refeição atual de quem está em déficit calórico.
+
+REGRAS
+- 1 proteína principal (se houver); sem proteína, use ovos/derivados com gordura controlada.
+- 1 carbo base e, no máximo, 1 complemento pequeno.
+- Itens densos (farofa, pão de alho, maionese, manteiga, frituras): porções pequenas e medidas.
+- Bebidas calóricas: porção pequena; prefira água se o limite estiver apertado.
+- Prato simples, com poucas misturas.
+- Mire em 85-100% das calorias da refeição.
+- "gramas" é sempre o peso (1 ovo frito ~50 g), nunca unidades; calorias e macros compatíveis com o peso.
+- Use valores médios e avise que variam por receita/óleo. Sem diagnóstico médico.
+
+Responda SOMENTE com JSON válido, sem texto extra:
+{"escolhas":[{"alimento":texto,"gramas":numero,"calorias_estimadas":numero,"proteina_g":numero,"carboidrato_g":numero,"gordura_g":numero,"justificativa":texto}],"total":{"calorias":numero,"proteina_g":numero,"carboidrato_g":numero,"gordura_g":numero},"dica":"2-3 ajustes: Se quiser mais X, reduza Y assim: ..."}"""
+
+_PROMPT_COMPACT = os.getenv("TARA_PROMPT_COMPACT", "0") == "1"
+_PROMPT_BUDGET_CHARS = int(os.getenv("TARA_PROMPT_BUDGET_CHARS", "12000"))
+_SECTION_CACHE_SIZE = 1024
+
+_MACRO_FIELDS = (
+    "protein_g",
+    "carbs_g",
+    "fat_g",
+    "protein_calories",
+    "carbs_calories",
+    "fat_calories",
+)
+
+
+class PromptTooLargeError(ValueError):
+    """O prompt não cabe no orçamento de caracteres configurado."""
+
+
+@dataclass(frozen=True)
+class Prompt:
+    messages: list[dict]
+    system_chars: int
+    user_chars: int
+    compact: bool
+
+    @property
+    def total_chars(self) -> int:
+        return self.system_chars + self.user_chars
+
+
+def _profile_key(profile: dict) -> tuple:
     macros = profile["macros"]
-    meals = profile["meals"]
-    target_calories = profile["target_calories"]
-    
+    return (
+        profile["target_calories"],
+        profile["deficit_percent"],
+        profile["meals_per_day"],
+        tuple(macros[field] for field in _MACRO_FIELDS),
+        tuple((key, tuple(meal.items())) for key, meal in profile["meals"].items()),
+    )
+
+
+@lru_cache(maxsize=_SECTION_CACHE_SIZE)
+def _profile_sections(key: tuple) -> tuple[str, dict[str, tuple[str, str]]]:
+    """Trechos que dependem só do perfil: cabeçalho e (antes, depois) do cardápio por refeição."""
+    target_calories, deficit_percent, meals_per_day, macro_values, meal_items = key
+    macros = dict(zip(_MACRO_FIELDS, macro_values))
+    meals = {meal_key: dict(items) for meal_key, items in meal_items}
+
     # Calcula percentuais reais dos macros
     protein_percent = int((macros['protein_calories'] / target_calories) * 100)
     carbs_percent = int((macros['carbs_calories'] / target_calories) * 100)
     fat_percent = int((macros['fat_calories'] / target_calories) * 100)
-    
+
     # Monta a distribuição de refeições do dia
     meals_info = "\n".join([
         f"  - {m['nome']}: {m['percentual']}% ({m['calorias']} kcal)"
         for m in meals.values()
     ])
-    
-    # Pega informações da refeição atual
-    current_meal = meals.get(meal_type, meals.get("almoco"))
-    
-    prompt = f"""PERFIL DO USUÁRIO:
-- Meta calórica diária: {target_calories} kcal (déficit de {int(profile['deficit_percent'] * 100)}%)
+
+    header = f"""PERFIL DO USUÁRIO:
+- Meta calórica diária: {target_calories} kcal (déficit de {int(deficit_percent * 100)}%)
 - Macros alvo por dia:
   - Proteína: {macros['protein_g']}g ({protein_percent}% do VET)
   - Carboidratos: {macros['carbs_g']}g ({carbs_percent}% do VET)
   - Gordura: {macros['fat_g']}g ({fat_percent}% do VET)
 
-DISTRIBUIÇÃO DAS {profile['meals_per_day']} REFEIÇÕES DO DIA:
+DISTRIBUIÇÃO DAS {meals_per_day} REFEIÇÕES DO DIA:
 {meals_info}
 
-REFEIÇÃO ATUAL: {current_meal['nome']} ({current_meal['percentual']}% do dia)
+"""
+
+    sections = {}
+    for meal_key, current_meal in meals.items():
+        before = f"""REFEIÇÃO ATUAL: {current_meal['nome']} ({current_meal['percentual']}% do dia)
 Meta para esta refeição:
 - {current_meal['calorias']} kcal
 - {current_meal['proteina_g']}g de proteína
@@ -85,10 +149,119 @@ Meta para esta refeição:
 - {current_meal['gordura_g']}g de gordura
 
 CARDÁPIO DO RESTAURANTE:
-{menu_text}
+"""
+        after = f"""
 
 Analise o cardápio e escolha os melhores alimentos para esta refeição ({current_meal['nome']}), 
 indicando a quantidade em gramas de cada um. A pessoa está em déficit calórico e quer emagrecer de forma saudável, 
 preservando massa muscular."""
+        sections[meal_key] = (before, after)
+    return header, sections
+
+
+def build_user_prompt(profile: dict, menu_text: str, meal_type: str = "almoco") -> str:
+    header, sections = _profile_sections(_profile_key(profile))
+    before, after = sections.get(meal_type) or sections["almoco"]
+    return f"{header}{before}{menu_text}{after}"
+
+
+def build_day_user_prompt(profile: dict, menu_text: str, meal_types: list[str]) -> str:
+    """Prompt com as metas de várias refeições para o mesmo cardápio."""
+    header, _ = _profile_sections(_profile_key(profile))
+    meals = profile["meals"]
+    targets = "\n".join(
+        f"- {meal_type} ({meals[meal_type]['nome']}, {meals[meal_type]['percentual']}% do dia): "
+        f"{meals[meal_type]['calorias']} kcal, {meals[meal_type]['proteina_g']}g de proteína, "
+        f"{meals[meal_type]['carboidrato_g']}g de carboidratos, {meals[meal_type]['gordura_g']}g de gordura"
+        for meal_type in meal_types
+    )
+    keys = ", ".join(f'"{meal_type}"' for meal_type in meal_types)
+    return f"""{header}REFEIÇÕES A MONTAR COM O MESMO CARDÁPIO:
+{targets}
+
+CARDÁPIO DO RESTAURANTE:
+{menu_text}
+
+Monte uma recomendação independente para cada refeição acima, respeitando a meta de cada uma.
+A pessoa está em déficit calórico e quer emagrecer de forma saudável, preservando massa muscular.
+Em vez de um único objeto, responda com {{"refeicoes": {{<chave>: <objeto no formato de saída>}}}},
+usando exatamente as chaves {keys}."""
+
+
+def build_batch_user_prompt(menu_text: str, meals: dict[str, dict]) -> str:
+    """Prompt com várias metas de refeição (perfis diferentes) para o mesmo cardápio."""
+    targets = "\n".join(
+        f"- {key}: {meal['calorias']} kcal, {meal['proteina_g']}g de proteína, "
+        f"{meal['carboidrato_g']}g de carboidratos, {meal['gordura_g']}g de gordura"
+        for key, meal in meals.items()
+    )
+    keys = ", ".join(f'"{key}"' for key in meals)
+    return f"""METAS DE REFEIÇÃO (uma por pessoa, todas com o mesmo cardápio):
+{targets}
+
+CARDÁPIO DO RESTAURANTE (composição média por 100 g):
+{menu_text}
+
+Monte uma recomendação independente para cada meta acima, usando só os itens do cardápio.
+As pessoas estão em déficit calórico e querem emagrecer de forma saudável, preservando massa muscular.
+Em vez de um único objeto, responda com {{"refeicoes": {{<chave>: <objeto no formato de saída>}}}},
+usando exatamente as chaves {keys}."""
+
+
+def _fit_budget(user_prompt: str, budget_chars: int | None, compact: bool | None) -> Prompt:
+    budget = _PROMPT_BUDGET_CHARS if budget_chars is None else budget_chars
+    compact = _PROMPT_COMPACT if compact is None else compact
+    system_prompt = SYSTEM_PROMPT_COMPACT if compact else SYSTEM_PROMPT
+    if not compact and len(system_prompt) + len(user_prompt) > budget:
+        system_prompt = SYSTEM_PROMPT_COMPACT
+        compact = True
+    total = len(system_prompt) + len(user_prompt)
+    if total > budget:
+        raise PromptTooLargeError(
+            f"Cardápio muito longo: o prompt tem {total} caracteres (limite {budget})."
+        )
+    return Prompt(
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ],
+        system_chars=len(system_prompt),
+        user_chars=len(user_prompt),
+        compact=compact,
+    )
+
+
+def build_messages(
+    profile: dict,
+    menu_text: str,
+    meal_type: str = "almoco",
+    budget_chars: int | None = None,
+    compact: bool | None = None,
+) -> Prompt:
+    """Mensagens do analyze dentro do orçamento de caracteres.
+
+    Usa o system prompt compacto se configurado ou se o completo estourar o
+    orçamento; levanta PromptTooLargeError se nem assim couber.
+    """
+    return _fit_budget(build_user_prompt(profile, menu_text, meal_type), budget_chars, compact)
+
+
+def build_day_messages(
+    profile: dict,
+    menu_text: str,
+    meal_types: list[str],
+    budget_chars: int | None = None,
+    compact: bool | None = None,
+) -> Prompt:
+    """Mensagens do analyze do dia (uma chamada para todas as refeições)."""
+    return _fit_budget(build_day_user_prompt(profile, menu_text, meal_types), budget_chars, compact)
+
 
-    return prompt
+def build_batch_messages(
+    menu_text: str,
+    meals: dict[str, dict],
+    budget_chars: int | None = None,
+    compact: bool | None = None,
+) -> Prompt:
+    """Mensagens do fallback do analyze em lote (uma chamada para várias metas)."""
+    return _fit_budget(build_batch_user_prompt(menu_text, meals), budget_chars, compact)
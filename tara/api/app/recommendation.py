@@ -0,0 +1,171 @@
+import re
+
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+# Faixa da meta calórica da refeição (mesma regra do SYSTEM_PROMPT: 85-100%).
+_TARGET_SHARE = 0.95
+_MIN_SHARE = 0.85
+_GRAMS_STEP = 5
+# Passos de 5 g para acertar o arredondamento dentro da faixa.
+_MAX_ROUNDING_STEPS = 60
+
+_NUMBER = re.compile(r"-?\d+(?:[.,]\d+)?")
+
+
+def _to_number(value):
+    """Aceita "120 g", "1,5" e afins, que os modelos às vezes devolvem."""
+    if isinstance(value, str):
+        match = _NUMBER.search(value)
+        if match is None:
+            return value
+        return float(match.group().replace(",", "."))
+    return value
+
+
+class Escolha(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    alimento: str = Field(min_length=1)
+    gramas: float = Field(ge=0)
+    calorias_estimadas: float = Field(default=0, ge=0)
+    proteina_g: float = Field(default=0, ge=0)
+    carboidrato_g: float = Field(default=0, ge=0)
+    gordura_g: float = Field(default=0, ge=0)
+    justificativa: str = ""
+
+    @field_validator(
+        "gramas",
+        "calorias_estimadas",
+        "proteina_g",
+        "carboidrato_g",
+        "gordura_g",
+        mode="before",
+    )
+    @classmethod
+    def _parse_number(cls, value):
+        return _to_number(value)
+
+
+class Total(BaseModel):
+    calorias: float = 0
+    proteina_g: float = 0
+    carboidrato_g: float = 0
+    gordura_g: float = 0
+
+    @field_validator("*", mode="before")
+    @classmethod
+    def _parse_number(cls, value):
+        return _to_number(value)
+
+
+class Recommendation(BaseModel):
+    """Resposta do `analyze_menu`; campos extras (ex.: `origem`) são mantidos.
+
+    `escolhas` pode vir vazia: cardápio só de bebidas e sobremesas, em que a
+    recomendação é não comer nada dele (explicada em `dica`).
+    """
+
+    model_config = ConfigDict(extra="allow")
+
+    escolhas: list[Escolha]
+    total: Total | None = None
+    dica: str = ""
+
+
+def _compact(value: float) -> float | int:
+    value = round(float(value), 1)
+    return int(value) if value.is_integer() else value
+
+
+def _fit_grams(
+    items: list[Escolha],
+    grams: list[float],
+    adjustable: list[int],
+    low: float,
+    high: float,
+) -> list[float]:
+    """Arredonda para múltiplos de 5 g e corrige o desvio que isso causa."""
+    density = [
+        item.calorias_estimadas / item.gramas if item.gramas > 0 else 0.0 for item in items
+    ]
+    grams = [
+        max(_GRAMS_STEP, round(value / _GRAMS_STEP) * _GRAMS_STEP) if index in adjustable else value
+        for index, value in enumerate(grams)
+    ]
+    for _ in range(_MAX_ROUNDING_STEPS):
+        calories = sum(d * g for d, g in zip(density, grams))
+        if calories > high:
+            candidates = [i for i in adjustable if grams[i] > _GRAMS_STEP]
+            step = -_GRAMS_STEP
+        elif calories < low:
+            candidates = list(adjustable)
+            step = _GRAMS_STEP
+        else:
+            break
+        candidates = [i for i in candidates if density[i] > 0]
+        if not candidates:
+            break
+        # O item mais denso move mais kcal por passo: menos mudanças no prato.
+        index = max(candidates, key=lambda i: density[i])
+        grams[index] += step
+    return grams
+
+
+def adjust_to_meal(recommendation: Recommendation, meal: dict) -> dict:
+    """Recalcula o total pelos itens e encaixa a refeição em 85-100% da meta.
+
+    Fora da faixa, as gramas dos itens são escaladas proporcionalmente,
+    mantendo a porção da proteína principal (o item com mais proteína); se só
+    ela já passa da meta, todos os itens são escalados. Sem itens, o total é
+    zero e nada é ajustado.
+    """
+    items = recommendation.escolhas
+    grams = [item.gramas for item in items]
+    calories = sum(item.calorias_estimadas for item in items)
+    target = meal.get("calorias") or 0
+    low, high = target * _MIN_SHARE, target
+
+    adjustment = None
+    if items and target > 0 and calories > 0 and not low <= calories <= high:
+        protein = max(range(len(items)), key=lambda index: items[index].proteina_g)
+        fixed = items[protein].calorias_estimadas
+        goal = target * _TARGET_SHARE
+        if calories - fixed > 0 and goal > fixed:
+            factor = (goal - fixed) / (calories - fixed)
+            adjustable = [index for index in range(len(items)) if index != protein]
+        else:
+            factor = goal / calories
+            adjustable = list(range(len(items)))
+        grams = [
+            value * factor if index in adjustable else value for index, value in enumerate(grams)
+        ]
+        grams = _fit_grams(items, grams, adjustable, low, high)
+        adjustment = {"calorias_originais": _compact(calories), "fator": round(factor, 3)}
+
+    escolhas = []
+    for item, new_grams in zip(items, grams):
+        scale = new_grams / item.gramas if item.gramas > 0 else 1.0
+        escolhas.append(
+            {
+                **item.model_dump(),
+                "gramas": _compact(new_grams),
+                "calorias_estimadas": round(item.calorias_estimadas * scale),
+                "proteina_g": _compact(item.proteina_g * scale),
+                "carboidrato_g": _compact(item.carboidrato_g * scale),
+                "gordura_g": _compact(item.gordura_g * scale),
+            }
+        )
+
+    result = {
+        "escolhas": escolhas,
+        "total": {
+            "calorias": sum(item["calorias_estimadas"] for item in escolhas),
+            "proteina_g": _compact(sum(item["proteina_g"] for item in escolhas)),
+            "carboidrato_g": _compact(sum(item["carboidrato_g"] for item in escolhas)),
+            "gordura_g": _compact(sum(item["gordura_g"] for item in escolhas)),
+        },
+        **recommendation.model_dump(exclude={"escolhas", "total"}),
+    }
+    if adjustment is not None:
+        result["ajuste"] = adjustment
+    return result
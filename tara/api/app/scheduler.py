@@ -0,0 +1,104 @@
+import asyncio
+import math
+import time
+from typing import Awaitable, Callable
+
+from .logger import get_logger
+
+logger = get_logger("tara.scheduler")
+
+_DEFAULT_RUN_SECONDS = 10.0
+_EWMA_ALPHA = 0.2
+
+
+class QueueFullError(Exception):
+    """Fila cheia; o cliente deve tentar de novo após `retry_after` segundos."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Fila de análises cheia, tente novamente em instantes.")
+        self.retry_after = retry_after
+
+
+class JobScheduler:
+    """Executa trabalhos com um número fixo de workers e uma fila limitada."""
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self._queue: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._next_ticket = 0
+        self._served = 0
+        self._running = 0
+        self._run_seconds = _DEFAULT_RUN_SECONDS
+
+    def start(self) -> None:
+        """Inicia os workers no loop atual (idempotente por loop)."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._next_ticket = 0
+        self._served = 0
+        self._running = 0
+        self._tasks = [
+            asyncio.create_task(self._worker()) for _ in range(self.workers)
+        ]
+
+    async def close(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._queue = None
+        self._loop = None
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    def retry_after(self) -> int:
+        """Estimativa em segundos até abrir espaço na fila."""
+        backlog = self.queued + self._running
+        return max(1, math.ceil(backlog * self._run_seconds / self.workers))
+
+    def submit(self, work: Callable[[], Awaitable[None]]) -> int:
+        """Enfileira o trabalho e retorna seu ticket; levanta QueueFullError se cheia."""
+        self.start()
+        self._next_ticket += 1
+        ticket = self._next_ticket
+        try:
+            self._queue.put_nowait((ticket, work))
+        except asyncio.QueueFull:
+            self._next_ticket -= 1
+            raise QueueFullError(self.retry_after()) from None
+        return ticket
+
+    def position(self, ticket: int) -> int | None:
+        """Posição (1 = próximo) de um ticket ainda na fila, ou None se já saiu."""
+        position = ticket - self._served
+        return position if position > 0 else None
+
+    async def _worker(self) -> None:
+        while True:
+            ticket, work = await self._queue.get()
+            self._served = max(self._served, ticket)
+            self._running += 1
+            started = time.perf_counter()
+            try:
+                await work()
+            except Exception as exc:
+                logger.exception("Falha inesperada no worker: %s", exc)
+            finally:
+                self._running -= 1
+                elapsed = time.perf_counter() - started
+                self._run_seconds = (
+                    _EWMA_ALPHA * elapsed + (1 - _EWMA_ALPHA) * self._run_seconds
+                )
+                self._queue.task_done()
@@ -0,0 +1,196 @@
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum
+
+
+_EWMA_ALPHA = 0.3
+_FAILURE_THRESHOLD = int(os.getenv("TARA_CIRCUIT_FAILURE_THRESHOLD", "5"))
+_COOLDOWN_SECONDS = float(os.getenv("TARA_CIRCUIT_COOLDOWN_SECONDS", "60"))
+_RECENT_ERRORS = 5
+
+
+class CircuitState(str, Enum):
+    closed = "closed"
+    open = "open"
+    half_open = "half_open"
+
+
+@dataclass
+class ProviderStats:
+    model: str
+    provider: str
+    latency_ewma: float | None = None
+    success_rate: float = 1.0
+    successes: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    state: CircuitState = CircuitState.closed
+    opened_at: float | None = None
+    probe_in_flight: bool = False
+    recent_errors: deque = field(default_factory=lambda: deque(maxlen=_RECENT_ERRORS))
+
+    def score(self) -> float | None:
+        """Custo esperado de uma tentativa; menor é melhor, None se sem dados."""
+        if self.latency_ewma is None:
+            return None
+        return self.latency_ewma / max(self.success_rate, 0.05)
+
+
+def provider_name(provider) -> str:
+    return getattr(provider, "__name__", None) or type(provider).__name__
+
+
+class ProviderScoreboard:
+    """Estatísticas em memória por (modelo, provider) com circuit breaker."""
+
+    def __init__(
+        self,
+        failure_threshold: int = _FAILURE_THRESHOLD,
+        cooldown_seconds: float = _COOLDOWN_SECONDS,
+    ):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._stats: dict[tuple[str, str], ProviderStats] = {}
+
+    def reset(self) -> None:
+        self._stats.clear()
+
+    def _get(self, model: str, provider) -> ProviderStats:
+        key = (model, provider_name(provider))
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = ProviderStats(model=key[0], provider=key[1])
+            self._stats[key] = stats
+        return stats
+
+    def _refresh(self, stats: ProviderStats, now: float) -> None:
+        if (
+            stats.state == CircuitState.open
+            and stats.opened_at is not None
+            and now - stats.opened_at >= self.cooldown_seconds
+        ):
+            stats.state = CircuitState.half_open
+
+    def record_success(self, model: str, provider, latency: float) -> None:
+        stats = self._get(model, provider)
+        stats.successes += 1
+        stats.consecutive_failures = 0
+        stats.success_rate = _ewma(stats.success_rate, 1.0)
+        stats.latency_ewma = (
+            latency if stats.latency_ewma is None else _ewma(stats.latency_ewma, latency)
+        )
+        stats.state = CircuitState.closed
+        stats.opened_at = None
+        stats.probe_in_flight = False
+
+    def record_failure(self, model: str, provider, error: BaseException) -> None:
+        now = time.time()
+        stats = self._get(model, provider)
+        stats.failures += 1
+        stats.consecutive_failures += 1
+        stats.success_rate = _ewma(stats.success_rate, 0.0)
+        stats.recent_errors.append((now, type(error).__name__))
+        if (
+            stats.state == CircuitState.half_open
+            or stats.consecutive_failures >= self.failure_threshold
+        ):
+            stats.state = CircuitState.open
+            stats.opened_at = now
+        stats.probe_in_flight = False
+
+    def release(self, model: str, provider) -> None:
+        """Libera a sonda half-open de uma tentativa cancelada."""
+        self._get(model, provider).probe_in_flight = False
+
+    def try_acquire(self, model: str, provider) -> bool:
+        """Indica se a tentativa pode ser feita agora; reserva a sonda half-open."""
+        stats = self._get(model, provider)
+        self._refresh(stats, time.time())
+        if stats.state == CircuitState.closed:
+            return True
+        if stats.state == CircuitState.half_open and not stats.probe_in_flight:
+            stats.probe_in_flight = True
+            return True
+        return False
+
+    def rank_providers(self, model: str, providers) -> list:
+        """Ordena providers por custo esperado, deixando circuitos abertos por último."""
+        now = time.time()
+        indexed = list(enumerate(providers))
+
+        def _key(item):
+            index, provider = item
+            stats = self._get(model, provider)
+            self._refresh(stats, now)
+            score = stats.score()
+            return (
+                stats.state == CircuitState.open,
+                score is None,
+                score or 0.0,
+                index,
+            )
+
+        return [provider for _, provider in sorted(indexed, key=_key)]
+
+    def rank_models(self, models, providers) -> list[str]:
+        """Ordena modelos pelo melhor provider disponível de cada um."""
+        now = time.time()
+
+        def _key(item):
+            index, model = item
+            best = None
+            all_open = True
+            for provider in providers:
+                stats = self._get(model, provider)
+                self._refresh(stats, now)
+                if stats.state == CircuitState.open:
+                    continue
+                all_open = False
+                score = stats.score()
+                if score is not None and (best is None or score < best):
+                    best = score
+            return (all_open, best is None, best or 0.0, index)
+
+        return [model for _, model in sorted(enumerate(models), key=_key)]
+
+    def snapshot(self) -> list[dict]:
+        now = time.time()
+        rows = []
+        for stats in self._stats.values():
+            self._refresh(stats, now)
+            score = stats.score()
+            rows.append(
+                {
+                    "model": stats.model,
+                    "provider": stats.provider,
+                    "state": stats.state,
+                    "score": round(score, 3) if score is not None else None,
+                    "latency_ewma_seconds": (
+                        round(stats.latency_ewma, 3)
+                        if stats.latency_ewma is not None
+                        else None
+                    ),
+                    "success_rate": round(stats.success_rate, 3),
+                    "successes": stats.successes,
+                    "failures": stats.failures,
+                    "consecutive_failures": stats.consecutive_failures,
+                    "recent_errors": [name for _, name in stats.recent_errors],
+                }
+            )
+        rows.sort(
+            key=lambda row: (
+                row["state"] == CircuitState.open,
+                row["score"] is None,
+                row["score"] or 0.0,
+            )
+        )
+        return rows
+
+
+def _ewma(previous: float, value: float) -> float:
+    return _EWMA_ALPHA * value + (1 - _EWMA_ALPHA) * previous
+
+
+scoreboard = ProviderScoreboard()
@@ -0,0 +1,121 @@
+import json
+from contextvars import ContextVar
+from typing import Callable
+
+# Destino dos itens parciais da execução atual (definido pelo job em andamento).
+partial_results: ContextVar[Callable[[list[dict]], None] | None] = ContextVar(
+    "partial_results",
+    default=None,
+)
+
+
+class EscolhasParser:
+    """Parser incremental: extrai cada objeto de `escolhas` assim que ele fecha.
+
+    Lê o texto uma única vez, acompanhando strings, escapes e profundidade, sem
+    reparsear o buffer a cada trecho recebido.
+    """
+
+    _KEY = '"escolhas"'
+
+    def __init__(self):
+        self.items: list[dict] = []
+        self._buffer = ""
+        self._pos = 0
+        self._in_array = False
+        self._done = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._item_start: int | None = None
+
+    def _find_array(self) -> bool:
+        key = self._buffer.find(self._KEY)
+        if key < 0:
+            return False
+        bracket = self._buffer.find("[", key + len(self._KEY))
+        if bracket < 0:
+            return False
+        self._in_array = True
+        self._pos = bracket + 1
+        return True
+
+    def feed(self, text: str) -> list[dict]:
+        """Acrescenta um trecho e retorna os itens que ficaram completos com ele."""
+        self._buffer += text
+        if self._done or (not self._in_array and not self._find_array()):
+            return []
+
+        completed = []
+        buffer = self._buffer
+        for index in range(self._pos, len(buffer)):
+            char = buffer[index]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 0 and char == "{":
+                    self._item_start = index
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 0:
+                    self._done = True
+                    break
+                self._depth -= 1
+                if self._depth == 0 and self._item_start is not None:
+                    try:
+                        item = json.loads(buffer[self._item_start : index + 1])
+                    except ValueError:
+                        item = None
+                    if isinstance(item, dict):
+                        self.items.append(item)
+                        completed.append(item)
+                    self._item_start = None
+        self._pos = len(buffer)
+        return completed
+
+
+class PartialPublisher:
+    """Publica os itens parciais de uma única tentativa por vez.
+
+    Com providers em corrida, a primeira tentativa que completa um item passa a
+    ser a dona da saída parcial; se ela falhar, a saída é limpa e a próxima
+    tentativa que produzir um item assume.
+    """
+
+    def __init__(self, publish: Callable[[list[dict]], None]):
+        self._publish = publish
+        self._owner: "_Attempt | None" = None
+
+    def attempt(self) -> "_Attempt":
+        return _Attempt(self)
+
+    def _offer(self, attempt: "_Attempt") -> None:
+        if self._owner is None:
+            self._owner = attempt
+        if self._owner is attempt:
+            self._publish(list(attempt.parser.items))
+
+    def _abandon(self, attempt: "_Attempt") -> None:
+        if self._owner is attempt:
+            self._owner = None
+            self._publish([])
+
+
+class _Attempt:
+    def __init__(self, publisher: PartialPublisher):
+        self._publisher = publisher
+        self.parser = EscolhasParser()
+
+    def feed(self, text: str) -> None:
+        if self.parser.feed(text):
+            self._publisher._offer(self)
+
+    def abandon(self) -> None:
+        self._publisher._abandon(self)
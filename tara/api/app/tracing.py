@@ -0,0 +1,88 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator
+
+# Máximo de spans guardados por trace; o excedente é só contado.
+_MAX_SPANS = 256
+
+
+@dataclass
+class Span:
+    name: str
+    start: float
+    duration: float | None = None
+    attributes: dict = field(default_factory=dict)
+    error: str | None = None
+
+    def to_dict(self, origin: float) -> dict:
+        """Span com início relativo a `origin` (criação do job), em milissegundos."""
+        entry = {
+            "name": self.name,
+            "offset_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+        }
+        if self.attributes:
+            entry["attributes"] = self.attributes
+        if self.error is not None:
+            entry["error"] = self.error
+        return entry
+
+
+class Trace:
+    """Linha do tempo de uma requisição ou execução; só cresce até `_MAX_SPANS`."""
+
+    def __init__(self, max_spans: int = _MAX_SPANS):
+        self.spans: list[Span] = []
+        self.dropped = 0
+        self._max_spans = max_spans
+
+    def add(self, span: Span) -> Span:
+        if len(self.spans) < self._max_spans:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+        return span
+
+    def record(self, name: str, start: float, end: float, **attributes) -> Span:
+        """Registra um trecho já medido (ex.: espera na fila)."""
+        return self.add(Span(name, start, max(0.0, end - start), attributes))
+
+
+# Trace da tarefa atual; spans fora de um trace não custam nada além do get().
+current_trace: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+
+
+@contextmanager
+def use_trace(trace: Trace | None) -> Iterator[Trace | None]:
+    token = current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        current_trace.reset(token)
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Span | None]:
+    """Mede o bloco no trace atual; marca o tipo da exceção, se houver."""
+    trace = current_trace.get()
+    if trace is None:
+        yield None
+        return
+    record = trace.add(Span(name, time.time(), attributes=attributes))
+    started = time.perf_counter()
+    try:
+        yield record
+    except BaseException as exc:
+        record.error = type(exc).__name__
+        raise
+    finally:
+        record.duration = time.perf_counter() - started
+
+
+def timeline(origin: float, *traces: Trace | None) -> list[dict]:
+    """Junta os spans de vários traces em ordem de início."""
+    spans = [span for trace in traces if trace is not None for span in trace.spans]
+    spans.sort(key=lambda span: span.start)
+    return [span.to_dict(origin) for span in spans]
@@ -0,0 +1 @@
+"""Microbenchmarks dos caminhos quentes da API (sem rede nem LLM)."""
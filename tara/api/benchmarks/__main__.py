@@ -0,0 +1,56 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from .suite import DEFAULT_TOLERANCE, compare, run_suite
+
+BASELINE = Path(__file__).parent / "baseline.json"
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Microbenchmarks da API Tara com comparação contra o baseline.",
+    )
+    parser.add_argument("--output", type=Path, help="arquivo JSON para gravar os resultados")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--only", help="roda só os casos cujo nome contém o texto")
+    parser.add_argument("--quick", action="store_true", help="tamanhos reduzidos (10x)")
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="grava os resultados como novo baseline",
+    )
+    args = parser.parse_args(argv)
+
+    report = run_suite(quick=args.quick, rounds=args.rounds, only=args.only)
+    for name, result in report["results"].items():
+        print(f"{name:40} {result['median_us']:>12.3f} us/op  (min {result['min_us']:.3f})")
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"Sem baseline em {args.baseline}; nada a comparar.")
+        return 0
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    if baseline.get("quick") != report["quick"]:
+        print("Baseline gerado com outro tamanho (--quick); nada a comparar.")
+        return 0
+    regressions = compare(report, baseline, args.tolerance)
+    for regression in regressions:
+        print(
+            f"REGRESSÃO {regression['name']}: {regression['current_us']:.3f} us/op "
+            f"vs {regression['baseline_us']:.3f} (x{regression['ratio']})"
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
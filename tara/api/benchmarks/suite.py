@@ -0,0 +1,255 @@
+import asyncio
+import json
+import platform
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from app.agent import _parse_foods, _parse_recommendation
+from app.calculator import ActivityLevel, Sex, calculate_profile, calculate_profiles_batch
+from app.job_store import InMemoryJobStore, Job, JobStatus
+from app.prompts import _profile_sections, build_user_prompt
+
+# Tolerância padrão antes de acusar regressão (mediana 25% acima do baseline).
+DEFAULT_TOLERANCE = 0.25
+# Custo por operação aceito ao crescer 10x o número de jobs; uma varredura
+# linear por operação fica ~10x mais cara e estoura esse limite.
+SCALING_TOLERANCE = 1.0
+# Pares (menor, maior) do mesmo caso em tamanhos diferentes.
+SCALING_PAIRS = (
+    ("jobs.memory_store.cycle_10k", "jobs.memory_store.cycle_100k"),
+    ("jobs.memory_store.over_budget_10k", "jobs.memory_store.over_budget_100k"),
+)
+_CALIBRATION_ROUNDS = 7
+
+_MENU = "Frango grelhado\nArroz branco\nFeijão carioca\nSalada verde\nFarofa\nSuco de laranja"
+
+_RECOMMENDATION = "```json\n" + json.dumps(
+    {
+        "escolhas": [
+            {
+                "alimento": name,
+                "gramas": 100,
+                "calorias_estimadas": 150,
+                "proteina_g": 10.5,
+                "carboidrato_g": 20.0,
+                "gordura_g": 3.2,
+                "justificativa": "Escolha equilibrada para saciedade e controle calórico.",
+            }
+            for name in ("Frango grelhado", "Arroz branco", "Feijão carioca", "Salada verde")
+        ],
+        "total": {"calorias": 600, "proteina_g": 42, "carboidrato_g": 80, "gordura_g": 12.8},
+        "dica": "Se quiser mais arroz, reduza o feijão pela metade.",
+    },
+    ensure_ascii=False,
+    indent=2,
+) + "\n```"
+
+# Prosa em volta, vírgula sobrando e resposta truncada: exercita o reparo.
+_RECOMMENDATION_DAMAGED = "Segue a recomendação:\n" + _RECOMMENDATION.strip("`").removeprefix("json")[:-40] + ",\n"
+_FOODS = json.dumps(["Frango grelhado", "Arroz branco", "Feijão carioca", "Salada verde", "Farofa"])
+
+
+@dataclass
+class Case:
+    """Um benchmark: `run()` executa `ops` operações medidas como uma rodada."""
+
+    name: str
+    run: Callable[[], None]
+    ops: int = 1
+    setup: Callable[[], None] | None = None
+
+
+def _profile_params(index: int = 0) -> dict:
+    return {
+        "weight_kg": 60 + index % 50,
+        "height_cm": 160 + index % 30,
+        "age": 20 + index % 40,
+        "sex": Sex.MALE if index % 2 else Sex.FEMALE,
+        "activity_level": list(ActivityLevel)[index % 5],
+        "deficit_percent": 0.2,
+        "meals_per_day": 3 + index % 4,
+    }
+
+
+def _batch_columns(rows: int) -> dict:
+    params = [_profile_params(index) for index in range(rows)]
+    return {field: [row[field] for row in params] for field in params[0]}
+
+
+def _job_cycle(jobs: int, over_budget: bool = False) -> Callable[[], None]:
+    """Cria, consulta e expira `jobs` jobs no store em memória.
+
+    Com `over_budget`, o orçamento cabe só ~1/10 dos jobs e quase todo `update`
+    descarta o finalizado menos usado: mede o caminho de despejo.
+    """
+
+    async def _cycle() -> None:
+        max_bytes = jobs * 30 if over_budget else 1 << 40
+        store = InMemoryJobStore(ttl_seconds=60, max_bytes=max_bytes)
+        now = time.time()
+        result = {"recommendation": {"escolhas": [], "dica": "x" * 200}}
+        for index in range(jobs):
+            job_id = f"job-{index}"
+            await store.add(Job(job_id=job_id, status=JobStatus.pending, created_at=now, updated_at=now))
+            await store.update(job_id, status=JobStatus.done, result=result)
+        for index in range(jobs):
+            await store.get(f"job-{index}")
+        removed = await store.reap(now + 61)
+        if over_budget:
+            assert store.total_bytes <= max_bytes and removed < jobs
+        else:
+            assert removed == jobs
+
+    return lambda: asyncio.run(_cycle())
+
+
+def _calibrate() -> float:
+    """Tempo (us) de uma carga fixa em Python puro, para comparar entre máquinas."""
+    data = [{"alimento": f"item {index}", "gramas": index} for index in range(200)]
+
+    def _work() -> None:
+        for _ in range(50):
+            json.loads(json.dumps(data))
+            sorted(data, key=lambda row: -row["gramas"])
+
+    timings = []
+    for _ in range(_CALIBRATION_ROUNDS):
+        started = time.perf_counter()
+        _work()
+        timings.append((time.perf_counter() - started) * 1e6)
+    return round(statistics.median(timings), 3)
+
+
+def build_cases(quick: bool = False) -> list[Case]:
+    scale = 10 if quick else 1
+    profile = calculate_profile(**_profile_params())
+    columns = _batch_columns(10_000 // scale)
+    repeat = 2000 // scale
+
+    def _scalar() -> None:
+        for index in range(repeat):
+            calculate_profile(**_profile_params(index))
+
+    def _prompt_warm() -> None:
+        for _ in range(repeat):
+            build_user_prompt(profile, _MENU, "almoco")
+
+    def _prompt_cold() -> None:
+        for _ in range(repeat):
+            _profile_sections.cache_clear()
+            build_user_prompt(profile, _MENU, "almoco")
+
+    def _parse_analysis() -> None:
+        for _ in range(repeat):
+            _parse_recommendation(_RECOMMENDATION)
+
+    def _parse_repaired() -> None:
+        for _ in range(repeat):
+            _parse_recommendation(_RECOMMENDATION_DAMAGED)
+
+    def _parse_items() -> None:
+        for _ in range(repeat):
+            _parse_foods(_FOODS)
+
+    return [
+        Case("calculator.calculate_profile", _scalar, ops=repeat),
+        Case(
+            "calculator.calculate_profiles_batch",
+            lambda: calculate_profiles_batch(**columns),
+            ops=len(columns["age"]),
+        ),
+        Case("prompts.build_user_prompt.cached", _prompt_warm, ops=repeat),
+        Case("prompts.build_user_prompt.cold", _prompt_cold, ops=repeat),
+        Case("agent.parse.analyze_menu", _parse_analysis, ops=repeat),
+        Case("agent.parse.analyze_menu_repaired", _parse_repaired, ops=repeat),
+        Case("agent.parse.extract_foods", _parse_items, ops=repeat),
+        Case("jobs.memory_store.cycle_10k", _job_cycle(10_000 // scale), ops=10_000 // scale),
+        Case("jobs.memory_store.cycle_100k", _job_cycle(100_000 // scale), ops=100_000 // scale),
+        Case(
+            "jobs.memory_store.over_budget_10k",
+            _job_cycle(10_000 // scale, over_budget=True),
+            ops=10_000 // scale,
+        ),
+        Case(
+            "jobs.memory_store.over_budget_100k",
+            _job_cycle(100_000 // scale, over_budget=True),
+            ops=100_000 // scale,
+        ),
+    ]
+
+
+def run_suite(quick: bool = False, rounds: int = 5, only: str | None = None) -> dict:
+    """Executa os casos e retorna o relatório (tempos por operação em microssegundos).
+
+    `calibration_us` mede a velocidade da máquina; `compare` usa a razão entre
+    ele e o do baseline para comparar relatórios de máquinas diferentes.
+    """
+    calibration = _calibrate()
+    results = {}
+    for case in build_cases(quick):
+        if only and only not in case.name:
+            continue
+        timings = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            case.run()
+            timings.append((time.perf_counter() - started) / case.ops * 1e6)
+        results[case.name] = {
+            "median_us": round(statistics.median(timings), 3),
+            "min_us": round(min(timings), 3),
+            "ops": case.ops,
+            "rounds": rounds,
+        }
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "quick": quick,
+        "calibration_us": calibration,
+        "results": results,
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> list[dict]:
+    """Casos que regrediram: contra o baseline e no crescimento por tamanho.
+
+    Contra o baseline, a mediana é escalada pela razão de calibração (quando os
+    dois relatórios a têm), de modo que uma máquina 2x mais lenta não acusa
+    regressão. Os pares de SCALING_PAIRS comparam o relatório consigo mesmo e
+    não dependem de máquina nem de baseline.
+    """
+    speed = 1.0
+    if report.get("calibration_us") and baseline.get("calibration_us"):
+        speed = report["calibration_us"] / baseline["calibration_us"]
+    results = report["results"]
+    regressions = []
+    for name, current in results.items():
+        reference = baseline.get("results", {}).get(name)
+        if reference is None:
+            continue
+        expected = reference["median_us"] * speed
+        ratio = current["median_us"] / max(expected, 1e-9)
+        if ratio > 1 + tolerance:
+            regressions.append(
+                {
+                    "name": name,
+                    "baseline_us": round(expected, 3),
+                    "current_us": current["median_us"],
+                    "ratio": round(ratio, 3),
+                }
+            )
+    for small, large in SCALING_PAIRS:
+        if small not in results or large not in results:
+            continue
+        ratio = results[large]["median_us"] / max(results[small]["median_us"], 1e-9)
+        if ratio > 1 + SCALING_TOLERANCE:
+            regressions.append(
+                {
+                    "name": f"{large} (escala)",
+                    "baseline_us": results[small]["median_us"],
+                    "current_us": results[large]["median_us"],
+                    "ratio": round(ratio, 3),
+                }
+            )
+    return regressions
@@ -0,0 +1 @@
+"""Teste de carga offline: provider LLM simulado e gerador de requisições."""
@@ -0,0 +1,60 @@
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from pathlib import Path
+
+from .generator import run_load
+from .simulator import SimulationConfig
+
+SCENARIOS = Path(__file__).parent / "scenarios"
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m loadtest",
+        description="Carga em POST /api/v1/analyze + polling com provider LLM simulado (offline).",
+    )
+    parser.add_argument("--scenario", default=str(SCENARIOS / "healthy.json"))
+    parser.add_argument("--rps", type=float, default=10.0)
+    parser.add_argument("--duration", type=float, default=30.0, help="segundos de disparo")
+    parser.add_argument("--distinct-menus", type=int, default=1000)
+    parser.add_argument("--poll-interval", type=float, default=0.25)
+    parser.add_argument("--request-timeout", type=float, default=60.0)
+    parser.add_argument(
+        "--llm-timeout",
+        type=float,
+        help="sobrescreve o timeout por chamada do agente (segundos)",
+    )
+    parser.add_argument("--output", type=Path, help="arquivo JSON para gravar o relatório")
+    parser.add_argument("--verbose", action="store_true", help="mantém os logs INFO da API")
+    args = parser.parse_args(argv)
+
+    if not args.verbose:
+        logging.disable(logging.INFO)
+
+    if args.llm_timeout is not None:
+        from app import agent
+
+        agent._LLM_TIMEOUT_SECONDS = args.llm_timeout
+
+    report = asyncio.run(
+        run_load(
+            SimulationConfig.load(args.scenario),
+            rps=args.rps,
+            duration_seconds=args.duration,
+            distinct_menus=args.distinct_menus,
+            poll_interval=args.poll_interval,
+            request_timeout=args.request_timeout,
+        )
+    )
+    data = json.dumps(report.to_dict(), indent=2, ensure_ascii=False)
+    print(data)
+    if args.output:
+        args.output.write_text(data + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
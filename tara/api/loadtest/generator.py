@@ -0,0 +1,147 @@
+import asyncio
+import math
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+import httpx
+
+from .simulator import SimulatedClient, SimulationConfig
+
+_PROFILE = {
+    "weight_kg": 80,
+    "height_cm": 175,
+    "age": 35,
+    "sex": "male",
+    "activity_level": "moderate",
+}
+
+
+@dataclass
+class Outcome:
+    kind: str
+    latency: float
+
+
+@dataclass
+class LoadReport:
+    offered_rps: float
+    duration_seconds: float
+    requests: int
+    ok: int
+    errors: dict[str, int] = field(default_factory=dict)
+    throughput_rps: float = 0.0
+    latency_seconds: dict[str, float] = field(default_factory=dict)
+    llm_calls: int = 0
+
+    def to_dict(self) -> dict:
+        return dict(self.__dict__)
+
+
+def percentile(values: list[float], quantile: float) -> float:
+    """Percentil por posto mais próximo; 0 se não houver valores."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(quantile * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _menu(index: int, distinct_menus: int) -> str:
+    # Pratos fora da tabela local, para que toda análise passe pelo LLM.
+    variant = index % distinct_menus
+    return f"Prato especial da casa {variant}\nAcompanhamento do chef {variant}"
+
+
+async def _one_request(
+    client: httpx.AsyncClient,
+    index: int,
+    distinct_menus: int,
+    poll_interval: float,
+    request_timeout: float,
+) -> Outcome:
+    started = time.perf_counter()
+    deadline = started + request_timeout
+    response = await client.post(
+        "/api/v1/analyze",
+        json={"profile": _PROFILE, "menu_text": _menu(index, distinct_menus)},
+    )
+    if response.status_code != 200:
+        return Outcome(f"http_{response.status_code}", time.perf_counter() - started)
+
+    job_id = response.json()["job_id"]
+    while time.perf_counter() < deadline:
+        await asyncio.sleep(poll_interval)
+        status = await client.get(f"/api/v1/analyze/{job_id}")
+        if status.status_code != 200:
+            return Outcome(f"http_{status.status_code}", time.perf_counter() - started)
+        payload = status.json()
+        if payload["status"] == "done":
+            return Outcome("ok", time.perf_counter() - started)
+        if payload["status"] == "error":
+            return Outcome(f"job_error: {payload['error']}", time.perf_counter() - started)
+    return Outcome("client_timeout", time.perf_counter() - started)
+
+
+async def run_load(
+    config: SimulationConfig,
+    rps: float,
+    duration_seconds: float,
+    distinct_menus: int = 1000,
+    poll_interval: float = 0.25,
+    request_timeout: float = 60.0,
+) -> LoadReport:
+    """Dispara POST /analyze em taxa fixa (malha aberta) e acompanha cada job até o fim."""
+    from app import agent
+    from app.jobs import close_jobs, start_jobs
+    from app.main import app
+
+    rng = random.Random(config.seed)
+    clients: list[SimulatedClient] = []
+
+    def _factory() -> SimulatedClient:
+        client = SimulatedClient(config, rng)
+        clients.append(client)
+        return client
+
+    agent.start_client_pool(factory=_factory)
+    start_jobs()
+    total = max(1, int(rps * duration_seconds))
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as http:
+            started = time.perf_counter()
+            tasks = []
+            for index in range(total):
+                delay = started + index / rps - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(
+                    asyncio.create_task(
+                        _one_request(http, index, distinct_menus, poll_interval, request_timeout)
+                    )
+                )
+            outcomes = await asyncio.gather(*tasks)
+            elapsed = time.perf_counter() - started
+    finally:
+        await close_jobs()
+        await agent.close_client_pool()
+
+    latencies = [outcome.latency for outcome in outcomes if outcome.kind == "ok"]
+    errors = Counter(outcome.kind for outcome in outcomes if outcome.kind != "ok")
+    return LoadReport(
+        offered_rps=rps,
+        duration_seconds=round(elapsed, 3),
+        requests=len(outcomes),
+        ok=len(latencies),
+        errors=dict(errors.most_common()),
+        throughput_rps=round(len(latencies) / elapsed, 3) if elapsed else 0.0,
+        latency_seconds={
+            "p50": round(percentile(latencies, 0.50), 4),
+            "p95": round(percentile(latencies, 0.95), 4),
+            "p99": round(percentile(latencies, 0.99), 4),
+            "max": round(max(latencies, default=0.0), 4),
+        },
+        llm_calls=sum(client.calls for client in clients),
+    )
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import random
+from dataclasses import dataclass, field
+
+from app.scoreboard import provider_name
+
+_CHUNK_CHARS = 24
+
+
+class SimulatedProviderError(Exception):
+    """Falha injetada pelo provider simulado."""
+
+
+@dataclass
+class Behavior:
+    """Comportamento de um (modelo, provider): latência, erros e travamentos."""
+
+    latency: dict = field(default_factory=lambda: {"type": "lognormal", "median": 1.0, "sigma": 0.5})
+    error_rate: float = 0.0
+    # Chamadas que nunca respondem a tempo (estouram o timeout do agente).
+    timeout_rate: float = 0.0
+    hang_seconds: float = 60.0
+
+    def merged(self, overrides: dict | None) -> "Behavior":
+        if not overrides:
+            return self
+        values = {**self.__dict__, **overrides}
+        return Behavior(**values)
+
+
+@dataclass
+class SimulationConfig:
+    """Cenário: comportamento padrão refinado por modelo, provider e "modelo/provider"."""
+
+    default: Behavior = field(default_factory=Behavior)
+    models: dict[str, dict] = field(default_factory=dict)
+    providers: dict[str, dict] = field(default_factory=dict)
+    overrides: dict[str, dict] = field(default_factory=dict)
+    seed: int | None = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SimulationConfig":
+        return cls(
+            default=Behavior().merged(data.get("default")),
+            models=data.get("models", {}),
+            providers=data.get("providers", {}),
+            overrides=data.get("overrides", {}),
+            seed=data.get("seed"),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "SimulationConfig":
+        with open(path, encoding="utf-8") as scenario:
+            return cls.from_dict(json.load(scenario))
+
+    def behavior(self, model: str, provider: str) -> Behavior:
+        return (
+            self.default.merged(self.models.get(model))
+            .merged(self.providers.get(provider))
+            .merged(self.overrides.get(f"{model}/{provider}"))
+        )
+
+
+def sample_latency(spec: dict, rng: random.Random) -> float:
+    kind = spec.get("type", "lognormal")
+    if kind == "fixed":
+        return float(spec["seconds"])
+    if kind == "uniform":
+        return rng.uniform(spec["low"], spec["high"])
+    if kind == "lognormal":
+        return rng.lognormvariate(0.0, spec.get("sigma", 0.5)) * spec["median"]
+    raise ValueError(f"Distribuição de latência desconhecida: {kind}")
+
+
+def _recommendation(menu: str) -> str:
+    first_line = next((line.strip() for line in menu.splitlines() if line.strip()), "Prato")
+    return json.dumps(
+        {
+            "escolhas": [
+                {
+                    "alimento": first_line,
+                    "gramas": 150,
+                    "calorias_estimadas": 300,
+                    "proteina_g": 25,
+                    "carboidrato_g": 30,
+                    "gordura_g": 8,
+                    "justificativa": "Resposta simulada para teste de carga.",
+                }
+            ],
+            "total": {"calorias": 300, "proteina_g": 25, "carboidrato_g": 30, "gordura_g": 8},
+            "dica": "Resposta simulada.",
+        },
+        ensure_ascii=False,
+    )
+
+
+class _Message:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class _Choice:
+    def __init__(self, content: str):
+        self.message = _Message(content)
+        self.delta = self.message
+
+
+class _Response:
+    def __init__(self, content: str):
+        self.choices = [_Choice(content)]
+
+
+class _Completions:
+    def __init__(self, client: "SimulatedClient"):
+        self._client = client
+
+    async def create(self, model: str, messages: list[dict], provider=None, stream: bool = False, **kwargs):
+        name = provider_name(provider) if provider is not None else "default"
+        behavior = self._client.config.behavior(model, name)
+        rng = self._client.rng
+        self._client.calls += 1
+
+        if rng.random() < behavior.timeout_rate:
+            await asyncio.sleep(behavior.hang_seconds)
+        latency = sample_latency(behavior.latency, rng)
+        failed = rng.random() < behavior.error_rate
+        menu = messages[-1].get("content", "") if messages else ""
+        content = _recommendation(menu.rsplit("CARDÁPIO DO RESTAURANTE:", 1)[-1])
+
+        if not stream:
+            await asyncio.sleep(latency)
+            if failed:
+                raise SimulatedProviderError("Falha simulada do provider")
+            return _Response(content)
+        return self._stream(content, latency, failed)
+
+    @staticmethod
+    async def _stream(content: str, latency: float, failed: bool):
+        chunks = [content[i : i + _CHUNK_CHARS] for i in range(0, len(content), _CHUNK_CHARS)]
+        for index, chunk in enumerate(chunks):
+            await asyncio.sleep(latency / len(chunks))
+            if failed and index == len(chunks) // 2:
+                raise SimulatedProviderError("Falha simulada do provider")
+            yield _Response(chunk)
+
+
+class _Chat:
+    def __init__(self, client: "SimulatedClient"):
+        self.completions = _Completions(client)
+
+
+class SimulatedClient:
+    """Cliente com a interface do g4f que responde segundo um SimulationConfig."""
+
+    def __init__(self, config: SimulationConfig, rng: random.Random | None = None):
+        self.config = config
+        self.rng = rng or random.Random(config.seed)
+        self.calls = 0
+        self.chat = _Chat(self)
@@ -21,6 +21,7 @@ def test_analyze_menu_stub_client(monkeypatch):
     import app.agent as agent_module
 
     monkeypatch.setattr(agent_module, "_create_client", lambda: StubClient())
+    monkeypatch.setattr(agent_module, "_LOCAL_SOLVER_ENABLED", False)
     profile = calculate_profile(
         weight_kg=70,
         height_cm=170,
@@ -38,6 +39,33 @@ def test_analyze_menu_stub_client(monkeypatch):
     assert result["escolhas"][0]["alimento"] == "stub"
 
 
+@pytest.mark.unit
+def test_analyze_menu_streams_items_to_partial_results(monkeypatch):
+    from tests.support.g4f.client import Client as StubClient
+    import app.agent as agent_module
+    from app.streaming import partial_results
+
+    monkeypatch.setattr(agent_module, "_create_client", lambda: StubClient())
+    monkeypatch.setattr(agent_module, "_LOCAL_SOLVER_ENABLED", False)
+    profile = calculate_profile(
+        weight_kg=70,
+        height_cm=170,
+        age=30,
+        sex=Sex.MALE,
+        activity_level=ActivityLevel.MODERATE,
+    )
+    published = []
+
+    async def _run():
+        partial_results.set(published.append)
+        return await analyze_menu(profile, "Moqueca\nPirão", "almoco")
+
+    result = asyncio.run(_run())
+
+    assert published == [result["escolhas"]]
+    assert result["dica"] == "Stub local para testes."
+
+
 @pytest.mark.unit
 def test_fallback_tries_next_model(monkeypatch):
     import json
@@ -98,3 +126,358 @@ def test_get_chat_with_fallback_returns_response(monkeypatch):
     monkeypatch.setattr(agent_module, "_create_client", lambda: StubClient())
     response = asyncio.run(get_chat_with_fallback([{"role": "user", "content": "x"}]))
     assert response.choices[0].message.content == "[\"feijao\"]"
+
+
+def _provider(name: str):
+    return type(name, (), {})
+
+
+@pytest.mark.unit
+def test_parallel_race_returns_fastest_provider(monkeypatch):
+    import app.agent as agent_module
+
+    slow, fast = _provider("Slow"), _provider("Fast")
+    cancelled = []
+
+    async def _fake_call(messages, model, provider, on_delta=None):
+        if provider is slow:
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(provider)
+                raise
+        return provider.__name__
+
+    monkeypatch.setattr(agent_module, "_FALLBACK_PROVIDERS", (slow, fast))
+    monkeypatch.setattr(agent_module, "_call_with_timeout", _fake_call)
+    monkeypatch.setattr(agent_module, "_LLM_RACE_MODE", "parallel")
+    monkeypatch.setattr(agent_module, "_LLM_RACE_WIDTH", 2)
+
+    async def _run():
+        result = await agent_module._call_with_providers([], "gpt-4o")
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(_run()) == "Fast"
+    assert cancelled == [slow]
+
+
+@pytest.mark.unit
+def test_hedged_race_starts_backup_after_delay(monkeypatch):
+    import app.agent as agent_module
+
+    stuck, backup, unused = _provider("Stuck"), _provider("Backup"), _provider("Unused")
+    started = []
+
+    async def _fake_call(messages, model, provider, on_delta=None):
+        started.append(provider)
+        if provider is stuck:
+            await asyncio.sleep(5)
+        return provider.__name__
+
+    monkeypatch.setattr(agent_module, "_FALLBACK_PROVIDERS", (stuck, backup, unused))
+    monkeypatch.setattr(agent_module, "_call_with_timeout", _fake_call)
+    monkeypatch.setattr(agent_module, "_LLM_RACE_MODE", "hedged")
+    monkeypatch.setattr(agent_module, "_LLM_RACE_WIDTH", 2)
+    monkeypatch.setattr(agent_module, "_LLM_HEDGE_DELAY_SECONDS", 0.01)
+    monkeypatch.setattr(agent_module, "_latency_samples", agent_module.deque(maxlen=10))
+
+    result = asyncio.run(agent_module._call_with_providers([], "gpt-4o"))
+
+    assert result == "Backup"
+    assert started == [stuck, backup]
+
+
+@pytest.mark.unit
+def test_client_pool_reuses_clients_across_models(monkeypatch):
+    import app.agent as agent_module
+
+    class _Message:
+        def __init__(self, content: str):
+            self.content = content
+
+    class _Choice:
+        def __init__(self, content: str):
+            self.message = _Message(content)
+
+    class _Response:
+        def __init__(self, content: str):
+            self.choices = [_Choice(content)]
+
+    class PooledClient:
+        closed = 0
+
+        def __init__(self):
+            self.chat = self
+            self.completions = self
+
+        async def create(self, model: str, messages: list[dict], **kwargs):
+            if model == "gpt-5.2":
+                raise RuntimeError("model down")
+            return _Response("[]")
+
+        def close(self):
+            PooledClient.closed += 1
+
+    created = []
+
+    def _factory():
+        created.append(1)
+        return PooledClient()
+
+    async def _run():
+        agent_module.start_client_pool(size=2, factory=_factory)
+        try:
+            for _ in range(3):
+                await get_chat_with_fallback([{"role": "user", "content": "x"}])
+        finally:
+            await agent_module.close_client_pool()
+
+    asyncio.run(_run())
+
+    assert len(created) == 1
+    assert PooledClient.closed == 1
+    assert agent_module._client_pool is None
+
+
+@pytest.mark.unit
+def test_unparseable_response_falls_through_to_next_provider(monkeypatch):
+    import app.agent as agent_module
+    from app.scoreboard import scoreboard
+
+    garbage, good = _provider("Garbage"), _provider("Good")
+    calls = []
+
+    async def _fake_call(messages, model, provider, on_delta=None):
+        calls.append(provider)
+        if provider is garbage:
+            return agent_module._StreamedResponse("Desculpe, não consegui montar o JSON.")
+        return agent_module._StreamedResponse(
+            'Aqui está:\n{"escolhas": [{"alimento": "Arroz", "gramas": 120,}], "dica": "ok"}'
+        )
+
+    monkeypatch.setattr(agent_module, "_FALLBACK_PROVIDERS", (garbage, good))
+    monkeypatch.setattr(agent_module, "_call_with_timeout", _fake_call)
+    monkeypatch.setattr(agent_module, "_LLM_RACE_MODE", "sequential")
+
+    response = asyncio.run(
+        get_chat_with_fallback([], parse=agent_module._parse_recommendation)
+    )
+
+    assert [(item.alimento, item.gramas) for item in response.parsed.escolhas] == [("Arroz", 120)]
+    assert calls == [garbage, good]
+    failures = {
+        (row["model"], row["provider"]): row["failures"] for row in scoreboard.snapshot()
+    }
+    assert failures[(agent_module._FALLBACK_MODELS[0], "Garbage")] == 1
+
+
+@pytest.mark.unit
+def test_analyze_day_uses_one_llm_call_and_fills_the_meal_cache(monkeypatch):
+    from tests.support.g4f.client import Client as StubClient
+    import app.agent as agent_module
+    from app.agent import analyze_day
+
+    prompts = []
+    call = agent_module._call_chat_completion
+
+    async def _counting_call(messages, *args, **kwargs):
+        prompts.append(messages[-1]["content"])
+        return await call(messages, *args, **kwargs)
+
+    monkeypatch.setattr(agent_module, "_create_client", lambda: StubClient())
+    monkeypatch.setattr(agent_module, "_call_chat_completion", _counting_call)
+    monkeypatch.setattr(agent_module, "_LOCAL_SOLVER_ENABLED", False)
+    profile = calculate_profile(
+        weight_kg=70,
+        height_cm=170,
+        age=30,
+        sex=Sex.MALE,
+        activity_level=ActivityLevel.MODERATE,
+        meals_per_day=4,
+    )
+    meal_types = list(profile["meals"])
+
+    async def _run():
+        day = await analyze_day(profile, "Frango grelhado\nArroz branco", meal_types)
+        single = await analyze_menu(profile, "Frango grelhado\nArroz branco", meal_types[-1])
+        return day, single
+
+    day, single = asyncio.run(_run())
+
+    assert list(day) == meal_types
+    assert all(result["escolhas"][0]["alimento"] == "stub" for result in day.values())
+    assert len(prompts) == 1
+    assert all(meal_type in prompts[0] for meal_type in meal_types)
+    assert single == day[meal_types[-1]]
+
+
+@pytest.mark.unit
+def test_analyze_day_solves_known_menu_locally_for_every_meal(monkeypatch):
+    import app.agent as agent_module
+    from app.agent import analyze_day
+
+    async def _no_llm(*args, **kwargs):
+        raise AssertionError("não deveria chamar o LLM")
+
+    monkeypatch.setattr(agent_module, "get_chat_with_fallback", _no_llm)
+    profile = calculate_profile(
+        weight_kg=70,
+        height_cm=170,
+        age=30,
+        sex=Sex.MALE,
+        activity_level=ActivityLevel.MODERATE,
+        meals_per_day=4,
+    )
+
+    day = asyncio.run(analyze_day(profile, "Frango grelhado, arroz branco, feijão", ["almoco", "jantar"]))
+
+    for meal_type in ("almoco", "jantar"):
+        target = profile["meals"][meal_type]["calorias"]
+        assert day[meal_type]["origem"] == "tabela_local"
+        assert 0.85 * target <= day[meal_type]["total"]["calorias"] <= target
+
+
+@pytest.mark.unit
+def test_analyze_batch_understands_the_menu_once_for_every_profile(monkeypatch):
+    from tests.support.g4f.client import Client as StubClient
+    import app.agent as agent_module
+    from app.agent import analyze_batch
+
+    prompts = []
+    call = agent_module._call_chat_completion
+
+    async def _counting_call(messages, *args, **kwargs):
+        prompts.append(messages[-1]["content"])
+        return await call(messages, *args, **kwargs)
+
+    async def _extract(menu_text: str) -> list[str]:
+        return ["Frango grelhado", "Moqueca de banana-da-terra"]
+
+    monkeypatch.setattr(agent_module, "_create_client", lambda: StubClient())
+    monkeypatch.setattr(agent_module, "_call_chat_completion", _counting_call)
+    monkeypatch.setattr(agent_module, "extract_foods", _extract)
+    profiles = [
+        calculate_profile(
+            weight_kg=weight,
+            height_cm=170,
+            age=30,
+            sex=Sex.FEMALE,
+            activity_level=ActivityLevel.MODERATE,
+        )
+        for weight in (60, 75, 90, 75)
+    ]
+    menu = "Frango grelhado\nMoqueca de banana-da-terra"
+
+    async def _run():
+        first = await analyze_batch(profiles, menu)
+        second = await analyze_batch(profiles[:1], menu)
+        return first, second
+
+    first, second = asyncio.run(_run())
+
+    assert len(prompts) == 1
+    assert "Moqueca de banana-da-terra" in prompts[0]
+    assert first["alimentos"] == ["Peito de frango grelhado", "Moqueca de banana-da-terra"]
+    recommendations = first["recommendations"]
+    assert len(recommendations) == 4
+    assert recommendations[1] == recommendations[3]
+    for profile, recommendation in zip(profiles, recommendations):
+        target = profile["meals"]["almoco"]["calorias"]
+        assert recommendation["origem"] == "estimativa_llm"
+        assert 0.85 * target <= recommendation["total"]["calorias"] <= target
+    assert second["recommendations"][0] == recommendations[0]
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "row",
+    [
+        {"categoria": "denso", "kcal": 0, "proteina_g": 0, "carboidrato_g": 0, "gordura_g": 0},
+        {"categoria": "proteina", "kcal": 120, "proteina_g": 0, "carboidrato_g": 0, "gordura_g": 8},
+        {"categoria": "carboidrato", "kcal": 130, "proteina_g": 2, "carboidrato_g": -1, "gordura_g": 0},
+    ],
+)
+def test_estimate_the_solver_cannot_divide_by_is_rejected(row):
+    import json
+
+    from app.agent import _parse_estimates
+    from app.parsing import JSONExtractionError
+
+    with pytest.raises(JSONExtractionError):
+        _parse_estimates(json.dumps([row]), ["Molho de pimenta"])
+
+
+@pytest.mark.unit
+def test_zero_calorie_drink_and_vegetable_estimates_reach_the_solver():
+    import json
+
+    from app.agent import _parse_estimates
+    from app.food_index import food_index
+    from app.portions import solve_portions
+
+    zero = {"kcal": 0, "proteina_g": 0, "carboidrato_g": 0, "gordura_g": 0}
+    foods = _parse_estimates(
+        json.dumps([{"categoria": "bebida", **zero}, {"categoria": "vegetal", **zero}]),
+        ["Água com gás", "Rúcula"],
+    )
+
+    recommendation = solve_portions(
+        [*foods, food_index.match("Frango grelhado")],
+        {"calorias": 500, "proteina_g": 35},
+    )
+
+    assert [item["alimento"] for item in recommendation["escolhas"]] == [
+        "Peito de frango grelhado",
+        "Rúcula",
+    ]
+
+
+@pytest.mark.unit
+def test_cancelled_job_interrupts_the_llm_call_and_the_fallback(monkeypatch):
+    import app.agent as agent_module
+    from app.jobs import JobStatus, cancel_job, create_job
+
+    first, second = _provider("First"), _provider("Second")
+    calls = []
+    interrupted = []
+    started = asyncio.Event()
+
+    async def _hanging_call(messages, model, provider, on_delta=None):
+        calls.append(provider)
+        started.set()
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            interrupted.append(provider)
+            raise
+
+    monkeypatch.setattr(agent_module, "_FALLBACK_PROVIDERS", (first, second))
+    monkeypatch.setattr(agent_module, "_call_chat_completion", _hanging_call)
+    monkeypatch.setattr(agent_module, "_LLM_RACE_MODE", "sequential")
+
+    async def _runner() -> dict:
+        await get_chat_with_fallback([{"role": "user", "content": "x"}])
+        return {}
+
+    async def _run():
+        job_id = await create_job(_runner, timeout_seconds=60)
+        await started.wait()
+        job = await cancel_job(job_id)
+        await asyncio.sleep(0.02)
+        return job
+
+    job = asyncio.run(_run())
+
+    assert job.status == JobStatus.cancelled
+    assert len(calls) == 1
+    assert interrupted == calls
+
+
+@pytest.mark.unit
+def test_unknown_race_mode_is_rejected():
+    from app.agent import _race_mode
+
+    assert _race_mode("hedged") == "hedged"
+    with pytest.raises(ValueError, match="TARA_LLM_RACE_MODE"):
+        _race_mode("paralel")
@@ -1,3 +1,4 @@
+import asyncio
 import time
 
 import pytest
@@ -15,16 +16,18 @@ def test_api_profile_and_analyze(monkeypatch):
 
     monkeypatch.setattr(agent_module, "_create_client", lambda: StubClient())
 
-    async def _run_immediately(runner, timeout_seconds: int) -> str:
+    async def _run_immediately(runner, timeout_seconds: int, key: str | None = None) -> str:
         job_id = "test-job"
         result = await runner()
         now = time.time()
-        jobs_module._jobs[job_id] = jobs_module.Job(
-            job_id=job_id,
-            status=jobs_module.JobStatus.done,
-            created_at=now,
-            updated_at=now,
-            result=result,
+        await jobs_module._store.add(
+            jobs_module.Job(
+                job_id=job_id,
+                status=jobs_module.JobStatus.done,
+                created_at=now,
+                updated_at=now,
+                result=result,
+            )
         )
         return job_id
 
@@ -61,3 +64,336 @@ def test_api_profile_and_analyze(monkeypatch):
     payload = status_response.json()
     assert payload["status"] == "done"
     assert "recommendation" in payload["result"]
+
+
+@pytest.mark.integration
+def test_analyze_events_streams_final_status():
+    import asyncio
+    import json
+
+    import app.jobs as jobs_module
+
+    now = time.time()
+    asyncio.run(
+        jobs_module._store.add(
+            jobs_module.Job(
+                job_id="sse-job",
+                status=jobs_module.JobStatus.done,
+                created_at=now,
+                updated_at=now,
+                result={"recommendation": {"escolhas": []}},
+            )
+        )
+    )
+    client = TestClient(app)
+
+    with client.stream("GET", "/api/v1/analyze/sse-job/events") as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        body = "".join(response.iter_text())
+
+    event, data = body.strip().split("\n")
+    assert event == "event: done"
+    assert json.loads(data.removeprefix("data: "))["result"] == {
+        "recommendation": {"escolhas": []}
+    }
+    assert client.get("/api/v1/analyze/missing/events").status_code == 404
+
+
+@pytest.mark.integration
+def test_profile_batch_accepts_list_and_columns():
+    client = TestClient(app)
+    people = [
+        {"weight_kg": 70, "height_cm": 170, "age": 30, "sex": "male",
+         "activity_level": "moderate"},
+        {"weight_kg": 62, "height_cm": 160, "age": 41, "sex": "female",
+         "activity_level": "light", "meals_per_day": 5, "body_fat_percent": 28},
+    ]
+
+    as_list = client.post("/api/v1/profile/batch", json={"profiles": people})
+    as_columns = client.post(
+        "/api/v1/profile/batch",
+        json={
+            "columns": {
+                "weight_kg": [70, 62],
+                "height_cm": [170, 160],
+                "age": [30, 41],
+                "sex": ["male", "female"],
+                "activity_level": ["moderate", "light"],
+                "meals_per_day": [4, 5],
+                "body_fat_percent": [None, 28],
+            }
+        },
+    )
+    single = [client.post("/api/v1/profile", json=person).json() for person in people]
+    for profile in single:
+        profile.pop("profile_id")
+
+    assert as_list.status_code == 200
+    assert as_list.json()["profiles"] == single
+    assert as_columns.json()["profiles"] == single
+    assert client.post("/api/v1/profile/batch", json={}).status_code == 422
+
+
+@pytest.mark.integration
+def test_analyze_accepts_profile_id_from_profile_endpoint(monkeypatch):
+    import app.main as main_module
+
+    captured = {}
+
+    async def _capture(runner, timeout_seconds: int, key: str | None = None) -> str:
+        captured["key"] = key
+        return "job-from-id"
+
+    monkeypatch.setattr(main_module, "create_job", _capture)
+    client = TestClient(app)
+    profile_payload = {
+        "weight_kg": 70,
+        "height_cm": 170,
+        "age": 30,
+        "sex": "male",
+        "activity_level": "moderate",
+    }
+
+    profile = client.post("/api/v1/profile", json=profile_payload).json()
+    by_id = client.post(
+        "/api/v1/analyze",
+        json={"profile_id": profile["profile_id"], "menu_text": "Arroz"},
+    )
+    id_key = captured["key"]
+    by_profile = client.post(
+        "/api/v1/analyze",
+        json={"profile": profile_payload, "menu_text": "Arroz"},
+    )
+
+    assert by_id.json() == {"job_id": "job-from-id"}
+    assert by_profile.status_code == 200
+    assert captured["key"] == id_key
+    assert client.post(
+        "/api/v1/analyze", json={"profile_id": "desconhecido", "menu_text": "Arroz"}
+    ).status_code == 404
+    assert client.post("/api/v1/analyze", json={"menu_text": "Arroz"}).status_code == 422
+
+
+@pytest.mark.integration
+def test_analyze_trace_reports_each_stage(monkeypatch):
+    from tests.support.g4f.client import Client as StubClient
+    import app.agent as agent_module
+
+    monkeypatch.setattr(agent_module, "_create_client", lambda: StubClient())
+    monkeypatch.setattr(agent_module, "_LOCAL_SOLVER_ENABLED", False)
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/api/v1/analyze",
+            json={
+                "profile": {
+                    "weight_kg": 82,
+                    "height_cm": 181,
+                    "age": 41,
+                    "sex": "male",
+                    "activity_level": "light",
+                },
+                "menu_text": "Frango grelhado\nArroz branco",
+            },
+        )
+        job_id = response.json()["job_id"]
+        for _ in range(100):
+            if client.get(f"/api/v1/analyze/{job_id}").json()["status"] == "done":
+                break
+            time.sleep(0.02)
+        trace = client.get(f"/api/v1/analyze/{job_id}/trace")
+        missing = client.get("/api/v1/analyze/nao-existe/trace")
+
+    assert trace.status_code == 200
+    spans = trace.json()["spans"]
+    names = [span["name"] for span in spans]
+    for name in ("calculate_profile", "create_job", "queue", "llm_attempt", "parse_response"):
+        assert name in names
+    attempt = spans[names.index("llm_attempt")]
+    assert attempt["attributes"]["model"]
+    assert attempt["duration_ms"] >= 0
+    assert [span["offset_ms"] for span in spans] == sorted(span["offset_ms"] for span in spans)
+    assert missing.status_code == 404
+
+
+@pytest.mark.integration
+def test_analyze_day_returns_every_meal_of_the_profile():
+    profile = {
+        "weight_kg": 70,
+        "height_cm": 170,
+        "age": 30,
+        "sex": "female",
+        "activity_level": "moderate",
+        "meals_per_day": 3,
+    }
+
+    with TestClient(app) as client:
+        invalid = client.post(
+            "/api/v1/analyze/day",
+            json={"profile": profile, "menu_text": "Arroz", "meal_types": ["ceia"]},
+        )
+        response = client.post(
+            "/api/v1/analyze/day",
+            json={"profile": profile, "menu_text": "Frango grelhado, arroz branco, brócolis"},
+        )
+        job_id = response.json()["job_id"]
+        for _ in range(100):
+            payload = client.get(f"/api/v1/analyze/{job_id}").json()
+            if payload["status"] == "done":
+                break
+            time.sleep(0.02)
+
+    assert invalid.status_code == 400
+    assert "ceia" in invalid.json()["detail"]
+    meals = payload["result"]["profile"]["meals"]
+    recommendations = payload["result"]["recommendations"]
+    assert list(recommendations) == list(meals)
+    for meal_type, recommendation in recommendations.items():
+        assert recommendation["total"]["calorias"] <= meals[meal_type]["calorias"]
+
+
+@pytest.mark.integration
+def test_analyze_batch_returns_one_recommendation_per_profile():
+    profile = {
+        "weight_kg": 70,
+        "height_cm": 170,
+        "age": 30,
+        "sex": "female",
+        "activity_level": "moderate",
+    }
+
+    with TestClient(app) as client:
+        profile_id = client.post("/api/v1/profile", json={**profile, "weight_kg": 95}).json()["profile_id"]
+        missing = client.post(
+            "/api/v1/analyze/batch",
+            json={"profile_ids": ["nao-existe"], "menu_text": "Arroz"},
+        )
+        response = client.post(
+            "/api/v1/analyze/batch",
+            json={
+                "profiles": [profile, {**profile, "weight_kg": 60}],
+                "profile_ids": [profile_id],
+                "menu_text": "Frango grelhado, arroz branco, feijão",
+                "meal_type": "jantar",
+            },
+        )
+        job_id = response.json()["job_id"]
+        for _ in range(100):
+            payload = client.get(f"/api/v1/analyze/{job_id}").json()
+            if payload["status"] == "done":
+                break
+            time.sleep(0.02)
+
+    assert missing.status_code == 404
+    result = payload["result"]
+    assert result["meal_type"] == "jantar"
+    assert [item["profile_id"] for item in result["results"]][-1] == profile_id
+    calories = [item["recommendation"]["total"]["calorias"] for item in result["results"]]
+    assert len(calories) == 3
+    assert calories[1] < calories[0] < calories[2]
+
+
+@pytest.mark.integration
+def test_delete_cancels_a_running_analysis(monkeypatch):
+    import app.agent as agent_module
+
+    async def _hanging_call(messages, model, provider, on_delta=None):
+        await asyncio.sleep(5)
+
+    monkeypatch.setattr(agent_module, "_call_chat_completion", _hanging_call)
+    monkeypatch.setattr(agent_module, "_LOCAL_SOLVER_ENABLED", False)
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/api/v1/analyze",
+            json={
+                "profile": {
+                    "weight_kg": 64,
+                    "height_cm": 158,
+                    "age": 52,
+                    "sex": "female",
+                    "activity_level": "light",
+                },
+                "menu_text": "Escondidinho de mandioca\nSalada de folhas",
+            },
+        )
+        job_id = response.json()["job_id"]
+        for _ in range(100):
+            if client.get(f"/api/v1/analyze/{job_id}").json()["status"] == "running":
+                break
+            time.sleep(0.01)
+        cancelled = client.delete(f"/api/v1/analyze/{job_id}")
+        status = client.get(f"/api/v1/analyze/{job_id}").json()
+        missing = client.delete("/api/v1/analyze/nao-existe")
+
+    assert cancelled.status_code == 200
+    assert cancelled.json()["status"] == "cancelled"
+    assert status["status"] == "cancelled"
+    assert status["result"] is None
+    assert missing.status_code == 404
+
+
+@pytest.mark.integration
+def test_oversized_menu_is_rejected_before_a_job_is_queued(monkeypatch):
+    import app.main as main_module
+
+    async def _no_job(*args, **kwargs):
+        raise AssertionError("nenhum job deveria ser criado")
+
+    monkeypatch.setattr(main_module, "create_job", _no_job)
+    profile = {
+        "weight_kg": 70,
+        "height_cm": 170,
+        "age": 30,
+        "sex": "female",
+        "activity_level": "moderate",
+    }
+    menu = "Arroz branco com feijão\n" * 1000
+
+    with TestClient(app) as client:
+        single = client.post("/api/v1/analyze", json={"profile": profile, "menu_text": menu})
+        day = client.post("/api/v1/analyze/day", json={"profile": profile, "menu_text": menu})
+
+    for response in (single, day):
+        assert response.status_code == 400
+        assert "Cardápio muito longo" in response.json()["detail"]
+
+
+@pytest.mark.integration
+def test_answers_without_llm_skip_the_full_queue(monkeypatch):
+    import app.main as main_module
+    from app.scheduler import QueueFullError
+
+    async def _full_queue(*args, **kwargs):
+        raise QueueFullError(retry_after=5)
+
+    monkeypatch.setattr(main_module, "create_job", _full_queue)
+    profile = {
+        "weight_kg": 70,
+        "height_cm": 170,
+        "age": 30,
+        "sex": "female",
+        "activity_level": "moderate",
+    }
+    menu = "Frango grelhado, arroz branco, feijão"
+
+    with TestClient(app) as client:
+        started = [
+            client.post("/api/v1/analyze", json={"profile": profile, "menu_text": menu}),
+            client.post("/api/v1/analyze/day", json={"profile": profile, "menu_text": menu}),
+            client.post("/api/v1/analyze/batch", json={"profiles": [profile], "menu_text": menu}),
+        ]
+        statuses = [
+            client.get(f"/api/v1/analyze/{response.json()['job_id']}").json() for response in started
+        ]
+        llm_bound = client.post(
+            "/api/v1/analyze",
+            json={"profile": profile, "menu_text": "Moqueca de siri\nPirão"},
+        )
+
+    assert [response.status_code for response in started] == [200, 200, 200]
+    assert [status["status"] for status in statuses] == ["done", "done", "done"]
+    assert statuses[0]["result"]["recommendation"]["origem"] == "tabela_local"
+    assert statuses[2]["result"]["results"][0]["recommendation"]["origem"] == "tabela_local"
+    assert llm_bound.status_code == 429
@@ -0,0 +1,51 @@
+import pytest
+
+from benchmarks.suite import compare, run_suite
+
+
+@pytest.mark.unit
+def test_quick_suite_reports_per_op_timings():
+    report = run_suite(quick=True, rounds=1, only="prompts")
+
+    assert set(report["results"]) == {
+        "prompts.build_user_prompt.cached",
+        "prompts.build_user_prompt.cold",
+    }
+    assert all(result["median_us"] > 0 for result in report["results"].values())
+
+
+@pytest.mark.unit
+def test_compare_flags_only_cases_beyond_tolerance():
+    baseline = {"results": {"a": {"median_us": 10.0}, "b": {"median_us": 10.0}}}
+    report = {"results": {"a": {"median_us": 12.0}, "b": {"median_us": 13.0}, "c": {"median_us": 1.0}}}
+
+    regressions = compare(report, baseline, tolerance=0.25)
+
+    assert [regression["name"] for regression in regressions] == ["b"]
+    assert regressions[0]["ratio"] == 1.3
+
+
+@pytest.mark.unit
+def test_compare_scales_the_baseline_by_machine_speed():
+    baseline = {"calibration_us": 100.0, "results": {"a": {"median_us": 10.0}}}
+    slower = {"calibration_us": 200.0, "results": {"a": {"median_us": 22.0}}}
+    regressed = {"calibration_us": 200.0, "results": {"a": {"median_us": 30.0}}}
+
+    assert compare(slower, baseline) == []
+    assert [regression["name"] for regression in compare(regressed, baseline)] == ["a"]
+
+
+@pytest.mark.unit
+def test_compare_flags_per_op_cost_growing_with_store_size():
+    report = {
+        "results": {
+            "jobs.memory_store.over_budget_10k": {"median_us": 10.0},
+            "jobs.memory_store.over_budget_100k": {"median_us": 45.0},
+        }
+    }
+
+    regressions = compare(report, {"results": {}})
+
+    assert [regression["name"] for regression in regressions] == [
+        "jobs.memory_store.over_budget_100k (escala)"
+    ]
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from app.cache import ResultCache, analysis_key
+from app.calculator import ActivityLevel, Sex, calculate_profile
+
+
+def _profile(weight_kg: float = 70) -> dict:
+    return calculate_profile(
+        weight_kg=weight_kg,
+        height_cm=170,
+        age=30,
+        sex=Sex.MALE,
+        activity_level=ActivityLevel.MODERATE,
+    )
+
+
+@pytest.mark.unit
+def test_analysis_key_normalizes_menu_and_tracks_meal_targets():
+    profile = _profile()
+
+    key = analysis_key(profile, "Frango  grelhado\n\nArroz branco", "almoco")
+
+    assert key == analysis_key(profile, " frango grelhado\nARROZ branco ", "almoco")
+    assert key != analysis_key(profile, "Frango grelhado\nArroz branco", "jantar")
+    assert key != analysis_key(_profile(90), "Frango grelhado\nArroz branco", "almoco")
+
+
+@pytest.mark.unit
+def test_memory_tier_evicts_lru_and_expires(monkeypatch):
+    import app.cache as cache_module
+
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+    cache = ResultCache(max_entries=2, ttl_seconds=10)
+
+    async def _run():
+        await cache.set("a", {"v": 1})
+        await cache.set("b", {"v": 2})
+        assert await cache.get("a") == {"v": 1}
+        await cache.set("c", {"v": 3})
+        assert await cache.get("b") is None
+        now[0] += 11
+        assert await cache.get("a") is None
+
+    asyncio.run(_run())
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+@pytest.mark.unit
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+
+    asyncio.run(ResultCache(path=path).set("k", {"escolhas": []}))
+    restarted = ResultCache(path=path)
+
+    assert asyncio.run(restarted.get("k")) == {"escolhas": []}
+    assert restarted.stats()["disk_hits"] == 1
+
+
+@pytest.mark.unit
+def test_analyze_menu_answers_repeated_request_from_cache(monkeypatch):
+    from tests.support.g4f.client import Client as StubClient
+    import app.agent as agent_module
+
+    calls = []
+
+    def _client():
+        calls.append(1)
+        return StubClient()
+
+    monkeypatch.setattr(agent_module, "_create_client", _client)
+    monkeypatch.setattr(agent_module, "_LOCAL_SOLVER_ENABLED", False)
+    profile = _profile()
+
+    first = asyncio.run(agent_module.analyze_menu(profile, "Frango\nArroz", "almoco"))
+    second = asyncio.run(agent_module.analyze_menu(profile, "frango\narroz", "almoco"))
+
+    assert first == second
+    assert len(calls) == 1
@@ -1,6 +1,12 @@
 import pytest
 
-from app.calculator import ActivityLevel, calculate_macros
+from app.calculator import (
+    ActivityLevel,
+    Sex,
+    calculate_macros,
+    calculate_profile,
+    calculate_profiles_batch,
+)
 
 
 @pytest.mark.unit
@@ -26,3 +32,131 @@ def test_calculate_macros_caps_carbs_when_protein_is_high():
     macros = calculate_macros(target_calories, weight_kg, ActivityLevel.VERY_ACTIVE)
 
     assert macros["carbs_calories"] == 0
+
+
+@pytest.mark.unit
+def test_calculate_profiles_batch_matches_scalar_profile():
+    rows = [
+        dict(weight_kg=70, height_cm=170, age=30, sex=Sex.MALE,
+             activity_level=ActivityLevel.MODERATE, deficit_percent=0.2, meals_per_day=4),
+        dict(weight_kg=58.4, height_cm=161.5, age=45, sex=Sex.FEMALE,
+             activity_level=ActivityLevel.SEDENTARY, deficit_percent=0.25, meals_per_day=6,
+             body_fat_percent=31.5),
+        dict(weight_kg=100, height_cm=150, age=70, sex=Sex.FEMALE,
+             activity_level=ActivityLevel.VERY_ACTIVE, deficit_percent=0.5, meals_per_day=3,
+             lean_mass_kg=61.2),
+        dict(weight_kg=88.8, height_cm=190, age=22, sex=Sex.MALE,
+             activity_level=ActivityLevel.ACTIVE, deficit_percent=0.1, meals_per_day=7),
+    ]
+    columns = {
+        name: [row.get(name) for row in rows]
+        for name in (
+            "weight_kg", "height_cm", "age", "sex", "activity_level",
+            "deficit_percent", "meals_per_day", "body_fat_percent", "lean_mass_kg",
+        )
+    }
+
+    batch = calculate_profiles_batch(**columns)
+
+    assert batch == [calculate_profile(**row) for row in rows]
+
+
+@pytest.mark.unit
+def test_calculate_profiles_batch_rejects_ragged_columns():
+    with pytest.raises(ValueError):
+        calculate_profiles_batch(
+            weight_kg=[70, 80],
+            height_cm=[170],
+            age=[30, 40],
+            sex=[Sex.MALE, Sex.MALE],
+            activity_level=[ActivityLevel.LIGHT, ActivityLevel.LIGHT],
+        )
+
+
+@pytest.mark.unit
+def test_profile_cache_is_content_addressed_and_memoized(monkeypatch):
+    import app.profiles as profiles_module
+    from app.profiles import ProfileCache
+
+    calls = []
+
+    def _counting(**params):
+        calls.append(params)
+        return calculate_profile(**params)
+
+    monkeypatch.setattr(profiles_module, "calculate_profile", _counting)
+    cache = ProfileCache(max_entries=10)
+    params = dict(
+        weight_kg=70.0, height_cm=170.0, age=30, sex=Sex.MALE,
+        activity_level=ActivityLevel.MODERATE, deficit_percent=0.2, meals_per_day=4,
+        body_fat_percent=None, lean_mass_kg=None,
+    )
+
+    first_id, first = cache.get_or_compute(params)
+    second_id, second = cache.get_or_compute(dict(reversed(list(params.items()))))
+    other_id, _ = cache.get_or_compute({**params, "age": 31})
+
+    assert first_id == second_id != other_id
+    assert first is second
+    assert cache.get(first_id) is first
+    assert len(calls) == 2
+
+
+@pytest.mark.unit
+def test_profile_id_resolves_in_another_worker_through_the_shared_store(tmp_path):
+    import asyncio
+
+    from app.profiles import ProfileCache, profile_store
+
+    path = str(tmp_path / "cache.sqlite3")
+    creator = ProfileCache(store=profile_store(path))
+    other = ProfileCache(store=profile_store(path))
+    params = dict(
+        weight_kg=82.0, height_cm=181.0, age=41, sex=Sex.MALE,
+        activity_level=ActivityLevel.LIGHT, deficit_percent=0.2, meals_per_day=4,
+        body_fat_percent=None, lean_mass_kg=None,
+    )
+
+    async def _run():
+        profile_id, profile = await creator.resolve(params)
+        return profile_id, profile, await other.lookup(profile_id), await other.lookup("nao-existe")
+
+    profile_id, profile, shared, missing = asyncio.run(_run())
+
+    assert shared == profile
+    assert other.get(profile_id) == profile
+    assert missing is None
+
+
+@pytest.mark.unit
+def test_analysis_cache_pruning_keeps_stored_profiles(tmp_path):
+    import asyncio
+    import sqlite3
+
+    from app.cache import ResultCache
+    from app.profiles import ProfileCache, profile_store
+
+    path = str(tmp_path / "cache.sqlite3")
+    analyses = ResultCache(path=path, ttl_seconds=6 * 60 * 60)
+    params = dict(
+        weight_kg=64.0, height_cm=165.0, age=29, sex=Sex.FEMALE,
+        activity_level=ActivityLevel.MODERATE, deficit_percent=0.2, meals_per_day=3,
+        body_fat_percent=None, lean_mass_kg=None,
+    )
+
+    async def _run():
+        profile_id, profile = await ProfileCache(store=profile_store(path)).resolve(params)
+        with sqlite3.connect(path) as conn:
+            conn.execute("UPDATE profiles SET created_at = created_at - 7 * 60 * 60")
+        await analyses.set("velha", {"escolhas": []})
+        with sqlite3.connect(path) as conn:
+            conn.execute("UPDATE results SET created_at = created_at - 7 * 60 * 60")
+        for index in range(100):
+            await analyses.set(f"analise-{index}", {"escolhas": []})
+        restarted = ProfileCache(store=profile_store(path))
+        return profile, await restarted.lookup(profile_id), await ResultCache(path=path).get("velha")
+
+    profile, looked_up, pruned = asyncio.run(_run())
+
+    assert looked_up == profile
+    assert pruned is None
@@ -0,0 +1,56 @@
+import pytest
+
+from app.food_index import FoodIndex, canonical_food_name, food_index
+from app.foods import Food, FoodTable
+
+
+@pytest.mark.unit
+def test_canonical_name_folds_accents_abbreviations_and_plurals():
+    assert canonical_food_name("Frango grel.") == "frango grelhado"
+    assert canonical_food_name("Filés de Frango Grelhados") == "file frango grelhado"
+    assert canonical_food_name("Pães") == "pao"
+
+
+@pytest.mark.unit
+def test_match_handles_menu_spellings():
+    expected = "Peito de frango grelhado"
+
+    for name in ("frango grel.", "Filé de frango grelhado", "FILES DE FRANGO GRELHADOS", "frango grelhadoo"):
+        assert food_index.match(name).name == expected
+    assert food_index.match("Feijão Preto").name == "Feijão preto cozido"
+    assert food_index.match("moqueca de siri") is None
+
+
+@pytest.mark.unit
+def test_index_scales_and_memoizes_lookups():
+    foods = [
+        Food(f"Prato {i} especial", "proteina", 100, 10, 5, 2, (f"receita numero {i}",))
+        for i in range(20000)
+    ]
+    index = FoodIndex(FoodTable(foods))
+
+    assert len(index) == 40000
+    assert index.match("receita numero 12345").name == "Prato 12345 especial"
+    assert index.match("receita numero 12345").name == "Prato 12345 especial"
+    assert index.match.cache_info().hits == 1
+    assert index.search("prato 777 especial", limit=1)[0][1] == 1.0
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "name",
+    ["Salada de frutas", "Salada de batata", "Suco de uva", "Arroz à grega", "Bife acebolado"],
+)
+def test_near_miss_of_another_food_is_left_for_the_estimate(name):
+    assert food_index.search(name, limit=1)
+    assert food_index.match(name) is None
+
+
+@pytest.mark.unit
+def test_partial_names_still_match_when_every_word_is_in_the_item():
+    assert food_index.match("Frango").name == "Peito de frango grelhado"
+    assert food_index.match("frango grelhadoo").name == "Peito de frango grelhado"
+    assert food_index.match_all(["Salada de frutas", "Salada verde"]) == [
+        None,
+        food_index.match("Salada de alface"),
+    ]
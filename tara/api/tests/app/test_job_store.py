@@ -0,0 +1,171 @@
+import asyncio
+import time
+
+import pytest
+
+from app.job_store import InMemoryJobStore, Job, JobStatus, SqliteJobStore
+
+
+def _job(job_id: str, created_at: float | None = None) -> Job:
+    now = created_at if created_at is not None else time.time()
+    return Job(job_id=job_id, status=JobStatus.pending, created_at=now, updated_at=now)
+
+
+@pytest.mark.unit
+def test_sqlite_store_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    writer = SqliteJobStore(path, ttl_seconds=60)
+    reader = SqliteJobStore(path, ttl_seconds=60)
+
+    async def _run():
+        await writer.add(_job("abc"))
+        await writer.update(
+            "abc",
+            status=JobStatus.done,
+            updated_at=time.time(),
+            result={"recommendation": {"escolhas": []}},
+            error=None,
+        )
+        job = await reader.get("abc")
+        await writer.close()
+        await reader.close()
+        return job
+
+    job = asyncio.run(_run())
+
+    assert job.status == JobStatus.done
+    assert job.result == {"recommendation": {"escolhas": []}}
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_store_hides_expired_jobs(tmp_path, backend):
+    if backend == "sqlite":
+        store = SqliteJobStore(str(tmp_path / "jobs.sqlite3"), ttl_seconds=60)
+    else:
+        store = InMemoryJobStore(ttl_seconds=60)
+
+    async def _run():
+        await store.add(_job("old", created_at=time.time() - 120))
+        await store.add(_job("new"))
+        return await store.get("old"), await store.get("new")
+
+    old, new = asyncio.run(_run())
+
+    assert old is None
+    assert new.job_id == "new"
+
+
+@pytest.mark.unit
+def test_memory_store_reaps_in_expiry_order_without_scanning():
+    store = InMemoryJobStore(ttl_seconds=60)
+
+    async def _run():
+        await store.add(_job("a", created_at=1000))
+        await store.add(_job("b", created_at=1010))
+        await store.add(_job("c", created_at=1020))
+        return await store.reap(1075)
+
+    assert asyncio.run(_run()) == 2
+    assert list(store._jobs) == ["c"]
+
+
+@pytest.mark.unit
+def test_memory_store_evicts_least_recent_finished_jobs_over_budget():
+    store = InMemoryJobStore(ttl_seconds=600, max_bytes=2500)
+    result = {"recommendation": {"dica": "x" * 400}}
+
+    async def _run():
+        for job_id in ("a", "b", "c", "running"):
+            await store.add(_job(job_id))
+        for job_id in ("a", "b", "c"):
+            await store.update(job_id, status=JobStatus.done, result=result)
+        await store.get("a")
+        for job_id in ("d", "e"):
+            await store.add(_job(job_id))
+            await store.update(job_id, status=JobStatus.done, result=result)
+        return await store.get("a")
+
+    job_a = asyncio.run(_run())
+
+    assert store.total_bytes <= store.max_bytes
+    assert "running" in store._jobs
+    assert "b" not in store._jobs
+    assert job_a.result == result
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_store_keeps_trace_of_finished_job(tmp_path, backend):
+    import sqlite3
+
+    path = str(tmp_path / "jobs.sqlite3")
+    if backend == "sqlite":
+        # Arquivo criado antes da coluna `trace`.
+        legacy = sqlite3.connect(path)
+        legacy.execute(
+            "CREATE TABLE jobs (job_id TEXT PRIMARY KEY, status TEXT NOT NULL, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL, "
+            "result TEXT, error TEXT, started_at REAL)"
+        )
+        legacy.commit()
+        legacy.close()
+        store = SqliteJobStore(path, ttl_seconds=60)
+    else:
+        store = InMemoryJobStore(ttl_seconds=60)
+    trace = [{"name": "llm_attempt", "offset_ms": 1.5, "duration_ms": 900.0}]
+
+    async def _run():
+        await store.add(_job("abc"))
+        await store.update("abc", status=JobStatus.done, trace=trace)
+        job = await store.get("abc")
+        await store.close()
+        return job
+
+    job = asyncio.run(_run())
+
+    assert job.trace == trace
+
+
+@pytest.mark.unit
+def test_memory_store_over_budget_only_tracks_finished_jobs_for_eviction():
+    store = InMemoryJobStore(ttl_seconds=600, max_bytes=500 * 256 + 3000)
+    result = {"recommendation": {"dica": "x" * 2000}}
+
+    async def _run():
+        for index in range(500):
+            await store.add(_job(f"running-{index}"))
+        for index in range(50):
+            await store.add(_job(f"done-{index}"))
+            await store.update(f"done-{index}", status=JobStatus.done, result=result)
+
+    asyncio.run(_run())
+
+    assert store.total_bytes <= store.max_bytes
+    assert all(f"running-{index}" in store._jobs for index in range(500))
+    assert list(store._finished) == [job_id for job_id in store._jobs if job_id.startswith("done-")]
+    assert "done-0" not in store._jobs
+    assert "done-49" in store._jobs
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_finished_job_is_not_overwritten(tmp_path, backend):
+    if backend == "sqlite":
+        store = SqliteJobStore(str(tmp_path / "jobs.sqlite3"), ttl_seconds=60)
+    else:
+        store = InMemoryJobStore(ttl_seconds=60)
+
+    async def _run():
+        await store.add(_job("abc"))
+        cancelled = await store.update("abc", status=JobStatus.cancelled, error="Análise cancelada.")
+        late = await store.update("abc", status=JobStatus.done, result={"ok": True}, error=None)
+        job = await store.get("abc")
+        await store.close()
+        return cancelled, late, job
+
+    cancelled, late, job = asyncio.run(_run())
+
+    assert (cancelled, late) == (True, False)
+    assert job.status == JobStatus.cancelled
+    assert job.result is None
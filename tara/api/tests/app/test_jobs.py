@@ -0,0 +1,256 @@
+import asyncio
+
+import pytest
+
+import app.jobs as jobs_module
+from app.jobs import JobStatus, create_job, get_job
+
+
+@pytest.mark.unit
+def test_identical_jobs_share_one_execution():
+    calls = []
+
+    async def _runner() -> dict:
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"value": len(calls)}
+
+    async def _run():
+        first = await create_job(_runner, timeout_seconds=5, key="menu")
+        second = await create_job(_runner, timeout_seconds=5, key="menu")
+        other = await create_job(_runner, timeout_seconds=5, key="other")
+        await asyncio.sleep(0.05)
+        return [await get_job(job_id) for job_id in (first, second, other)]
+
+    first, second, other = asyncio.run(_run())
+
+    assert len(calls) == 2
+    assert first.job_id != second.job_id
+    assert first.status == second.status == JobStatus.done
+    assert first.result == second.result
+    assert other.status == JobStatus.done
+    assert jobs_module._inflight == {}
+
+
+@pytest.mark.unit
+def test_shared_execution_failure_reaches_every_job():
+    async def _runner() -> dict:
+        await asyncio.sleep(0.01)
+        raise RuntimeError("provider down")
+
+    async def _run():
+        ids = [await create_job(_runner, timeout_seconds=5, key="menu") for _ in range(3)]
+        await asyncio.sleep(0.05)
+        return [await get_job(job_id) for job_id in ids]
+
+    jobs = asyncio.run(_run())
+
+    assert {job.status for job in jobs} == {JobStatus.error}
+    assert {job.error for job in jobs} == {"provider down"}
+
+
+@pytest.mark.unit
+def test_pending_job_reports_queue_position_and_wait(monkeypatch):
+    from app.scheduler import JobScheduler
+
+    monkeypatch.setattr(jobs_module, "_scheduler", JobScheduler(workers=1, queue_size=10))
+
+    async def _runner() -> dict:
+        await asyncio.sleep(0.02)
+        return {}
+
+    async def _run():
+        first = await create_job(_runner, timeout_seconds=5)
+        second = await create_job(_runner, timeout_seconds=5)
+        await asyncio.sleep(0.005)
+        running, queued = await get_job(first), await get_job(second)
+        await asyncio.sleep(0.06)
+        finished = await get_job(second)
+        await jobs_module._scheduler.close()
+        return running, queued, finished
+
+    running, queued, finished = asyncio.run(_run())
+
+    assert running.status == JobStatus.running
+    assert queued.status == JobStatus.pending
+    assert queued.queue_position == 1
+    assert finished.status == JobStatus.done
+    assert finished.started_at is not None
+    assert finished.wait_seconds(0) >= 0.01
+
+
+@pytest.mark.unit
+def test_watch_job_pushes_each_transition():
+    from app.jobs import watch_job
+
+    async def _runner() -> dict:
+        await asyncio.sleep(0.01)
+        return {"ok": True}
+
+    async def _run():
+        job_id = await create_job(_runner, timeout_seconds=5)
+        return [job.status async for job in watch_job(job_id, poll_seconds=5) if job]
+
+    assert asyncio.run(_run()) == [JobStatus.pending, JobStatus.running, JobStatus.done]
+
+
+@pytest.mark.unit
+def test_running_job_exposes_partial_items_to_every_follower():
+    from app.streaming import partial_results
+
+    release = asyncio.Event()
+
+    async def _runner() -> dict:
+        partial_results.get()([{"alimento": "Arroz"}])
+        await release.wait()
+        return {"done": True}
+
+    async def _run():
+        first = await create_job(_runner, timeout_seconds=5, key="menu")
+        second = await create_job(_runner, timeout_seconds=5, key="menu")
+        await asyncio.sleep(0.01)
+        running = [await get_job(job_id) for job_id in (first, second)]
+        release.set()
+        await asyncio.sleep(0.01)
+        return running, await get_job(first)
+
+    running, finished = asyncio.run(_run())
+
+    assert [job.partial for job in running] == [[{"alimento": "Arroz"}]] * 2
+    assert finished.status == JobStatus.done
+    assert finished.partial is None
+    assert partial_results.get() is None
+
+
+@pytest.mark.unit
+def test_cancel_job_stops_its_execution_and_keeps_the_worker():
+    from app.jobs import cancel_job
+
+    started = asyncio.Event()
+    interrupted = []
+
+    async def _stuck() -> dict:
+        started.set()
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            interrupted.append(True)
+            raise
+        return {}
+
+    async def _quick() -> dict:
+        return {"ok": True}
+
+    async def _run():
+        job_id = await create_job(_stuck, timeout_seconds=10, key="menu")
+        await started.wait()
+        cancelled = await cancel_job(job_id)
+        again = await cancel_job(job_id)
+        after = await create_job(_quick, timeout_seconds=5, key="menu")
+        await asyncio.sleep(0.02)
+        return cancelled, again, await get_job(after)
+
+    cancelled, again, after = asyncio.run(_run())
+
+    assert cancelled.status == JobStatus.cancelled
+    assert cancelled.error == "Análise cancelada."
+    assert again.status == JobStatus.cancelled
+    assert interrupted == [True]
+    assert after.status == JobStatus.done
+    assert after.result == {"ok": True}
+    assert jobs_module._inflight == {}
+
+
+@pytest.mark.unit
+def test_shared_execution_survives_until_every_job_is_cancelled():
+    from app.jobs import cancel_job
+
+    release = asyncio.Event()
+    calls = []
+
+    async def _runner() -> dict:
+        calls.append(1)
+        await release.wait()
+        return {"value": 1}
+
+    async def _run():
+        first = await create_job(_runner, timeout_seconds=5, key="menu")
+        second = await create_job(_runner, timeout_seconds=5, key="menu")
+        await asyncio.sleep(0.01)
+        cancelled = await cancel_job(first)
+        release.set()
+        await asyncio.sleep(0.01)
+        return cancelled, await get_job(second)
+
+    cancelled, survivor = asyncio.run(_run())
+
+    assert len(calls) == 1
+    assert cancelled.status == JobStatus.cancelled
+    assert survivor.status == JobStatus.done
+    assert survivor.result == {"value": 1}
+
+
+@pytest.mark.unit
+def test_cancelled_pending_job_never_runs(monkeypatch):
+    from app.jobs import cancel_job, watch_job
+    from app.scheduler import JobScheduler
+
+    monkeypatch.setattr(jobs_module, "_scheduler", JobScheduler(workers=1, queue_size=10))
+    calls = []
+
+    async def _runner() -> dict:
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return {}
+
+    async def _run():
+        await create_job(_runner, timeout_seconds=5)
+        queued = await create_job(_runner, timeout_seconds=5)
+        await asyncio.sleep(0.005)
+        await cancel_job(queued)
+        statuses = [job.status async for job in watch_job(queued) if job]
+        await asyncio.sleep(0.04)
+        await jobs_module._scheduler.close()
+        return statuses
+
+    assert asyncio.run(_run()) == [JobStatus.cancelled]
+    assert len(calls) == 1
+
+
+@pytest.mark.unit
+def test_job_cancelled_by_another_worker_stops_here(tmp_path, monkeypatch):
+    from app.job_store import SqliteJobStore
+
+    path = str(tmp_path / "jobs.sqlite3")
+    monkeypatch.setattr(jobs_module, "_store", SqliteJobStore(path, ttl_seconds=60))
+    monkeypatch.setattr(jobs_module, "_WATCH_POLL_SECONDS", 0.01)
+    started = asyncio.Event()
+    interrupted = []
+
+    async def _stuck() -> dict:
+        started.set()
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            interrupted.append(True)
+            raise
+        return {}
+
+    async def _run():
+        other_worker = SqliteJobStore(path, ttl_seconds=60)
+        job_id = await create_job(_stuck, timeout_seconds=10, key="menu")
+        await started.wait()
+        await other_worker.update(job_id, status=JobStatus.cancelled, error="Análise cancelada.")
+        await asyncio.sleep(0.1)
+        job = await get_job(job_id)
+        await other_worker.close()
+        await jobs_module._store.close()
+        return job
+
+    job = asyncio.run(_run())
+
+    assert job.status == JobStatus.cancelled
+    assert job.error == "Análise cancelada."
+    assert interrupted == [True]
+    assert jobs_module._inflight == {}
+    assert jobs_module._followers == {}
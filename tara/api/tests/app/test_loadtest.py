@@ -0,0 +1,79 @@
+import asyncio
+import random
+
+import pytest
+
+from loadtest.generator import percentile, run_load
+from loadtest.simulator import SimulatedClient, SimulatedProviderError, SimulationConfig
+
+
+@pytest.mark.unit
+def test_scenario_layers_model_provider_and_pair_overrides():
+    config = SimulationConfig.from_dict(
+        {
+            "default": {"error_rate": 0.1},
+            "models": {"gpt-4o": {"error_rate": 0.5}},
+            "providers": {"Qwen": {"timeout_rate": 0.2}},
+            "overrides": {"gpt-4o/Qwen": {"latency": {"type": "fixed", "seconds": 3}}},
+        }
+    )
+
+    behavior = config.behavior("gpt-4o", "Qwen")
+
+    assert behavior.error_rate == 0.5
+    assert behavior.timeout_rate == 0.2
+    assert behavior.latency == {"type": "fixed", "seconds": 3}
+    assert config.behavior("gpt-5.2", "Chatai").error_rate == 0.1
+
+
+@pytest.mark.unit
+def test_simulated_client_injects_errors():
+    config = SimulationConfig.from_dict(
+        {"default": {"latency": {"type": "fixed", "seconds": 0}, "error_rate": 1.0}}
+    )
+    client = SimulatedClient(config, random.Random(0))
+
+    with pytest.raises(SimulatedProviderError):
+        asyncio.run(client.chat.completions.create(model="gpt-4o", messages=[]))
+
+
+@pytest.mark.integration
+def test_load_run_reports_throughput_latency_and_error_mix(monkeypatch):
+    import app.agent as agent_module
+
+    monkeypatch.setattr(agent_module, "_FALLBACK_MODELS", ("gpt-4o",))
+    config = SimulationConfig.from_dict(
+        {
+            "seed": 3,
+            "default": {
+                "latency": {"type": "uniform", "low": 0.001, "high": 0.01},
+                "error_rate": 1.0,
+            },
+            "models": {"gpt-4o": {"error_rate": 0.0}},
+        }
+    )
+
+    report = asyncio.run(run_load(config, rps=50, duration_seconds=0.2, poll_interval=0.01))
+
+    assert report.requests == 10
+    assert report.ok == 10
+    assert report.errors == {}
+    assert 0 < report.latency_seconds["p50"] <= report.latency_seconds["p99"]
+    assert report.llm_calls >= 10
+    assert percentile([1, 2, 3, 4], 0.5) == 2
+
+
+@pytest.mark.integration
+def test_load_run_groups_failures_by_kind(monkeypatch):
+    import app.agent as agent_module
+
+    monkeypatch.setattr(agent_module, "_FALLBACK_MODELS", ("gpt-4o",))
+    config = SimulationConfig.from_dict(
+        {"default": {"latency": {"type": "fixed", "seconds": 0}, "error_rate": 1.0}}
+    )
+
+    report = asyncio.run(run_load(config, rps=50, duration_seconds=0.1, poll_interval=0.01))
+
+    assert report.ok == 0
+    assert sum(report.errors.values()) == 5
+    assert "job_error: Falha simulada do provider" in report.errors
@@ -0,0 +1,94 @@
+import asyncio
+import io
+import json
+import logging
+
+import pytest
+
+from app import logger as logger_module
+from app.logger import configure_logging, get_logger, job_context, log_payload
+
+
+@pytest.fixture
+def stream():
+    output = io.StringIO()
+    yield output
+    configure_logging()
+
+
+def _lines(output: io.StringIO) -> list[str]:
+    return [line for line in output.getvalue().splitlines() if line]
+
+
+@pytest.mark.unit
+def test_json_lines_carry_job_id_and_are_written_once(stream):
+    configure_logging(log_format="json", use_queue=True, stream=stream)
+    log = get_logger("tara.test")
+
+    async def run():
+        job_context.set("job-1")
+        log.info("dentro do job %s", 1)
+
+    asyncio.run(run())
+    log.warning("fora do job")
+    logger_module.stop_logging()
+
+    entries = [json.loads(line) for line in _lines(stream)]
+    assert [entry["message"] for entry in entries] == ["dentro do job 1", "fora do job"]
+    assert entries[0]["job_id"] == "job-1"
+    assert entries[0]["logger"] == "tara.test"
+    assert entries[1]["job_id"] is None
+    assert entries[1]["level"] == "WARNING"
+
+
+@pytest.mark.unit
+def test_payload_is_disabled_by_default_and_never_built(monkeypatch, stream):
+    configure_logging(use_queue=False, stream=stream)
+    monkeypatch.setattr(logger_module, "_LOG_PAYLOADS", False)
+    calls = []
+
+    emitted = log_payload(get_logger("tara.test"), "prompt", lambda: calls.append(1) or "x")
+
+    assert emitted is False
+    assert calls == []
+    assert _lines(stream) == []
+
+
+@pytest.mark.unit
+def test_payload_is_built_lazily_and_truncated(monkeypatch, stream):
+    configure_logging(use_queue=False, stream=stream)
+    monkeypatch.setattr(logger_module, "_LOG_PAYLOADS", True)
+    monkeypatch.setattr(logger_module, "_PAYLOAD_MAX_CHARS", 10)
+    log = get_logger("tara.test")
+    calls = []
+
+    def build():
+        calls.append(1)
+        return "a" * 25
+
+    log.setLevel(logging.WARNING)
+    try:
+        assert log_payload(log, "prompt", build) is False
+    finally:
+        log.setLevel(logging.NOTSET)
+    assert calls == []
+
+    assert log_payload(log, "prompt", build) is True
+    assert calls == [1]
+    assert _lines(stream)[-1].endswith("prompt: aaaaaaaaaa… (+15 caracteres)")
+
+
+@pytest.mark.unit
+def test_payload_sampling_keeps_or_drops_whole_jobs():
+    kept = 0
+    for index in range(200):
+        token = job_context.set(f"job-{index}")
+        try:
+            first = logger_module._sampled(0.5)
+            assert all(logger_module._sampled(0.5) == first for _ in range(5))
+            kept += first
+        finally:
+            job_context.reset(token)
+
+    assert 50 < kept < 150
+    assert logger_module._sampled(0.0) is False
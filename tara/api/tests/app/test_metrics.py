@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import metrics
+from app.metrics import Counter, Histogram
+
+
+@pytest.mark.unit
+def test_text_exposition_for_counters_and_histograms():
+    counter = Counter("calls_total", "Chamadas.", ("model",))
+    histogram = Histogram("latency_seconds", "Latência.", ("model",), buckets=(0.5, 1))
+
+    counter.inc('gpt "4o"')
+    counter.inc('gpt "4o"', amount=2)
+    for value in (0.2, 0.5, 3):
+        histogram.observe(value, "a")
+
+    assert counter.render().splitlines() == [
+        "# HELP calls_total Chamadas.",
+        "# TYPE calls_total counter",
+        'calls_total{model="gpt \\"4o\\""} 3',
+    ]
+    assert histogram.samples() == [
+        'latency_seconds_bucket{model="a",le="0.5"} 2',
+        'latency_seconds_bucket{model="a",le="1"} 2',
+        'latency_seconds_bucket{model="a",le="+Inf"} 3',
+        'latency_seconds_sum{model="a"} 3.7',
+        'latency_seconds_count{model="a"} 3',
+    ]
+
+
+@pytest.mark.unit
+def test_llm_calls_record_latency_failures_and_attempts(monkeypatch):
+    import app.agent as agent_module
+
+    good, bad = type("Good", (), {}), type("Bad", (), {})
+
+    async def _fake_call(messages, model, provider, on_delta=None):
+        if provider is bad:
+            raise RuntimeError("down")
+        return "ok"
+
+    monkeypatch.setattr(agent_module, "_FALLBACK_PROVIDERS", (bad, good))
+    monkeypatch.setattr(agent_module, "_call_with_timeout", _fake_call)
+
+    assert asyncio.run(agent_module.get_chat_with_fallback([])) == "ok"
+
+    model = agent_module._FALLBACK_MODELS[0]
+    assert metrics.llm_failures.value(model, "Bad", "RuntimeError") == 1
+    assert metrics.llm_latency.count(model, "Good") == 1
+    assert metrics.llm_attempts.count() == 1
+    assert 'tara_llm_attempts_per_request_bucket{le="2"} 1' in metrics.llm_attempts.samples()
+
+
+@pytest.mark.unit
+def test_jobs_record_counts_and_durations():
+    from app.jobs import create_job, get_job
+
+    async def _runner() -> dict:
+        return {}
+
+    async def _run():
+        job_id = await create_job(_runner, timeout_seconds=5)
+        await asyncio.sleep(0.01)
+        return await get_job(job_id)
+
+    assert asyncio.run(_run()).status == "done"
+    assert metrics.jobs_created.value() == 1
+    assert metrics.jobs_finished.value("done") == 1
+    assert metrics.job_queue_seconds.count() == 1
+    assert metrics.job_run_seconds.count() == 1
+
+
+@pytest.mark.unit
+def test_loop_monitor_observes_lag():
+    async def _run():
+        metrics.start_loop_monitor(interval=0.001)
+        await asyncio.sleep(0.02)
+        await metrics.stop_loop_monitor()
+
+    asyncio.run(_run())
+
+    assert metrics.loop_lag.count() > 0
+
+
+@pytest.mark.integration
+def test_metrics_endpoint_exposes_all_collectors():
+    from app.main import app
+
+    response = TestClient(app).get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    for name in (
+        "tara_llm_request_duration_seconds",
+        "tara_llm_failures_total",
+        "tara_jobs_created_total",
+        'tara_jobs{status="pending"} 0',
+        "tara_scheduler_queued 0",
+        'tara_cache_lookups_total{kind="analysis",result="hit"} 0',
+        'tara_cache_lookups_total{kind="menu",result="miss"} 0',
+        'tara_cache_hit_ratio{kind="analysis"} 0',
+        "tara_event_loop_lag_seconds",
+    ):
+        assert name in body
@@ -0,0 +1,53 @@
+import pytest
+
+from app.parsing import JSONExtractionError, extract_json
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "content, expected",
+    [
+        ('```json\n{"a": 1}\n```', {"a": 1}),
+        ('Claro! Veja [abaixo]:\n{"a": [1, 2,], "b": "x"}\nEspero ter ajudado {:)}', {"a": [1, 2], "b": "x"}),
+        ("{'alimento': 'Feijão', 'ok': True, 'extra': None}", {"alimento": "Feijão", "ok": True, "extra": None}),
+        ('{gramas: 120, // porção média\n "dica": "linha 1\nlinha 2"}', {"gramas": 120, "dica": "linha 1\nlinha 2"}),
+        ("{“alimento”: “Arroz”}", {"alimento": "Arroz"}),
+        ('["Arroz", "Feij', ["Arroz"]),
+        ('{"itens": ["Arroz"], "dica": "Se quis', {"itens": ["Arroz"]}),
+    ],
+)
+def test_extract_json_repairs_common_defects(content, expected):
+    assert extract_json(content) == expected
+
+
+@pytest.mark.unit
+def test_extract_json_respects_expected_type():
+    content = 'Objeto {"a": 1} e a lista ["arroz", "feijão"]'
+
+    assert extract_json(content, expect=list) == ["arroz", "feijão"]
+    assert extract_json(content, expect=dict) == {"a": 1}
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("content", ["", "Desculpe, não consigo ajudar.", '{"a": }}'])
+def test_extract_json_rejects_unusable_responses(content):
+    with pytest.raises(JSONExtractionError):
+        extract_json(content)
+
+
+@pytest.mark.unit
+def test_truncated_response_drops_the_incomplete_item():
+    # "gramas": 12 pode ser o começo de 120; o item cortado sai inteiro.
+    content = '{"escolhas": [{"alimento": "Feijão", "gramas": 80}, {"alimento": "Arroz", "gramas": 12'
+
+    assert extract_json(content) == {"escolhas": [{"alimento": "Feijão", "gramas": 80}]}
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "content",
+    ['{"escolhas": [{"alimento": "Arroz", "gramas": 12', '{"gramas": 12', '["Arr'],
+)
+def test_truncated_response_without_complete_items_is_rejected(content):
+    with pytest.raises(JSONExtractionError):
+        extract_json(content)
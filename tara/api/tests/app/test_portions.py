@@ -0,0 +1,245 @@
+import asyncio
+
+import pytest
+
+from app.calculator import ActivityLevel, Sex, calculate_profile
+from app.food_index import food_index
+from app.foods import split_menu
+from app.portions import LOCAL_SOURCE, match_menu, recommend_locally
+
+
+def _profile() -> dict:
+    return calculate_profile(
+        weight_kg=80,
+        height_cm=175,
+        age=30,
+        sex=Sex.MALE,
+        activity_level=ActivityLevel.MODERATE,
+    )
+
+
+@pytest.mark.unit
+def test_split_menu_and_lookup_ignore_accents_bullets_and_prices():
+    items = split_menu("- Arroz e feijão R$ 12,00\n2. Bife, salada\nSuco")
+
+    assert items == ["Arroz", "feijão", "Bife", "salada", "Suco"]
+    assert food_index.match("FEIJAO").name == "Feijão carioca cozido"
+    assert food_index.match("pão francês").name == "Pão francês"
+
+
+@pytest.mark.unit
+def test_solver_follows_decision_rules_and_fits_meal_target():
+    meal = _profile()["meals"]["almoco"]
+
+    result = recommend_locally(
+        "Arroz branco\nMacarrão\nFeijão\nPicanha\nFrango grelhado\nSalada\nFarofa\nRefrigerante",
+        meal,
+    )
+
+    names = [item["alimento"] for item in result["escolhas"]]
+    assert "Peito de frango grelhado" in names
+    assert "Picanha grelhada" not in names
+    assert "Arroz branco cozido" in names
+    assert "Macarrão cozido" not in names
+    assert "Refrigerante" not in names
+    assert 0.85 * meal["calorias"] <= result["total"]["calorias"] <= meal["calorias"]
+    assert result["origem"] == LOCAL_SOURCE
+    assert "Prefira água" in result["dica"]
+
+
+@pytest.mark.unit
+def test_solver_is_deterministic_and_skips_unknown_menus():
+    meal = _profile()["meals"]["jantar"]
+
+    first = recommend_locally("Frango grelhado\nArroz branco", meal)
+
+    assert first == recommend_locally("frango grelhado, arroz branco", meal)
+    assert recommend_locally("Frango grelhado\nMoqueca de siri", meal) is None
+
+
+@pytest.mark.unit
+def test_analyze_menu_answers_known_foods_without_llm(monkeypatch):
+    import app.agent as agent_module
+
+    def _no_llm():
+        raise AssertionError("LLM não deveria ser chamado")
+
+    monkeypatch.setattr(agent_module, "_create_client", _no_llm)
+
+    result = asyncio.run(
+        agent_module.analyze_menu(_profile(), "Frango grelhado\nArroz branco", "almoco")
+    )
+
+    assert result["origem"] == LOCAL_SOURCE
+    assert result["escolhas"][0]["alimento"] == "Peito de frango grelhado"
+
+
+def _heavy_profile() -> dict:
+    return calculate_profile(
+        weight_kg=120,
+        height_cm=185,
+        age=30,
+        sex=Sex.MALE,
+        activity_level=ActivityLevel.VERY_ACTIVE,
+    )
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "menu",
+    [
+        "Arroz\nFeijão\nFarofa\nBatata frita",
+        "Feijoada\nArroz\nCouve\nLaranja",
+        "Peixe frito\nPurê",
+        "Frango grelhado\nArroz branco",
+    ],
+)
+def test_solver_hands_high_calorie_targets_to_the_llm(menu):
+    meal = _heavy_profile()["meals"]["almoco"]
+
+    assert match_menu(menu) is not None
+    assert recommend_locally(menu, meal) is None
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("menu", ["Suco de laranja", "Pudim\nRefrigerante", "Farofa"])
+def test_solver_hands_menus_without_a_meal_to_the_llm(menu):
+    meal = _profile()["meals"]["almoco"]
+
+    assert match_menu(menu) is not None
+    assert recommend_locally(menu, meal) is None
+
+
+@pytest.mark.unit
+def test_every_local_answer_fits_the_meal_target():
+    for profile in (_profile(), _heavy_profile()):
+        for meal in profile["meals"].values():
+            result = recommend_locally("Frango grelhado\nArroz branco\nFeijão\nSalada", meal)
+            if result is not None:
+                assert result["escolhas"]
+                assert 0.85 * meal["calorias"] <= result["total"]["calorias"] <= meal["calorias"]
+
+
+@pytest.mark.unit
+def test_analyze_menu_uses_the_llm_when_the_solver_misses_the_target(monkeypatch):
+    from tests.support.g4f.client import Client as StubClient
+    import app.agent as agent_module
+
+    monkeypatch.setattr(agent_module, "_create_client", lambda: StubClient())
+
+    result = asyncio.run(
+        agent_module.analyze_menu(_heavy_profile(), "Frango grelhado\nArroz branco", "almoco")
+    )
+
+    assert "origem" not in result
+    assert result["escolhas"][0]["alimento"] == "stub"
+
+
+@pytest.mark.unit
+def test_analyze_batch_sends_only_unreachable_targets_to_the_llm(monkeypatch):
+    from tests.support.g4f.client import Client as StubClient
+    import app.agent as agent_module
+
+    calls = []
+    call = agent_module._call_chat_completion
+
+    async def _counting_call(messages, *args, **kwargs):
+        calls.append(messages)
+        return await call(messages, *args, **kwargs)
+
+    monkeypatch.setattr(agent_module, "_create_client", lambda: StubClient())
+    monkeypatch.setattr(agent_module, "_call_chat_completion", _counting_call)
+
+    batch = asyncio.run(
+        agent_module.analyze_batch(
+            [_profile(), _heavy_profile(), _heavy_profile()],
+            "Frango grelhado\nArroz branco",
+        )
+    )
+
+    local, heavy, same = batch["recommendations"]
+    assert len(calls) == 1
+    assert '"meta_1"' in calls[0][-1]["content"]
+    assert "- Peito de frango grelhado:" in calls[0][-1]["content"]
+    assert local["origem"] == LOCAL_SOURCE
+    assert heavy["escolhas"][0]["alimento"] == "stub"
+    assert same == heavy
+    assert batch["error"] is None
+
+
+@pytest.mark.unit
+def test_analyze_batch_sends_many_distinct_targets_in_one_bounded_call(monkeypatch):
+    from tests.support.g4f.client import Client as StubClient
+    import app.agent as agent_module
+
+    calls = []
+    call = agent_module._call_chat_completion
+
+    async def _counting_call(messages, *args, **kwargs):
+        calls.append(messages)
+        return await call(messages, *args, **kwargs)
+
+    monkeypatch.setattr(agent_module, "_create_client", lambda: StubClient())
+    monkeypatch.setattr(agent_module, "_call_chat_completion", _counting_call)
+    monkeypatch.setattr(agent_module, "_BATCH_LLM_TARGETS", 3)
+    heavy = [
+        calculate_profile(
+            weight_kg=weight,
+            height_cm=185,
+            age=30,
+            sex=Sex.MALE,
+            activity_level=ActivityLevel.VERY_ACTIVE,
+        )
+        for weight in range(110, 130)
+    ]
+
+    batch = asyncio.run(agent_module.analyze_batch(heavy, "Frango grelhado\nArroz branco"))
+
+    assert len(calls) == 1
+    assert calls[0][-1]["content"].count('"meta_') == 3
+    assert all(item["escolhas"][0]["alimento"] == "stub" for item in batch["recommendations"])
+
+
+@pytest.mark.unit
+def test_analyze_batch_keeps_local_results_when_the_llm_fails(monkeypatch):
+    import app.agent as agent_module
+
+    async def _failing(*args, **kwargs):
+        raise RuntimeError("Nenhum modelo disponível para completar a requisicao.")
+
+    monkeypatch.setattr(agent_module, "get_chat_with_fallback", _failing)
+
+    batch = asyncio.run(
+        agent_module.analyze_batch([_profile(), _heavy_profile()], "Frango grelhado\nArroz branco")
+    )
+
+    local, heavy = batch["recommendations"]
+    assert local["origem"] == LOCAL_SOURCE
+    assert heavy is None
+    assert batch["error"] == "Nenhum modelo disponível para completar a requisicao."
+
+
+@pytest.mark.unit
+def test_analyze_day_keeps_local_meals_and_sends_the_rest_to_the_llm(monkeypatch):
+    from tests.support.g4f.client import Client as StubClient
+    import app.agent as agent_module
+
+    monkeypatch.setattr(agent_module, "_create_client", lambda: StubClient())
+    profile = calculate_profile(
+        weight_kg=120,
+        height_cm=170,
+        age=30,
+        sex=Sex.MALE,
+        activity_level=ActivityLevel.VERY_ACTIVE,
+    )
+
+    results = asyncio.run(
+        agent_module.analyze_day(
+            profile,
+            "Frango grelhado\nArroz branco\nFeijão\nSalada",
+            ["almoco", "jantar"],
+        )
+    )
+
+    assert results["jantar"]["origem"] == LOCAL_SOURCE
+    assert results["almoco"]["escolhas"][0]["alimento"] == "stub"
@@ -21,3 +21,78 @@ def test_build_user_prompt_contains_macros_and_meal():
     assert "Meta calórica diária" in prompt
     assert "Proteína" in prompt
     assert "REFEIÇÃO ATUAL" in prompt
+
+
+def _profile(weight_kg: float = 70) -> dict:
+    return calculate_profile(
+        weight_kg=weight_kg,
+        height_cm=170,
+        age=30,
+        sex=Sex.MALE,
+        activity_level=ActivityLevel.MODERATE,
+    )
+
+
+@pytest.mark.unit
+def test_profile_sections_are_built_once_per_profile():
+    from app.prompts import _profile_sections
+
+    _profile_sections.cache_clear()
+    profile = _profile(71)
+
+    lunch = build_user_prompt(profile, "Arroz", "almoco")
+    dinner = build_user_prompt(_profile(71), "Feijão", "jantar")
+
+    assert _profile_sections.cache_info().misses == 1
+    assert _profile_sections.cache_info().hits == 1
+    assert lunch.endswith("preservando massa muscular.")
+    assert "REFEIÇÃO ATUAL: Jantar" in dinner
+    assert "Feijão" in dinner
+
+
+@pytest.mark.unit
+def test_build_messages_reports_sizes_and_enforces_budget():
+    from app.prompts import (
+        SYSTEM_PROMPT,
+        SYSTEM_PROMPT_COMPACT,
+        PromptTooLargeError,
+        build_messages,
+    )
+
+    profile = _profile()
+    full = build_messages(profile, "Arroz", budget_chars=100_000, compact=False)
+    user_chars = full.user_chars
+
+    assert full.messages[0]["content"] == SYSTEM_PROMPT
+    assert full.total_chars == len(SYSTEM_PROMPT) + user_chars
+
+    squeezed = build_messages(
+        profile, "Arroz", budget_chars=len(SYSTEM_PROMPT_COMPACT) + user_chars, compact=False
+    )
+    assert squeezed.compact
+    assert squeezed.messages[0]["content"] == SYSTEM_PROMPT_COMPACT
+
+    with pytest.raises(PromptTooLargeError):
+        build_messages(profile, "Arroz\n" * 5000, budget_chars=8000)
+
+
+@pytest.mark.unit
+def test_build_day_messages_lists_every_meal_target():
+    from app.prompts import build_day_messages
+
+    profile = calculate_profile(
+        weight_kg=70,
+        height_cm=170,
+        age=30,
+        sex=Sex.MALE,
+        activity_level=ActivityLevel.MODERATE,
+        meals_per_day=4,
+    )
+
+    prompt = build_day_messages(profile, "Frango\nArroz", ["almoco", "jantar"])
+    user = prompt.messages[1]["content"]
+
+    for meal_type in ("almoco", "jantar"):
+        assert f"{profile['meals'][meal_type]['calorias']} kcal" in user
+    assert 'usando exatamente as chaves "almoco", "jantar".' in user
+    assert user.startswith(build_user_prompt(profile, "x", "almoco").split("REFEIÇÃO ATUAL")[0])
@@ -0,0 +1,116 @@
+import pytest
+
+from app.recommendation import Recommendation, adjust_to_meal
+
+
+def _recommendation(**overrides) -> Recommendation:
+    data = {
+        "escolhas": [
+            {
+                "alimento": "Frango grelhado",
+                "gramas": 150,
+                "calorias_estimadas": 240,
+                "proteina_g": 46,
+                "carboidrato_g": 0,
+                "gordura_g": 5,
+                "justificativa": "Proteína principal.",
+            },
+            {
+                "alimento": "Arroz branco",
+                "gramas": 300,
+                "calorias_estimadas": 384,
+                "proteina_g": 7.5,
+                "carboidrato_g": 84,
+                "gordura_g": 0.6,
+                "justificativa": "Carboidrato base.",
+            },
+            {
+                "alimento": "Feijão carioca",
+                "gramas": 150,
+                "calorias_estimadas": 114,
+                "proteina_g": 7.2,
+                "carboidrato_g": 20,
+                "gordura_g": 0.8,
+                "justificativa": "Complemento.",
+            },
+        ],
+        "total": {"calorias": 500, "proteina_g": 10, "carboidrato_g": 10, "gordura_g": 1},
+        "dica": "Se quiser mais arroz, retire o feijão.",
+    }
+    data.update(overrides)
+    return Recommendation.model_validate(data)
+
+
+@pytest.mark.unit
+def test_total_is_recomputed_from_items_inside_the_window():
+    result = adjust_to_meal(_recommendation(), {"calorias": 800})
+
+    assert [item["gramas"] for item in result["escolhas"]] == [150, 300, 150]
+    assert result["total"] == {
+        "calorias": 738,
+        "proteina_g": 60.7,
+        "carboidrato_g": 104,
+        "gordura_g": 6.4,
+    }
+    assert result["dica"].startswith("Se quiser mais arroz")
+    assert "ajuste" not in result
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("target", [560, 1200])
+def test_meal_outside_window_is_scaled_keeping_protein(target):
+    result = adjust_to_meal(_recommendation(), {"calorias": target})
+
+    protein, rice, beans = result["escolhas"]
+    assert protein["gramas"] == 150
+    assert protein["calorias_estimadas"] == 240
+    assert 0.85 * target <= result["total"]["calorias"] <= target
+    assert rice["gramas"] % 5 == 0 and beans["gramas"] % 5 == 0
+    assert rice["carboidrato_g"] == pytest.approx(84 * rice["gramas"] / 300, abs=0.05)
+    assert result["ajuste"]["calorias_originais"] == 738
+
+
+@pytest.mark.unit
+def test_everything_is_scaled_when_protein_alone_exceeds_target():
+    result = adjust_to_meal(_recommendation(), {"calorias": 200})
+
+    assert result["escolhas"][0]["gramas"] < 150
+    assert 170 <= result["total"]["calorias"] <= 200
+
+
+@pytest.mark.unit
+def test_model_accepts_numbers_written_as_text_and_keeps_extra_fields():
+    escolha = {"alimento": "Arroz", "gramas": "120 g", "calorias_estimadas": "153,6 kcal"}
+    recommendation = Recommendation.model_validate({"escolhas": [escolha], "origem": "llm"})
+
+    result = adjust_to_meal(recommendation, {"calorias": 170})
+
+    assert result["escolhas"][0]["gramas"] == 120
+    assert result["escolhas"][0]["calorias_estimadas"] == 154
+    assert result["origem"] == "llm"
+
+
+@pytest.mark.unit
+def test_unusable_recommendation_is_rejected_for_the_next_provider():
+    from app.agent import _parse_recommendation
+    from app.parsing import JSONExtractionError
+
+    with pytest.raises(JSONExtractionError):
+        _parse_recommendation('{"escolhas": [{"alimento": "Arroz"}]}')
+    with pytest.raises(JSONExtractionError):
+        _parse_recommendation('{"dica": "Prefira água."}')
+
+
+@pytest.mark.unit
+def test_empty_recommendation_is_a_valid_answer():
+    from app.agent import _parse_recommendation
+
+    recommendation = _parse_recommendation(
+        '{"escolhas": [], "dica": "Cardápio só com refrigerante e pudim; prefira água."}'
+    )
+    result = adjust_to_meal(recommendation, {"calorias": 600})
+
+    assert result["escolhas"] == []
+    assert result["total"]["calorias"] == 0
+    assert "ajuste" not in result
+    assert result["dica"].startswith("Cardápio só")
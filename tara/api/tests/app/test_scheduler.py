@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.scheduler import JobScheduler, QueueFullError
+
+
+@pytest.mark.unit
+def test_scheduler_limits_concurrency_and_reports_positions():
+    scheduler = JobScheduler(workers=2, queue_size=10)
+    running = []
+    peak = []
+
+    async def _work():
+        running.append(1)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.pop()
+
+    async def _run():
+        tickets = [scheduler.submit(_work) for _ in range(5)]
+        positions = [scheduler.position(ticket) for ticket in tickets]
+        await asyncio.sleep(0)
+        after_start = [scheduler.position(ticket) for ticket in tickets]
+        await asyncio.sleep(0.1)
+        await scheduler.close()
+        return positions, after_start
+
+    positions, after_start = asyncio.run(_run())
+
+    assert positions == [1, 2, 3, 4, 5]
+    assert after_start == [None, None, 1, 2, 3]
+    assert max(peak) == 2
+
+
+@pytest.mark.unit
+def test_scheduler_rejects_when_queue_is_full():
+    scheduler = JobScheduler(workers=1, queue_size=1)
+
+    async def _work():
+        await asyncio.sleep(1)
+
+    async def _run():
+        scheduler.submit(_work)
+        with pytest.raises(QueueFullError) as exc_info:
+            scheduler.submit(_work)
+        await scheduler.close()
+        return exc_info.value
+
+    error = asyncio.run(_run())
+
+    assert error.retry_after >= 1
+
+
+@pytest.mark.integration
+def test_analyze_returns_429_with_retry_after_when_queue_is_full(monkeypatch):
+    import app.main as main_module
+
+    async def _reject(runner, timeout_seconds: int, key: str | None = None) -> str:
+        raise QueueFullError(retry_after=7)
+
+    monkeypatch.setattr(main_module, "create_job", _reject)
+    client = TestClient(main_module.app)
+
+    response = client.post(
+        "/api/v1/analyze",
+        json={
+            "profile": {
+                "weight_kg": 70,
+                "height_cm": 170,
+                "age": 30,
+                "sex": "male",
+                "activity_level": "moderate",
+            },
+            "menu_text": "Arroz",
+        },
+    )
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "7"
@@ -0,0 +1,58 @@
+import pytest
+
+from app.scoreboard import CircuitState, ProviderScoreboard
+
+
+class Fast:
+    pass
+
+
+class Slow:
+    pass
+
+
+class Broken:
+    pass
+
+
+@pytest.mark.unit
+def test_rank_providers_prefers_lower_expected_cost():
+    board = ProviderScoreboard()
+    board.record_success("gpt-4o", Slow, 8.0)
+    board.record_success("gpt-4o", Fast, 1.0)
+
+    ranked = board.rank_providers("gpt-4o", (Broken, Slow, Fast))
+
+    assert ranked == [Fast, Slow, Broken]
+
+
+@pytest.mark.unit
+def test_circuit_opens_and_allows_single_half_open_probe(monkeypatch):
+    import app.scoreboard as scoreboard_module
+
+    now = [1000.0]
+    monkeypatch.setattr(scoreboard_module.time, "time", lambda: now[0])
+    board = ProviderScoreboard(failure_threshold=2, cooldown_seconds=30)
+
+    board.record_failure("gpt-4o", Broken, TimeoutError())
+    assert board.try_acquire("gpt-4o", Broken)
+    board.record_failure("gpt-4o", Broken, TimeoutError())
+    assert not board.try_acquire("gpt-4o", Broken)
+    assert board.rank_providers("gpt-4o", (Broken, Fast)) == [Fast, Broken]
+
+    now[0] += 31
+    assert board.try_acquire("gpt-4o", Broken)
+    assert not board.try_acquire("gpt-4o", Broken)
+
+    board.record_success("gpt-4o", Broken, 2.0)
+    row = board.snapshot()[0]
+    assert row["state"] == CircuitState.closed
+    assert row["recent_errors"] == ["TimeoutError", "TimeoutError"]
+
+
+@pytest.mark.unit
+def test_rank_models_moves_fully_open_model_last():
+    board = ProviderScoreboard(failure_threshold=1)
+    board.record_failure("gpt-5.2", Fast, RuntimeError("down"))
+
+    assert board.rank_models(("gpt-5.2", "gpt-4o"), (Fast,)) == ["gpt-4o", "gpt-5.2"]
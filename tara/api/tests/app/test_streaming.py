@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from app.streaming import EscolhasParser, PartialPublisher
+
+
+_PAYLOAD = json.dumps(
+    {
+        "escolhas": [
+            {"alimento": "Arroz {branco}", "gramas": 120, "justificativa": 'diz "ok" ]'},
+            {"alimento": "Feijão", "gramas": 80, "tags": [1, {"x": 2}]},
+        ],
+        "total": {"calorias": 300},
+        "dica": "Se quiser mais arroz, reduza o feijão.",
+    },
+    ensure_ascii=False,
+)
+
+
+@pytest.mark.unit
+def test_parser_emits_each_item_once_as_it_closes():
+    parser = EscolhasParser()
+    emitted = []
+
+    for char in "```json\n" + _PAYLOAD + "\n```":
+        emitted.extend(item["alimento"] for item in parser.feed(char))
+
+    assert emitted == ["Arroz {branco}", "Feijão"]
+    assert parser.items == json.loads(_PAYLOAD)["escolhas"]
+
+
+@pytest.mark.unit
+def test_publisher_follows_first_attempt_and_resets_when_it_fails():
+    published = []
+    publisher = PartialPublisher(published.append)
+    first, second = publisher.attempt(), publisher.attempt()
+    item = '{"escolhas": [{"alimento": "a"},'
+
+    first.feed(item)
+    second.feed('{"escolhas": [{"alimento": "b"},')
+    first.abandon()
+    second.feed('{"alimento": "c"}]')
+
+    assert published == [
+        [{"alimento": "a"}],
+        [],
+        [{"alimento": "b"}, {"alimento": "c"}],
+    ]
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from app.tracing import Trace, span, timeline, use_trace
+
+
+@pytest.mark.unit
+def test_span_without_trace_records_nothing():
+    with span("solto") as record:
+        pass
+
+    assert record is None
+
+
+@pytest.mark.unit
+def test_spans_follow_tasks_and_mark_errors():
+    trace = Trace()
+
+    async def _attempt(name: str, fail: bool):
+        with span("llm_attempt", provider=name):
+            await asyncio.sleep(0.01)
+            if fail:
+                raise RuntimeError("falhou")
+
+    async def _run():
+        with use_trace(trace):
+            await asyncio.gather(
+                _attempt("a", fail=True),
+                _attempt("b", fail=False),
+                return_exceptions=True,
+            )
+
+    asyncio.run(_run())
+
+    by_provider = {span.attributes["provider"]: span for span in trace.spans}
+    assert by_provider["a"].error == "RuntimeError"
+    assert by_provider["b"].error is None
+    assert all(span.duration >= 0.01 for span in trace.spans)
+
+
+@pytest.mark.unit
+def test_timeline_merges_traces_relative_to_origin():
+    request, execution = Trace(), Trace(max_spans=1)
+    request.record("queue", 10.0, 10.5)
+    execution.record("llm_attempt", 10.2, 11.0, model="m")
+    execution.record("parse_response", 11.0, 11.01)
+
+    spans = timeline(10.0, request, execution, None)
+
+    assert [span["name"] for span in spans] == ["queue", "llm_attempt"]
+    assert spans[1] == {
+        "name": "llm_attempt",
+        "offset_ms": 200.0,
+        "duration_ms": 800.0,
+        "attributes": {"model": "m"},
+    }
+    assert execution.dropped == 1
@@ -3,6 +3,8 @@ from __future__ import annotations
 import sys
 from pathlib import Path
 
+import pytest
+
 
 ROOT = Path(__file__).resolve().parents[1]
 SUPPORT = ROOT / "tests" / "support"
@@ -12,3 +14,32 @@ if str(ROOT) not in sys.path:
 
 if SUPPORT.exists() and str(SUPPORT) not in sys.path:
     sys.path.insert(0, str(SUPPORT))
+
+
+@pytest.fixture(autouse=True)
+def _reset_provider_scoreboard():
+    from app.scoreboard import scoreboard
+
+    scoreboard.reset()
+    yield
+    scoreboard.reset()
+
+
+@pytest.fixture(autouse=True)
+def _reset_result_cache():
+    from app.cache import menu_cache, result_cache
+
+    result_cache.clear()
+    menu_cache.clear()
+    yield
+    result_cache.clear()
+    menu_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def _reset_metrics():
+    from app.metrics import registry
+
+    registry.clear()
+    yield
+    registry.clear()
@@ -1,4 +1,5 @@
 import json
+import re
 
 
 class _Message:
@@ -16,15 +17,57 @@ class _Response:
         self.choices = [_Choice(content)]
 
 
+class _Delta:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class _ChunkChoice:
+    def __init__(self, content: str):
+        self.delta = _Delta(content)
+
+
+class _Chunk:
+    def __init__(self, content: str):
+        self.choices = [_ChunkChoice(content)]
+
+
+async def _stream(content: str, size: int = 16):
+    for start in range(0, len(content), size):
+        yield _Chunk(content[start : start + size])
+
+
 class _ChatCompletions:
     @staticmethod
-    async def create(model: str, messages: list[dict], **kwargs):
+    async def create(model: str, messages: list[dict], stream: bool = False, **kwargs):
+        response = await _ChatCompletions._respond(messages)
+        if stream:
+            return _stream(response.choices[0].message.content)
+        return response
+
+    @staticmethod
+    async def _respond(messages: list[dict]):
         prompt = "\n".join(m.get("content", "") for m in messages)
 
         if "Extraia do texto abaixo uma lista" in prompt:
             items = ["Frango grelhado", "Arroz branco"]
             return _Response(json.dumps(items))
 
+        if "Estime a composição média por 100 g" in prompt:
+            names = re.findall(r"^- (.+)$", prompt.split("Alimentos:", 1)[1], re.MULTILINE)
+            rows = [
+                {
+                    "nome": name,
+                    "categoria": "carboidrato",
+                    "kcal": 150,
+                    "proteina_g": 3,
+                    "carboidrato_g": 30,
+                    "gordura_g": 2,
+                }
+                for name in names
+            ]
+            return _Response(json.dumps(rows))
+
         payload = {
             "escolhas": [
                 {
@@ -45,6 +88,10 @@ class _ChatCompletions:
             },
             "dica": "Stub local para testes.",
         }
+        day = re.search(r"usando exatamente as chaves (.+)\.", prompt)
+        if day is not None:
+            keys = re.findall(r'"([^"]+)"', day.group(1))
+            return _Response(json.dumps({"refeicoes": {key: payload for key in keys}}))
         return _Response(json.dumps(payload))
 
 
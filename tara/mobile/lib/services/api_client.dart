@@ -53,6 +53,65 @@ class ApiClient {
     }
 
     final deadline = DateTime.now().add(const Duration(minutes: 2));
+    final streamed = await _waitWithEvents(jobId, deadline);
+    if (streamed != null) {
+      return streamed;
+    }
+    return _pollStatus(jobId, deadline);
+  }
+
+  /// Acompanha o job via SSE; retorna null se o stream não estiver disponível
+  /// ou terminar sem status final, para cair no polling.
+  Future<AnalyzeResult?> _waitWithEvents(String jobId, DateTime deadline) async {
+    final eventsUri = Uri.parse('$baseUrl/api/v1/analyze/$jobId/events');
+    final request = http.Request('GET', eventsUri)
+      ..headers['Accept'] = 'text/event-stream';
+    final remaining = deadline.difference(DateTime.now());
+
+    http.StreamedResponse response;
+    try {
+      response = await _http.send(request).timeout(remaining);
+    } catch (_) {
+      return null;
+    }
+    if (response.statusCode != 200) {
+      return null;
+    }
+
+    final dataLines = <String>[];
+    final lines = response.stream
+        .transform(utf8.decoder)
+        .transform(const LineSplitter())
+        .timeout(deadline.difference(DateTime.now()));
+    try {
+      await for (final line in lines) {
+        if (DateTime.now().isAfter(deadline)) {
+          throw TimeoutException('Tempo limite ao aguardar análise');
+        }
+        if (line.startsWith('data:')) {
+          dataLines.add(line.substring(5).trimLeft());
+          continue;
+        }
+        if (line.isNotEmpty || dataLines.isEmpty) {
+          continue;
+        }
+        final statusData =
+            jsonDecode(dataLines.join('\n')) as Map<String, dynamic>;
+        dataLines.clear();
+        final result = _resultFromStatus(statusData);
+        if (result != null) {
+          return result;
+        }
+      }
+    } on TimeoutException {
+      throw TimeoutException('Tempo limite ao aguardar análise');
+    } on http.ClientException {
+      return null;
+    }
+    return null;
+  }
+
+  Future<AnalyzeResult> _pollStatus(String jobId, DateTime deadline) async {
     while (DateTime.now().isBefore(deadline)) {
       await Future<void>.delayed(const Duration(seconds: 2));
       final statusUri = Uri.parse('$baseUrl/api/v1/analyze/$jobId');
@@ -62,21 +121,34 @@ class ApiClient {
       }
       final statusDecoded = utf8.decode(statusResponse.bodyBytes);
       final statusData = jsonDecode(statusDecoded) as Map<String, dynamic>;
-      final status = statusData['status']?.toString();
-      if (status == 'done') {
-        final result = statusData['result'];
-        if (result is Map<String, dynamic>) {
-          return AnalyzeResult.fromJson(result);
-        }
-        throw Exception('Resultado inválido da análise');
-      }
-      if (status == 'error') {
-        final error = statusData['error']?.toString() ?? 'Erro desconhecido';
-        throw Exception(error);
+      final result = _resultFromStatus(statusData);
+      if (result != null) {
+        return result;
       }
     }
     throw TimeoutException('Tempo limite ao aguardar análise');
   }
+
+  /// Resultado quando o status é final; null enquanto pending/running.
+  AnalyzeResult? _resultFromStatus(Map<String, dynamic> statusData) {
+    final status = statusData['status']?.toString();
+    if (status == 'done') {
+      final result = statusData['result'];
+      if (result is Map<String, dynamic>) {
+        return AnalyzeResult.fromJson(result);
+      }
+      throw Exception('Resultado inválido da análise');
+    }
+    if (status == 'error') {
+      final error = statusData['error']?.toString() ?? 'Erro desconhecido';
+      throw Exception(error);
+    }
+    if (status == 'cancelled') {
+      final error = statusData['error']?.toString() ?? 'Análise cancelada';
+      throw Exception(error);
+    }
+    return null;
+  }
 }
 
 class HttpException implements Exception {